@@ -118,3 +118,42 @@ class UserProfileImage(BaseModel):
     user = models.ForeignKey(User, related_name="profile_img", on_delete=models.SET_NULL, null=True, blank=True)
     image = CloudinaryField("profile_images/") 
     uploaded_at = models.DateTimeField(auto_now_add=True)
+    
+class ResourceLock(BaseModel):
+    """
+    Lease taken by futaverse.utils.locks.LeaseLock. A row whose expires_at has
+    passed is free to be taken over; the owner token stops a holder whose lease
+    lapsed from releasing or renewing someone else's.
+    """
+    key = models.CharField(max_length=255, unique=True)
+    owner = models.UUIDField()
+    expires_at = models.DateTimeField()
+    
+    def __str__(self):
+        return f"{self.key} until {self.expires_at}"
+    
+class EmailDelivery(BaseModel):
+    """
+    Outcome of one recipient of a bulk send. Sends are grouped by campaign, and
+    sending the same campaign again skips recipients already marked sent.
+    """
+    class Status(models.TextChoices):
+        PENDING = 'pending', 'Pending'
+        SENT = 'sent', 'Sent'
+        FAILED = 'failed', 'Failed'
+        
+    campaign = models.CharField(max_length=255)
+    email = models.EmailField()
+    status = models.CharField(max_length=20, choices=Status.choices, default=Status.PENDING)
+    
+    attempts = models.PositiveIntegerField(default=0)
+    last_error = models.TextField(blank=True, null=True)
+    sent_at = models.DateTimeField(blank=True, null=True)
+    
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['campaign', 'email'], name='unique_campaign_recipient'),
+        ]
+        
+    def __str__(self):
+        return f"{self.email} ({self.status}) for {self.campaign}"
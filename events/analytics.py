@@ -0,0 +1,185 @@
+from django.db import connection, transaction
+from django.db.models import Count, Sum
+from django.db.models.functions import TruncHour, TruncDay
+from django.utils import timezone
+
+from .models import Event, Ticket, TicketPurchase, HourlyTicketSales, TicketSalesDelta
+
+from collections import defaultdict
+from datetime import timezone as dt_timezone
+from decimal import Decimal
+
+FOLD_SQL = """
+    WITH folded AS (
+        DELETE FROM {deltas} WHERE id IN (
+            SELECT id FROM {deltas} ORDER BY id LIMIT %s FOR UPDATE SKIP LOCKED
+        )
+        RETURNING ticket_id, event_id, hour, created, paid, checked_in, revenue
+    ), merged AS (
+        INSERT INTO {table} (is_deleted, created_at, ticket_id, event_id, hour, created, paid, checked_in, revenue)
+        SELECT FALSE, now(), ticket_id, event_id, hour, SUM(created), SUM(paid), SUM(checked_in), SUM(revenue)
+        FROM folded
+        GROUP BY ticket_id, event_id, hour
+        ORDER BY ticket_id, hour
+        ON CONFLICT (ticket_id, hour) DO UPDATE SET
+            created = {table}.created + EXCLUDED.created,
+            paid = {table}.paid + EXCLUDED.paid,
+            checked_in = {table}.checked_in + EXCLUDED.checked_in,
+            revenue = {table}.revenue + EXCLUDED.revenue
+        RETURNING 1
+    )
+    SELECT COUNT(*) FROM folded
+"""
+
+def floor_hour(moment):
+    return moment.astimezone(dt_timezone.utc).replace(minute=0, second=0, microsecond=0)
+
+class SalesAnalytics:
+    """
+    Maintains HourlyTicketSales. Record calls belong inside the transaction that
+    made the change, so a rollback undoes the increment with everything else.
+    They only INSERT a TicketSalesDelta, which takes no lock another buyer could
+    wait on; fold() adds the deltas to the hourly rows off the purchase path.
+    """
+    @staticmethod
+    def record(ticket: Ticket, at=None, created=0, paid=0, checked_in=0, revenue=0):
+        SalesAnalytics.record_many([(ticket.id, ticket.event_id, at or timezone.now(), created, paid, checked_in, revenue)])
+
+    @staticmethod
+    def record_many(increments):
+        """
+        Records (ticket_id, event_id, at, created, paid, checked_in, revenue)
+        increments with one INSERT.
+        """
+        totals = defaultdict(lambda: [0, 0, 0, Decimal("0")])
+        for ticket_id, event_id, at, created, paid, checked_in, revenue in increments:
+            bucket = totals[(ticket_id, event_id, floor_hour(at))]
+            bucket[0] += created
+            bucket[1] += paid
+            bucket[2] += checked_in
+            bucket[3] += Decimal(revenue)
+
+        TicketSalesDelta.objects.bulk_create([
+            TicketSalesDelta(ticket_id=ticket_id, event_id=event_id, hour=hour, created=created, paid=paid, checked_in=checked_in, revenue=revenue)
+            for (ticket_id, event_id, hour), (created, paid, checked_in, revenue) in sorted(totals.items())
+        ])
+
+    @staticmethod
+    def fold(batch_size=5000):
+        """
+        Moves recorded deltas into HourlyTicketSales, one statement per batch.
+        Safe to run from several workers. Returns how many deltas were folded.
+        """
+        sql = FOLD_SQL.format(deltas=TicketSalesDelta._meta.db_table, table=HourlyTicketSales._meta.db_table)
+        folded = 0
+
+        while True:
+            with transaction.atomic(), connection.cursor() as cursor:
+                cursor.execute(sql, [batch_size])
+                count = cursor.fetchone()[0]
+
+            folded += count
+            if count < batch_size:
+                return folded
+
+    @staticmethod
+    def rebuild(events=None):
+        """
+        Recomputes the counters for the given events (all by default) from
+        TicketPurchase. Run it when writes are quiet; sales recorded while it
+        runs can be counted twice or not at all until the next rebuild.
+
+        Revenue follows the live path: paid purchases at the ticket's current
+        price, except free tickets and comps, which took no payment.
+        """
+        purchases = TicketPurchase.objects.all()
+        rollups = HourlyTicketSales.objects.all()
+        deltas = TicketSalesDelta.objects.all()
+
+        if events is not None:
+            purchases = purchases.filter(ticket__event__in=events)
+            rollups = rollups.filter(event__in=events)
+            deltas = deltas.filter(event__in=events)
+
+        rows = defaultdict(lambda: {'created': 0, 'paid': 0, 'comped': 0, 'checked_in': 0})
+
+        def add(field, timestamp, **extra):
+            grouped = (
+                purchases.filter(**{f"{timestamp}__isnull": False}, **extra)
+                .annotate(bucket=TruncHour(timestamp, tzinfo=dt_timezone.utc))
+                .values('ticket_id', 'ticket__event_id', 'bucket')
+                .annotate(total=Count('id'))
+            )
+            for row in grouped:
+                rows[(row['ticket_id'], row['ticket__event_id'], row['bucket'])][field] += row['total']
+
+        # Imported here because comps record their sales through this module
+        from .comps import REFERENCE_PREFIX as COMP_REFERENCE_PREFIX
+
+        add('created', 'created_at')
+        add('paid', 'paid_at', is_paid=True)
+        add('comped', 'paid_at', is_paid=True, payment_reference__startswith=COMP_REFERENCE_PREFIX)
+        add('checked_in', 'checked_in_at', checked_in=True)
+
+        tickets = Ticket.all_objects.filter(id__in={ticket_id for ticket_id, _, _ in rows}).only('price', 'discount_perc', 'type')
+        unit_prices = {ticket.id: Decimal("0") if ticket.type == Ticket.Type.DEFAULT else ticket.sales_price for ticket in tickets}
+
+        objects = []
+        for (ticket_id, event_id, hour), counts in rows.items():
+            unit_price = unit_prices[ticket_id]
+            objects.append(HourlyTicketSales(
+                ticket_id=ticket_id, event_id=event_id, hour=hour,
+                created=counts['created'], paid=counts['paid'], checked_in=counts['checked_in'],
+                revenue=(unit_price * (counts['paid'] - counts['comped'])).quantize(Decimal("0.01"))
+            ))
+
+        with transaction.atomic():
+            # Unfolded deltas are already counted in the rebuilt rows
+            deltas.delete()
+            rollups.delete()
+            HourlyTicketSales.objects.bulk_create(objects, batch_size=1000)
+
+        return len(objects)
+
+    @staticmethod
+    def series(event: Event, start, end, bucket="hour", ticket=None):
+        """
+        Sales curve for an event between start and end, from one range scan of
+        hourly_sales_event_idx plus one of the deltas not folded in yet.
+        """
+        truncate = TruncDay('hour') if bucket == "day" else TruncHour('hour')
+        points = {}
+
+        for model in [HourlyTicketSales, TicketSalesDelta]:
+            rows = model.objects.filter(event=event, hour__gte=floor_hour(start), hour__lt=end)
+            if ticket is not None:
+                rows = rows.filter(ticket=ticket)
+
+            grouped = rows.annotate(bucket=truncate).values('bucket').annotate(
+                created=Sum('created'),
+                paid=Sum('paid'),
+                checked_in=Sum('checked_in'),
+                revenue=Sum('revenue'),
+            )
+
+            for row in grouped:
+                point = points.setdefault(row['bucket'], {'bucket': row['bucket'], 'created': 0, 'paid': 0, 'checked_in': 0, 'revenue': Decimal("0.00")})
+                for field in ['created', 'paid', 'checked_in', 'revenue']:
+                    point[field] += row[field]
+
+        return [points[key] for key in sorted(points)]
+
+    @staticmethod
+    def summarize(points):
+        created = sum(point['created'] for point in points)
+        paid = sum(point['paid'] for point in points)
+        checked_in = sum(point['checked_in'] for point in points)
+
+        return {
+            'created': created,
+            'paid': paid,
+            'checked_in': checked_in,
+            'revenue': sum((point['revenue'] for point in points), Decimal("0.00")),
+            'conversion_rate': round(paid / created, 4) if created else None,
+            'check_in_rate': round(checked_in / paid, 4) if paid else None,
+        }
@@ -1,3 +1,36 @@
+"""
+Calendar data for events: Google Calendar bodies and per-user iCalendar feeds.
+
+Each user has a feed of the events they host and hold paid tickets for, at a URL
+carrying a signed token, so calendar apps can subscribe without logging in.
+Attendees get their events there rather than through Google invites.
+
+Calendar apps poll feeds every few minutes, so a poll should mostly cost one
+aggregate query and a 304. The ETag and Last-Modified come from that aggregate,
+and change whenever an event in the feed is edited or the set of events changes.
+Each event's VEVENT is cached under a key that includes its updated_at. A feed
+that did change is rebuilt from those cached blocks, and only the edited events
+are rendered again. The cache is the shared database cache (see CACHES), so
+every worker, and every subscriber's feed, reuses the same blocks.
+"""
+from django.conf import settings
+from django.core import signing
+from django.core.cache import cache
+from django.db.models import Q, Count, Max
+from django.utils import timezone
+
+from .models import Event
+
+from datetime import timedelta, timezone as dt_timezone
+
+import hashlib
+
+FEED_SALT = "events.calendar_feed"
+FEED_CACHE_TIMEOUT = getattr(settings, "CALENDAR_FEED_CACHE_SECONDS", 60 * 60 * 24)
+# Older events drop out of feeds, so a feed does not grow for ever
+FEED_PAST_DAYS = getattr(settings, "CALENDAR_FEED_PAST_DAYS", 90)
+FEED_UID_DOMAIN = getattr(settings, "CALENDAR_FEED_UID_DOMAIN", "futaverse")
+
 
 
 
@@ -27,4 +60,132 @@ def create_calender_event_data(title, description, date, start_time, end_time, a
         },
     }
     
-    return event
\ No newline at end of file
+    return event
+
+def feed_token(user):
+    return signing.Signer(salt=FEED_SALT).sign(user.sqid)
+
+def user_sqid_for_token(token):
+    """
+    Returns None for a token that was not issued by feed_token.
+    """
+    try:
+        return signing.Signer(salt=FEED_SALT).unsign(token)
+    except signing.BadSignature:
+        return None
+
+def feed_events(user_id):
+    since = timezone.now() - timedelta(days=FEED_PAST_DAYS)
+    
+    return Event.objects.filter(
+        Q(creator_id=user_id) | Q(tickets__purchases__user_id=user_id, tickets__purchases__is_paid=True, tickets__purchases__is_deleted=False),
+        starts_at__gte=since,
+    )
+    
+def feed_validators(user_id):
+    """
+    (etag, last_modified) for the user's feed, from one aggregate query.
+    """
+    state = feed_events(user_id).aggregate(
+        events=Count('id', distinct=True),
+        edited=Max('updated_at'),
+        joined=Max('tickets__purchases__paid_at'),
+    )
+    
+    last_modified = max(filter(None, [state['edited'], state['joined']]), default=None)
+    stamp = last_modified.timestamp() if last_modified else 0
+    etag = hashlib.sha1(f"{user_id}:{state['events']}:{stamp}:{FEED_PAST_DAYS}".encode()).hexdigest()[:20]
+    
+    return f'"{etag}"', last_modified
+
+def _escape(text):
+    return str(text).replace('\\', '\\\\').replace(';', '\\;').replace(',', '\\,').replace('\r\n', '\\n').replace('\n', '\\n')
+
+def _fold(line):
+    """
+    Splits a content line into 75-octet pieces, as RFC 5545 requires.
+    """
+    encoded = line.encode()
+    if len(encoded) <= 75:
+        return line
+    
+    pieces, current = [], b""
+    for char in line:
+        octets = char.encode()
+        if len(current) + len(octets) > (75 if not pieces else 74):
+            pieces.append(current.decode())
+            current = b""
+        current += octets
+    pieces.append(current.decode())
+    
+    return "\r\n ".join(pieces)
+
+def _utc(value):
+    return value.astimezone(dt_timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+
+def vevent_key(event: Event):
+    return f"calendar_vevent:{event.id}:{event.updated_at.timestamp()}"
+
+def render_vevent(event: Event):
+    virtual_meeting = getattr(event, 'virtual_meeting', None)
+    join_url = virtual_meeting.join_url if virtual_meeting else None
+    
+    description = f"Join Meeting: {join_url}\n\n{event.description}" if join_url else event.description
+    
+    lines = [
+        "BEGIN:VEVENT",
+        f"UID:{event.sqid}@{FEED_UID_DOMAIN}",
+        f"DTSTAMP:{_utc(event.updated_at)}",
+        f"LAST-MODIFIED:{_utc(event.updated_at)}",
+        f"DTSTART:{_utc(event.starts_at)}",
+        f"DTEND:{_utc(event.starts_at + timedelta(minutes=event.duration_mins))}",
+        f"SUMMARY:{_escape(event.title)}",
+        f"DESCRIPTION:{_escape(description)}",
+        f"LOCATION:{_escape(event.venue or join_url or 'Online')}",
+        f"STATUS:{'CANCELLED' if event.is_cancelled else 'CONFIRMED'}",
+    ]
+    if join_url:
+        lines.append(f"URL:{join_url}")
+    lines.append("END:VEVENT")
+    
+    return "\r\n".join(_fold(line) for line in lines)
+
+def render_feed(user_id, etag):
+    """
+    The feed as of `etag`. Only events edited since they were last cached are
+    rendered again.
+    """
+    feed_key = f"calendar_feed:{user_id}:{etag}"
+    feed = cache.get(feed_key)
+    if feed is not None:
+        return feed
+    
+    events = list(
+        Event.objects.filter(id__in=feed_events(user_id).values('id'))
+        .select_related('virtual_meeting')
+        .order_by('starts_at')
+    )
+    
+    keys = {event.id: vevent_key(event) for event in events}
+    blocks = cache.get_many(keys.values())
+    
+    missing = {keys[event.id]: render_vevent(event) for event in events if keys[event.id] not in blocks}
+    if missing:
+        cache.set_many(missing, FEED_CACHE_TIMEOUT)
+        blocks.update(missing)
+    
+    feed = "\r\n".join([
+        "BEGIN:VCALENDAR",
+        "VERSION:2.0",
+        f"PRODID:-//{FEED_UID_DOMAIN}//Events//EN",
+        "CALSCALE:GREGORIAN",
+        "METHOD:PUBLISH",
+        "X-WR-CALNAME:Futaverse",
+        "X-PUBLISHED-TTL:PT15M",
+        *[blocks[keys[event.id]] for event in events],
+        "END:VCALENDAR",
+        "",
+    ])
+    
+    cache.set(feed_key, feed, FEED_CACHE_TIMEOUT)
+    return feed
@@ -0,0 +1,185 @@
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from django.db.models.functions import Greatest
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .models import Event, TicketPurchase, CalendarSync, OutboxMessage
+from . import outbox
+
+from datetime import timedelta
+from logging import getLogger
+
+logger = getLogger(__name__)
+
+SYNC_WINDOW_SECONDS = getattr(settings, "CALENDAR_SYNC_WINDOW_SECONDS", 30)
+
+class CalendarSyncEngine:
+    """
+    Coalesces attendee syncs to Google Calendar.
+
+    Purchases mark their event dirty; only the first mark in a window schedules a
+    flush, so every purchase inside SYNC_WINDOW_SECONDS shares one PATCH. Each
+    purchase is flagged once Google has it, which lets a flush skip the API call
+    entirely when nobody new needs to be invited.
+    """
+    @staticmethod
+    def mark_dirty(event: Event):
+        """
+        Call inside the purchase transaction. The mark itself runs once that
+        commits, so a rolled back purchase schedules nothing and the
+        CalendarSync row is never locked for the length of a purchase.
+        """
+        event_id = event.id
+        transaction.on_commit(lambda: CalendarSyncEngine._mark(event_id))
+
+    @staticmethod
+    def _mark(event_id):
+        # Runs after the purchase or webhook has committed, so a failure here must
+        # not fail its response. Nothing is left half done: the next mark retries.
+        try:
+            CalendarSyncEngine._mark_dirty(event_id)
+        except Exception:
+            logger.exception(f"Could not schedule a calendar sync for event {event_id}")
+
+    @staticmethod
+    def _mark_dirty(event_id):
+        # Dirty means a flush is scheduled and has not claimed the event yet. It
+        # reads the purchases after claiming, so it will see the one just committed.
+        if CalendarSync.objects.filter(event_id=event_id, dirty_since__isnull=False).exists():
+            return
+
+        now = timezone.now()
+        state, _ = CalendarSync.objects.get_or_create(event_id=event_id)
+
+        # Dirty and scheduled together, or a row could stay dirty with no flush coming
+        with transaction.atomic():
+            became_dirty = CalendarSync.objects.filter(pk=state.pk, dirty_since__isnull=True).update(dirty_since=now)
+
+            if became_dirty:
+                outbox.enqueue(
+                    OutboxMessage.Topic.CALENDAR_SYNC,
+                    {"event_id": event_id, "dirty_since": now.isoformat()},
+                    delay=timedelta(seconds=SYNC_WINDOW_SECONDS)
+                )
+
+    @staticmethod
+    def flush(event: Event, dirty_since=None):
+        """
+        Sends one PATCH covering every purchase since the last flush. The creator's
+        other dirty events ride along in the same Calendar batch request, so a
+        creator with many events on sale pays one round trip per window. Raises
+        on Google errors for this event so the outbox retries; unsynced purchases
+        stay flagged as such, and a failed ride-along is retried by its own flush.
+        """
+        from .services import EventService, GoogleCalendarService, CalendarBatch, get_user_credentials
+
+        others = list(
+            Event.objects.select_related('creator', 'virtual_meeting')
+            .filter(creator_id=event.creator_id, calendar_sync__dirty_since__isnull=False, virtual_meeting__external_calendar_event_id__isnull=False)
+            .exclude(pk=event.pk)
+            .order_by('calendar_sync__dirty_since')[:CalendarBatch.LIMIT - 1]
+        )
+
+        flushes = []
+        for target in [event, *others]:
+            claimed = CalendarSyncEngine._claim(target)
+            if claimed is None or not CalendarSyncEngine._on_calendar(target):
+                # Meetings not mirrored yet have no invite; mirror_to_calendar sends the whole list
+                continue
+
+            state, since = claimed
+            pending_ids = list(TicketPurchase.objects.filter(ticket__event=target, is_paid=True, calendar_synced=False).values_list('id', flat=True))
+
+            if not pending_ids:
+                logger.info(f"Calendar sync for event {target.id} skipped: nobody new to invite")
+                continue
+
+            if target.pk == event.pk:
+                since = since or dirty_since
+            flushes.append((target, state, pending_ids, since))
+
+        if not flushes:
+            return
+
+        batch = GoogleCalendarService(get_user_credentials(event.creator), event.creator).batch()
+        own = None
+
+        for target, state, pending_ids, since in flushes:
+            # Calendar replaces the attendees array on PATCH, so the body still carries
+            # the full list; the delta decides whether a call is needed at all.
+            operation = batch.add_attendees(
+                target.virtual_meeting.external_calendar_event_id,
+                EventService.attendee_emails(target),
+                callback=CalendarSyncEngine._on_synced(target, state, pending_ids, since)
+            )
+            if target.pk == event.pk:
+                own = operation
+
+        batch.execute()
+
+        if own is not None and own.error is not None:
+            raise own.error
+
+    @staticmethod
+    def _on_calendar(event: Event):
+        virtual_meeting = getattr(event, 'virtual_meeting', None)
+        return bool(virtual_meeting and virtual_meeting.external_calendar_event_id)
+
+    @staticmethod
+    def _claim(event: Event):
+        with transaction.atomic():
+            state = CalendarSync.objects.select_for_update().filter(event=event).first()
+            if state is None:
+                return None
+
+            since = state.dirty_since
+            CalendarSync.objects.filter(pk=state.pk).update(dirty_since=None)
+
+        return state, since
+
+    @staticmethod
+    def _on_synced(event: Event, state, pending_ids, dirty_since):
+        def callback(response, error):
+            if error is not None:
+                logger.warning(f"Calendar sync for event {event.id} failed: {error}")
+                return
+
+            TicketPurchase.objects.filter(id__in=pending_ids).update(calendar_synced=True)
+
+            now = timezone.now()
+            lag_ms = int((now - dirty_since).total_seconds() * 1000) if dirty_since else None
+
+            CalendarSync.objects.filter(pk=state.pk).update(
+                syncs_requested=F('syncs_requested') + len(pending_ids),
+                patches_sent=F('patches_sent') + 1,
+                last_synced_at=now,
+                last_lag_ms=lag_ms,
+                max_lag_ms=Greatest(F('max_lag_ms'), lag_ms or 0)
+            )
+
+            state.refresh_from_db()
+            logger.info(
+                f"Calendar sync for event {event.id}: invited {len(pending_ids)} new attendee(s) in one call, "
+                f"lag {lag_ms}ms, {state.calls_saved} call(s) saved to date"
+            )
+
+        return callback
+
+    @staticmethod
+    def flush_from_payload(payload):
+        event = Event.objects.select_related('creator', 'virtual_meeting').filter(id=payload["event_id"]).first()
+        if not event:
+            return
+
+        dirty_since = parse_datetime(payload["dirty_since"]) if payload.get("dirty_since") else None
+        CalendarSyncEngine.flush(event, dirty_since)
+
+    @staticmethod
+    def reset(event: Event, synced: bool):
+        """
+        Records that the whole attendee list was (re)sent or dropped by another path,
+        such as creating or deleting the calendar event on a mode change.
+        """
+        TicketPurchase.objects.filter(ticket__event=event, is_paid=True).update(calendar_synced=synced)
@@ -0,0 +1,114 @@
+"""
+Complimentary tickets, issued by an event's creator to a list of emails.
+
+An import is one transaction with a fixed number of queries, however long the
+list: one to find who already has a ticket, one to link known users, one take of
+the ticket's stock, one bulk INSERT per COMP_BATCH_SIZE rows, and one of each
+side effect (sales roll-up, analytics, calendar sync, batched confirmations).
+
+Comps count as sold but earn nothing, so revenue figures leave them out: see
+Ticket.quantity_comped and the comp_ payment reference.
+"""
+from django.conf import settings
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.core.validators import validate_email
+from django.db import transaction
+from django.db.models import F
+from django.db.models.functions import Lower
+from django.utils import timezone
+
+from .models import Event, Ticket, TicketPurchase
+from .inventory import InventoryService
+from .services import EventService
+from .analytics import SalesAnalytics
+
+from core.models import User
+
+from logging import getLogger
+
+import uuid
+
+logger = getLogger(__name__)
+
+MAX_EMAILS = getattr(settings, "COMP_MAX_EMAILS", 5000)
+BATCH_SIZE = getattr(settings, "COMP_BATCH_SIZE", 1000)
+REFERENCE_PREFIX = "comp_"
+
+def normalize(emails):
+    """
+    Splits the list into (unique valid addresses, invalid entries), lowercased
+    and in their original order.
+    """
+    valid, invalid = {}, []
+
+    for raw in emails:
+        email = raw.strip().lower()
+        try:
+            validate_email(email)
+        except DjangoValidationError:
+            invalid.append(raw)
+            continue
+        valid.setdefault(email, None)
+
+    return list(valid), invalid
+
+class CompService:
+    @staticmethod
+    def issue(event: Event, ticket: Ticket, emails):
+        """
+        Gives a paid, free-of-charge ticket to every address that does not have
+        one for the event yet. Returns a summary of what was created and skipped.
+        Raises TicketSoldOut/EventFull if there are not enough seats, in which
+        case nothing is created.
+        """
+        emails, invalid = normalize(emails)
+        reference = f"{REFERENCE_PREFIX}{uuid.uuid4().hex}"
+        now = timezone.now()
+
+        with transaction.atomic():
+            # Serializes imports for the ticket, so two of them cannot comp the same address
+            list(Ticket.objects.select_for_update().filter(pk=ticket.pk).values_list('id', flat=True))
+
+            existing = set(
+                TicketPurchase.objects.annotate(email_lower=Lower('email'))
+                .filter(ticket__event=event, is_paid=True, email_lower__in=emails)
+                .values_list('email_lower', flat=True)
+            )
+            new_emails = [email for email in emails if email not in existing]
+
+            if new_emails:
+                users = dict(
+                    User.objects.annotate(email_lower=Lower('email'))
+                    .filter(email_lower__in=new_emails)
+                    .values_list('email_lower', 'id')
+                )
+
+                InventoryService.take_group({ticket: len(new_emails)}, 'sold')
+                # quantity_sold is a roll-up of the shards, so it is refreshed rather than added to
+                Ticket.objects.filter(pk=ticket.pk).update(quantity_comped=F('quantity_comped') + len(new_emails))
+                InventoryService.rollup(Ticket.objects.filter(pk=ticket.pk))
+
+                purchases = TicketPurchase.objects.bulk_create([
+                    TicketPurchase(
+                        user_id=users.get(email),
+                        ticket=ticket,
+                        email=email,
+                        payment_reference=reference,
+                        is_paid=True,
+                        paid_at=now
+                    )
+                    for email in new_emails
+                ], batch_size=BATCH_SIZE)
+
+                # One calendar sync and one confirmation job cover the whole import
+                EventService.queue_ticket_side_effects(purchases[0])
+                SalesAnalytics.record(ticket, at=now, created=len(purchases), paid=len(purchases))
+
+        logger.info(f"Comped {len(new_emails)} ticket(s) for event {event.id} ({len(existing)} already held one)")
+
+        return {
+            "payment_reference": reference if new_emails else None,
+            "created": len(new_emails),
+            "already_registered": sorted(existing),
+            "invalid": invalid,
+        }
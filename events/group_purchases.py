@@ -0,0 +1,123 @@
+"""
+Group purchases: many seats, one checkout.
+
+All the seats of a group are taken in one transaction (InventoryService.take_group),
+bulk created as purchases that share one payment_reference, and paid for with a
+single Paystack transaction under that reference. When the charge succeeds,
+fulfil() marks the whole group paid with set-based updates, whatever its size.
+"""
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .models import TicketPurchase, TicketReservation
+from .inventory import InventoryService, HOLD_TTL_MINUTES
+from .services import EventService
+from .analytics import SalesAnalytics
+
+from datetime import timedelta
+from decimal import Decimal
+from logging import getLogger
+
+import uuid
+
+logger = getLogger(__name__)
+
+REFERENCE_PREFIX = "grp_"
+MAX_SEATS = getattr(settings, "GROUP_PURCHASE_MAX_SEATS", 100)
+
+def is_group_reference(reference):
+    return str(reference).startswith(REFERENCE_PREFIX)
+
+class GroupPurchaseService:
+    @staticmethod
+    def total(items):
+        return sum((ticket.sales_price * len(emails) for ticket, emails in items), Decimal("0"))
+
+    @staticmethod
+    def reserve(user, items):
+        """
+        items: [(ticket, [attendee email for each seat])]. Returns (reference,
+        purchases, reservations). Groups that cost nothing are paid on the spot
+        and get no reservations. Raises TicketSoldOut/EventFull if any seat does
+        not fit, leaving nothing taken.
+        """
+        reference = f"{REFERENCE_PREFIX}{uuid.uuid4().hex}"
+        is_free = GroupPurchaseService.total(items) == 0
+        now = timezone.now()
+
+        with transaction.atomic():
+            seats = InventoryService.take_group({ticket: len(emails) for ticket, emails in items}, 'sold' if is_free else 'held')
+
+            purchases = TicketPurchase.objects.bulk_create([
+                TicketPurchase(
+                    user=user,
+                    ticket=ticket,
+                    email=email,
+                    payment_reference=reference,
+                    is_paid=is_free,
+                    paid_at=now if is_free else None
+                )
+                for ticket, emails in items
+                for email in emails
+            ])
+
+            reservations = []
+            if not is_free:
+                shards = [shard for ticket, _ in items for shard in seats[ticket.id]]
+                reservations = TicketReservation.objects.bulk_create([
+                    TicketReservation(
+                        ticket_id=purchase.ticket_id,
+                        purchase=purchase,
+                        shard=shard,
+                        expires_at=now + timedelta(minutes=HOLD_TTL_MINUTES)
+                    )
+                    for purchase, shard in zip(purchases, shards)
+                ])
+            else:
+                GroupPurchaseService.queue_side_effects(purchases)
+
+            SalesAnalytics.record_many([
+                (ticket.id, ticket.event_id, now, len(emails), len(emails) if is_free else 0, 0, 0)
+                for ticket, emails in items
+            ])
+
+        return reference, purchases, reservations
+
+    @staticmethod
+    def queue_side_effects(purchases):
+        """
+        The calendar sync and confirmation messages are per event, so one purchase
+        of each event stands in for the rest.
+        """
+        for purchase in {purchase.ticket.event_id: purchase for purchase in purchases}.values():
+            EventService.queue_ticket_side_effects(purchase)
+
+    @staticmethod
+    def fulfil(reference):
+        """
+        Marks every unpaid purchase of the group paid. Returns how many were;
+        0 when the group was already fulfilled.
+        """
+        now = timezone.now()
+
+        with transaction.atomic():
+            purchases = list(
+                TicketPurchase.objects.select_for_update(of=('self',))
+                .select_related('ticket', 'ticket__event')
+                .filter(payment_reference=reference, is_paid=False)
+                .order_by('id')
+            )
+            if not purchases:
+                return 0
+
+            InventoryService.confirm_many(purchases)
+            TicketPurchase.objects.filter(id__in=[purchase.id for purchase in purchases]).update(is_paid=True, paid_at=now)
+
+            GroupPurchaseService.queue_side_effects(purchases)
+            SalesAnalytics.record_many([
+                (purchase.ticket_id, purchase.ticket.event_id, now, 0, 1, 0, purchase.ticket.sales_price)
+                for purchase in purchases
+            ])
+
+        return len(purchases)
@@ -0,0 +1,393 @@
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, Q, Sum, OuterRef, Subquery, Value, Exists
+from django.db.models.functions import Coalesce, Greatest
+from django.utils import timezone
+
+from .models import Event, Ticket, TicketPurchase, TicketReservation, TicketSalesShard
+
+from collections import Counter
+from datetime import timedelta
+from logging import getLogger
+
+import random
+
+logger = getLogger(__name__)
+
+HOLD_TTL_MINUTES = getattr(settings, "TICKET_HOLD_TTL_MINUTES", 15)
+
+class TicketSoldOut(Exception):
+    pass
+
+class EventFull(TicketSoldOut):
+    """
+    The ticket has stock left but the event has reached max_capacity.
+    """
+    pass
+
+def has_room(quantity=1):
+    """
+    Condition for a conditional UPDATE that only matches shards with enough free
+    seats. Evaluated by Postgres under the row lock, so it cannot oversell.
+    """
+    return Q(capacity__isnull=True) | Q(capacity__gte=F('sold') + F('held') + quantity)
+
+def queue_waitlist_promotions(ticket_ids):
+    # Imported here because the waitlist builds on this module
+    from .waitlist import WaitlistService
+    WaitlistService.queue_promotions(ticket_ids)
+
+def split_capacity(total, shards):
+    base, extra = divmod(total, shards)
+    return [base + (1 if i < extra else 0) for i in range(shards)]
+
+class InventoryService:
+    """
+    Ticket stock lives in TicketSalesShard rows. Ticket.quantity_sold and
+    quantity_held are periodic roll-ups of the shards (see rollup_ticket_sales).
+
+    Event.seats_taken is the event-wide ledger checked against max_capacity. It
+    moves in the same transaction as the shards, always after them, so every
+    path locks shard rows before the event row. Only capped events keep the
+    ledger; set_capacity re-counts it when a cap is set.
+    """
+    @staticmethod
+    def ensure_shards(ticket: Ticket):
+        if TicketSalesShard.objects.filter(ticket=ticket).exists():
+            return
+
+        capacities = split_capacity(ticket.quantity, ticket.sales_shards) if ticket.quantity is not None else [None] * ticket.sales_shards
+        TicketSalesShard.objects.bulk_create(
+            [TicketSalesShard(ticket=ticket, index=i, capacity=capacity) for i, capacity in enumerate(capacities)],
+            ignore_conflicts=True
+        )
+
+    @staticmethod
+    def rebalance(ticket: Ticket):
+        """
+        Re-splits the unused part of Ticket.quantity across the shards. Call after
+        changing quantity or sales_shards; it briefly locks every shard of the ticket.
+        """
+        InventoryService.ensure_shards(ticket)
+
+        with transaction.atomic():
+            existing = {shard.index: shard for shard in TicketSalesShard.objects.select_for_update().filter(ticket=ticket)}
+            missing = [TicketSalesShard(ticket=ticket, index=i) for i in range(ticket.sales_shards) if i not in existing]
+
+            shards = sorted([*existing.values(), *TicketSalesShard.objects.bulk_create(missing)], key=lambda shard: shard.index)
+
+            if ticket.quantity is None:
+                for shard in shards:
+                    shard.capacity = None
+            else:
+                used = sum(shard.sold + shard.held for shard in shards)
+                # Spare capacity only goes to active shards; extra shards keep what they already sold
+                active = [shard for shard in shards if shard.index < ticket.sales_shards]
+                shares = split_capacity(max(ticket.quantity - used, 0), len(active))
+
+                for shard in shards:
+                    shard.capacity = shard.sold + shard.held
+
+                for shard, share in zip(active, shares):
+                    shard.capacity += share
+
+            TicketSalesShard.objects.bulk_update(shards, ['capacity'])
+
+            queue_waitlist_promotions([ticket.id])
+
+    @staticmethod
+    def admit(event_id, quantity=1):
+        """
+        Claims seats on the event ledger with one conditional UPDATE, or raises
+        EventFull. Call inside the transaction that takes the ticket stock.
+        """
+        # Uncapped events skip the ledger, so their sales never queue on the event row.
+        # Read after the shard UPDATE, which waits out a concurrent set_capacity.
+        if Event.all_objects.filter(pk=event_id).values_list('max_capacity', flat=True).first() is None:
+            return
+
+        has_room = Q(max_capacity__isnull=True) | Q(max_capacity__gte=F('seats_taken') + quantity)
+        if not Event.all_objects.filter(has_room, pk=event_id).update(seats_taken=F('seats_taken') + quantity):
+            raise EventFull(event_id)
+
+    @staticmethod
+    def vacate(event_ids):
+        """
+        Returns seats to event ledgers; event_ids is an {event_id: count} mapping.
+        """
+        for event_id, count in sorted(event_ids.items()):
+            Event.all_objects.filter(pk=event_id, max_capacity__isnull=False).update(seats_taken=Greatest(F('seats_taken') - count, Value(0)))
+
+    @staticmethod
+    def set_capacity(event: Event, max_capacity):
+        """
+        Changes max_capacity and re-counts the ledger from the shards. The shards
+        are locked first, so in-flight sales commit before the count and new ones
+        queue behind it. Raises EventFull if max_capacity is below the seats taken.
+        """
+        with transaction.atomic():
+            list(TicketSalesShard.objects.select_for_update(of=('self',)).filter(ticket__event=event).values_list('id', flat=True))
+
+            seats_taken = TicketSalesShard.objects.filter(ticket__event=event, ticket__is_deleted=False).aggregate(
+                total=Coalesce(Sum(F('sold') + F('held')), 0)
+            )['total']
+
+            if max_capacity is not None and max_capacity < seats_taken:
+                raise EventFull(event.id)
+
+            Event.all_objects.filter(pk=event.pk).update(max_capacity=max_capacity, seats_taken=seats_taken)
+
+            if max_capacity is None or event.max_capacity is None or max_capacity > event.max_capacity:
+                queue_waitlist_promotions(Ticket.objects.filter(event=event).values_list('id', flat=True))
+
+        event.max_capacity = max_capacity
+        event.seats_taken = seats_taken
+        return seats_taken
+
+    @staticmethod
+    def _take(ticket: Ticket, quantity, field):
+        """
+        Takes seats from the ticket's shards and the event ledger together, and
+        returns the {shard_index: count} allocation.
+        """
+        # No savepoint: a failure here always propagates and rolls back the caller's transaction
+        with transaction.atomic(savepoint=False):
+            allocation = InventoryService._take_shards(ticket, quantity, field)
+            InventoryService.admit(ticket.event_id, quantity)
+
+        return allocation
+
+    @staticmethod
+    def _take_shards(ticket: Ticket, quantity, field):
+        """
+        Adds quantity to `field` ('sold' or 'held') across the ticket's shards and
+        returns a {shard_index: count} allocation. The first attempt is one UPDATE
+        on a random shard; only a full or missing shard falls back to the others.
+        """
+        shard_index = random.randrange(ticket.sales_shards)
+        updated = TicketSalesShard.objects.filter(has_room(quantity), ticket=ticket, index=shard_index).update(**{field: F(field) + quantity})
+        if updated:
+            return {shard_index: quantity}
+
+        InventoryService.ensure_shards(ticket)
+
+        with transaction.atomic():
+            allocation = {}
+            remaining = quantity
+            shards = list(TicketSalesShard.objects.filter(ticket=ticket).values_list('index', 'capacity', 'sold', 'held'))
+            random.shuffle(shards)
+
+            for index, capacity, sold, held in shards:
+                free = remaining if capacity is None else min(capacity - sold - held, remaining)
+                if free <= 0:
+                    continue
+
+                if TicketSalesShard.objects.filter(has_room(free), ticket=ticket, index=index).update(**{field: F(field) + free}):
+                    allocation[index] = free
+                    remaining -= free
+
+                if remaining == 0:
+                    return allocation
+
+            # Rolls back whatever was taken from the other shards
+            raise TicketSoldOut(ticket.id)
+
+    @staticmethod
+    def sell(ticket: Ticket, quantity=1):
+        """
+        Takes seats straight into the sold count, for purchases that need no payment.
+        """
+        return InventoryService._take(ticket, quantity, 'sold')
+
+    @staticmethod
+    def reserve(ticket_purchase: TicketPurchase):
+        """
+        Holds a seat for a purchase that is about to be sent to checkout. Call in a
+        short transaction that commits before the Paystack request is made.
+        """
+        ticket = ticket_purchase.ticket
+
+        return TicketReservation.objects.create(
+            ticket=ticket,
+            purchase=ticket_purchase,
+            shard=InventoryService.hold(ticket),
+            expires_at=timezone.now() + timedelta(minutes=HOLD_TTL_MINUTES)
+        )
+
+    @staticmethod
+    def hold(ticket: Ticket):
+        """
+        Holds one seat and returns the shard it came from. The caller records the
+        hold (a reservation or a waitlist offer) and gives it back with unhold.
+        """
+        [shard_index] = InventoryService._take(ticket, 1, 'held')
+        return shard_index
+
+    @staticmethod
+    def take_group(quantities, field='held'):
+        """
+        Takes seats on several tickets at once, all or none; quantities is a
+        {ticket: count} mapping and field is 'held' or 'sold'. Returns
+        {ticket_id: [shard_index for each seat]}. Every ticket's shards are taken
+        before any event ledger, as on the single-seat paths.
+        """
+        with transaction.atomic(savepoint=False):
+            seats = {}
+            for ticket in sorted(quantities, key=lambda ticket: ticket.id):
+                allocation = InventoryService._take_shards(ticket, quantities[ticket], field)
+                seats[ticket.id] = [shard_index for shard_index, count in sorted(allocation.items()) for _ in range(count)]
+
+            seats_per_event = Counter()
+            for ticket, count in quantities.items():
+                seats_per_event[ticket.event_id] += count
+
+            for event_id, count in sorted(seats_per_event.items()):
+                InventoryService.admit(event_id, count)
+
+        return seats
+
+    @staticmethod
+    def unhold(holds):
+        """
+        Returns held seats to stock; holds is a {(ticket_id, shard_index): count}
+        mapping. Waitlists of the tickets get a chance at the freed seats.
+        """
+        for (ticket_id, shard_index), count in sorted(holds.items()):
+            TicketSalesShard.objects.filter(ticket_id=ticket_id, index=shard_index).update(held=F('held') - count)
+
+        ticket_events = dict(Ticket.all_objects.filter(id__in={ticket_id for ticket_id, _ in holds}).values_list('id', 'event_id'))
+        freed = Counter()
+        for (ticket_id, _), count in holds.items():
+            freed[ticket_events[ticket_id]] += count
+
+        InventoryService.vacate(freed)
+        queue_waitlist_promotions(ticket_events.keys())
+
+    @staticmethod
+    def confirm(ticket_purchase: TicketPurchase):
+        """
+        Converts the purchase's hold into a sale. A hold that already lapsed is
+        replaced by a fresh seat if one is left; otherwise TicketSoldOut is raised.
+        """
+        ticket = ticket_purchase.ticket
+        reservation = TicketReservation.objects.filter(purchase=ticket_purchase, status=TicketReservation.Status.ACTIVE).first()
+
+        if reservation and TicketReservation.objects.filter(pk=reservation.pk, status=TicketReservation.Status.ACTIVE).update(status=TicketReservation.Status.CONVERTED):
+            InventoryService.sell_held(ticket, reservation.shard)
+            return
+
+        InventoryService.sell(ticket)
+
+    @staticmethod
+    def sell_held(ticket: Ticket, shard_index):
+        """
+        Turns a seat already held on the shard into a sale. The event ledger
+        counted it when it was held.
+        """
+        TicketSalesShard.objects.filter(ticket=ticket, index=shard_index).update(
+            held=F('held') - 1,
+            sold=F('sold') + 1
+        )
+
+    @staticmethod
+    def confirm_many(purchases):
+        """
+        confirm() for a set of purchases, with one UPDATE per shard rather than
+        per seat. Seats whose hold lapsed are sold afresh, per ticket, and
+        TicketSoldOut is raised if any of them no longer fit.
+        """
+        purchases = list(purchases)
+        reservations = list(
+            TicketReservation.objects.select_for_update()
+            .filter(purchase__in=purchases, status=TicketReservation.Status.ACTIVE)
+            .values_list('id', 'purchase_id', 'ticket_id', 'shard')
+        )
+        TicketReservation.objects.filter(id__in=[reservation_id for reservation_id, *_ in reservations]).update(status=TicketReservation.Status.CONVERTED)
+
+        for (ticket_id, shard_index), count in sorted(Counter((ticket_id, shard) for _, _, ticket_id, shard in reservations).items()):
+            TicketSalesShard.objects.filter(ticket_id=ticket_id, index=shard_index).update(
+                held=F('held') - count,
+                sold=F('sold') + count
+            )
+
+        held = {purchase_id for _, purchase_id, _, _ in reservations}
+        lapsed = Counter(purchase.ticket_id for purchase in purchases if purchase.id not in held)
+
+        if lapsed:
+            InventoryService.take_group({ticket: lapsed[ticket.id] for ticket in Ticket.all_objects.filter(id__in=lapsed.keys())}, 'sold')
+
+    @staticmethod
+    def release_many(reservation_ids):
+        """
+        release() for a set of reservations, in one transaction.
+        """
+        with transaction.atomic():
+            holds = list(
+                TicketReservation.objects.select_for_update()
+                .filter(id__in=reservation_ids, status=TicketReservation.Status.ACTIVE)
+                .values_list('id', 'ticket_id', 'shard')
+            )
+            TicketReservation.objects.filter(id__in=[reservation_id for reservation_id, _, _ in holds]).update(status=TicketReservation.Status.RELEASED)
+
+            if holds:
+                InventoryService.unhold(Counter((ticket_id, shard) for _, ticket_id, shard in holds))
+
+        return len(holds)
+
+    @staticmethod
+    def release(reservation: TicketReservation):
+        with transaction.atomic():
+            released = TicketReservation.objects.filter(pk=reservation.pk, status=TicketReservation.Status.ACTIVE).update(status=TicketReservation.Status.RELEASED)
+            if released:
+                InventoryService.unhold({(reservation.ticket_id, reservation.shard): 1})
+
+        return bool(released)
+
+    @staticmethod
+    def release_expired(batch_size=500):
+        """
+        Returns seats from lapsed checkouts to stock. Safe to run from several
+        workers; a hold confirmed in the meantime is left alone.
+        """
+        released = 0
+
+        while True:
+            with transaction.atomic():
+                expired = list(
+                    TicketReservation.objects.select_for_update(skip_locked=True)
+                    .filter(status=TicketReservation.Status.ACTIVE, expires_at__lte=timezone.now())
+                    .order_by('expires_at')[:batch_size]
+                )
+
+                TicketReservation.objects.filter(id__in=[r.id for r in expired]).update(status=TicketReservation.Status.RELEASED)
+
+                if expired:
+                    InventoryService.unhold(Counter((r.ticket_id, r.shard) for r in expired))
+
+                released += len(expired)
+
+            if len(expired) < batch_size:
+                return released
+
+    @staticmethod
+    def totals(ticket: Ticket):
+        """
+        Exact sold and held counts, summed from the shards.
+        """
+        return TicketSalesShard.objects.filter(ticket=ticket).aggregate(
+            sold=Coalesce(Sum('sold'), 0),
+            held=Coalesce(Sum('held'), 0)
+        )
+
+    @staticmethod
+    def rollup(tickets=None):
+        """
+        Copies shard totals onto Ticket.quantity_sold / quantity_held in one UPDATE.
+        """
+        tickets = tickets if tickets is not None else Ticket.objects.filter(is_active=True)
+        shards = TicketSalesShard.objects.filter(ticket=OuterRef('pk')).values('ticket')
+
+        return tickets.filter(Exists(shards)).update(
+            quantity_sold=Coalesce(Subquery(shards.annotate(total=Sum('sold')).values('total')), Value(0)),
+            quantity_held=Coalesce(Subquery(shards.annotate(total=Sum('held')).values('total')), Value(0))
+        )
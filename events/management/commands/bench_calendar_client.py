@@ -0,0 +1,53 @@
+from django.core.management.base import BaseCommand
+
+from events.services import GoogleCalendarService
+from futaverse.utils.google.calendar import discovery_document
+
+from google.oauth2.credentials import Credentials
+from googleapiclient.discovery import build
+
+from types import SimpleNamespace
+import statistics
+import time
+
+class Command(BaseCommand):
+    help = (
+        "Measures the per-call cost of getting a Calendar client and preparing a request, "
+        "building the client every time versus reusing the cached one. Makes no network calls."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--calls", type=int, default=200)
+        parser.add_argument("--users", type=int, default=1, help="Distinct users to rotate through")
+
+    def handle(self, *args, **options):
+        calls, users = options["calls"], options["users"]
+        credentials = [
+            Credentials(token=f"bench-token-{i}", refresh_token=f"bench-refresh-{i}", client_id="bench", client_secret="bench", token_uri="https://oauth2.googleapis.com/token")
+            for i in range(users)
+        ]
+        people = [SimpleNamespace(id=-(i + 1)) for i in range(users)]
+
+        def uncached(i):
+            service = build("calendar", "v3", credentials=credentials[i % users])
+            service.events().patch(calendarId="primary", eventId="bench", body={"attendees": []})
+
+        def cached(i):
+            calendar = GoogleCalendarService(credentials[i % users], people[i % users])
+            calendar.attendees_request("bench", [])
+
+        discovery_document()
+
+        for label, call in (("build() per call", uncached), ("cached client", cached)):
+            timings = []
+            for i in range(calls):
+                started = time.perf_counter()
+                call(i)
+                timings.append((time.perf_counter() - started) * 1000)
+
+            timings.sort()
+            self.stdout.write(
+                f"{label:<18} calls={calls} users={users}  "
+                f"mean={statistics.mean(timings):.3f}ms p50={timings[len(timings) // 2]:.3f}ms "
+                f"p95={timings[int(len(timings) * 0.95)]:.3f}ms"
+            )
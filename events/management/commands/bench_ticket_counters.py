@@ -0,0 +1,78 @@
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.utils import timezone
+
+from core.models import User
+from events.models import Event, Ticket
+from events.inventory import InventoryService, TicketSoldOut
+
+from concurrent.futures import ThreadPoolExecutor
+import threading
+import time
+import uuid
+
+class Command(BaseCommand):
+    help = (
+        "Measures concurrent ticket sales throughput for different shard counts. "
+        "Creates and deletes its own event; point DB_HOST/DB_NAME at a local Postgres before running."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--shards", type=int, nargs="+", default=[1, 8])
+        parser.add_argument("--threads", type=int, default=16)
+        parser.add_argument("--seats", type=int, default=2000)
+        parser.add_argument("--capped", action="store_true", help="Give the event a max_capacity so every sale also goes through the Event.seats_taken ledger")
+        parser.add_argument("--hold-ms", type=float, default=2.0, help="Extra time each sale's transaction stays open, standing in for the purchase insert and outbox writes")
+
+    def handle(self, *args, **options):
+        creator = User.objects.create(email=f"bench-{uuid.uuid4().hex[:8]}@futaverse.local", role=User.Role.STAFF)
+
+        try:
+            for shards in options["shards"]:
+                self.run(creator, shards, options["threads"], options["seats"], options["hold_ms"], options["capped"])
+        finally:
+            creator.delete()
+
+    def run(self, creator, shards, threads, seats, hold_ms, capped):
+        event = Event.objects.create(
+            creator=creator, title="Counter benchmark", description="", category=Event.Category.OTHER,
+            mode=Event.Mode.PHYSICAL, date=timezone.now().date(), start_time=timezone.now().time(),
+            max_capacity=seats if capped else None
+        )
+        ticket = Ticket.objects.create(event=event, name="Bench", price=0, quantity=seats, sales_shards=shards)
+        InventoryService.ensure_shards(ticket)
+
+        sold = []
+        lock = threading.Lock()
+
+        def buyer():
+            count = 0
+            try:
+                while True:
+                    with transaction.atomic():
+                        InventoryService.sell(ticket)
+                        if hold_ms:
+                            with connection.cursor() as cursor:
+                                cursor.execute("SELECT pg_sleep(%s)", [hold_ms / 1000])
+                    count += 1
+            except TicketSoldOut:
+                pass
+            finally:
+                connection.close()
+                with lock:
+                    sold.append(count)
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=threads) as pool:
+            for _ in range(threads):
+                pool.submit(buyer)
+        elapsed = time.perf_counter() - started
+
+        totals = InventoryService.totals(ticket)
+        event.delete()
+
+        status = "OK" if totals["sold"] == sum(sold) == seats else "OVERSOLD/UNDERSOLD"
+        self.stdout.write(
+            f"shards={shards:<3} threads={threads:<3} capped={'yes' if capped else 'no':<3}  sold={totals['sold']}/{seats} "
+            f"elapsed={elapsed:.2f}s throughput={seats / elapsed:,.0f} sales/s [{status}]"
+        )
@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from events import outbox
+
+import time
+
+class Command(BaseCommand):
+    help = "Delivers pending outbox messages (calendar syncs, ticket emails), retrying failures with backoff."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--once", action="store_true", help="Drain due messages once and exit")
+        parser.add_argument("--batch-size", type=int, default=50)
+        parser.add_argument("--interval", type=float, default=2.0, help="Seconds to sleep when the outbox is empty")
+
+    def handle(self, *args, **options):
+        batch_size = options["batch_size"]
+
+        if options["once"]:
+            processed = outbox.drain(batch_size)
+            self.stdout.write(f"Processed {processed} outbox message(s)")
+            return
+
+        self.stdout.write("Outbox worker started")
+        while True:
+            close_old_connections()
+            
+            if not outbox.drain(batch_size):
+                time.sleep(options["interval"])
@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from events.models import Event
+from events.analytics import SalesAnalytics
+
+class Command(BaseCommand):
+    help = "Recomputes hourly ticket sales counters from TicketPurchase. Run when writes are quiet."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--event", nargs="+", help="Event sqids to rebuild (default: all events)")
+
+    def handle(self, *args, **options):
+        events = None
+
+        if options["event"]:
+            events = list(Event.all_objects.filter(sqid__in=options["event"]))
+            if len(events) != len(set(options["event"])):
+                raise CommandError("One or more events were not found")
+
+        rebuilt = SalesAnalytics.rebuild(events)
+        self.stdout.write(f"Rebuilt {rebuilt} hourly sales row(s)")
@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+
+from events.inventory import InventoryService
+from events.waitlist import WaitlistService
+
+class Command(BaseCommand):
+    help = "Returns seats held by expired, unpaid checkouts and lapsed waitlist offers to ticket stock. Run every minute."
+
+    def handle(self, *args, **options):
+        released = InventoryService.release_expired()
+        expired = WaitlistService.expire_offers()
+        self.stdout.write(f"Released {released} expired hold(s) and {expired} lapsed waitlist offer(s)")
@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+
+from events.inventory import InventoryService
+from events.analytics import SalesAnalytics
+
+class Command(BaseCommand):
+    help = "Copies sales shard totals onto Ticket.quantity_sold and quantity_held, and folds recorded sales into the hourly counters. Run every minute."
+
+    def handle(self, *args, **options):
+        updated = InventoryService.rollup()
+        folded = SalesAnalytics.fold()
+        self.stdout.write(f"Rolled up {updated} ticket(s), folded {folded} sales delta(s)")
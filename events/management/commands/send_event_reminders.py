@@ -0,0 +1,10 @@
+from django.core.management.base import BaseCommand
+
+from events.reminders import ReminderEngine
+
+class Command(BaseCommand):
+    help = "Queues reminder emails for events entering a reminder window. Run every minute, next to process_outbox."
+
+    def handle(self, *args, **options):
+        claimed = ReminderEngine.schedule()
+        self.stdout.write(f"Queued {claimed} reminder(s)")
@@ -0,0 +1,49 @@
+# Generated by Django 5.2.3 on 2026-10-18 18:49
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('events', '0002_outboxmessage'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CalendarSync',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('is_deleted', models.BooleanField(default=False)),
+                ('deleted_at', models.DateTimeField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('dirty_since', models.DateTimeField(blank=True, null=True)),
+                ('pending_marks', models.PositiveIntegerField(default=0)),
+                ('syncs_requested', models.PositiveIntegerField(default=0)),
+                ('patches_sent', models.PositiveIntegerField(default=0)),
+                ('last_synced_at', models.DateTimeField(blank=True, null=True)),
+                ('last_lag_ms', models.PositiveIntegerField(blank=True, null=True)),
+                ('max_lag_ms', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'abstract': False,
+            },
+        ),
+        migrations.AddField(
+            model_name='ticketpurchase',
+            name='calendar_synced',
+            field=models.BooleanField(default=False, help_text="Whether the attendee is on the event's Google Calendar invite"),
+        ),
+        migrations.AddIndex(
+            model_name='ticketpurchase',
+            index=models.Index(condition=models.Q(('calendar_synced', False), ('is_paid', True)), fields=['ticket'], name='purchase_calendar_pending_idx'),
+        ),
+        migrations.AddField(
+            model_name='calendarsync',
+            name='event',
+            field=models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='calendar_sync', to='events.event'),
+        ),
+    ]
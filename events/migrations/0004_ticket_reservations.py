@@ -0,0 +1,35 @@
+# Generated by Django 5.2.3 on 2026-10-18 18:50
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('events', '0003_calendar_sync'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='ticket',
+            name='quantity_held',
+            field=models.IntegerField(default=0, help_text='Seats reserved by checkouts awaiting payment'),
+        ),
+        migrations.CreateModel(
+            name='TicketReservation',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('is_deleted', models.BooleanField(default=False)),
+                ('deleted_at', models.DateTimeField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('status', models.CharField(choices=[('active', 'Active'), ('converted', 'Converted'), ('released', 'Released')], default='active', max_length=20)),
+                ('expires_at', models.DateTimeField()),
+                ('purchase', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='reservation', to='events.ticketpurchase')),
+                ('ticket', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='reservations', to='events.ticket')),
+            ],
+            options={
+                'indexes': [models.Index(condition=models.Q(('status', 'active')), fields=['expires_at'], name='reservation_active_idx')],
+            },
+        ),
+    ]
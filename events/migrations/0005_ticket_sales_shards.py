@@ -0,0 +1,82 @@
+# Generated by Django 5.2.3 on 2026-10-18 18:51
+
+import django.core.validators
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def create_shards(apps, schema_editor):
+    """
+    Moves each ticket's existing sold and held counts onto shard 0 and splits the
+    remaining stock across the ticket's shards.
+    """
+    Ticket = apps.get_model('events', 'Ticket')
+    TicketSalesShard = apps.get_model('events', 'TicketSalesShard')
+
+    shards = []
+    for ticket in Ticket.objects.all().iterator():
+        used = ticket.quantity_sold + ticket.quantity_held
+
+        for index in range(ticket.sales_shards):
+            capacity = None
+            if ticket.quantity is not None:
+                base, extra = divmod(max(ticket.quantity - used, 0), ticket.sales_shards)
+                capacity = base + (1 if index < extra else 0) + (used if index == 0 else 0)
+
+            shards.append(TicketSalesShard(
+                ticket=ticket,
+                index=index,
+                capacity=capacity,
+                sold=ticket.quantity_sold if index == 0 else 0,
+                held=ticket.quantity_held if index == 0 else 0,
+            ))
+
+    TicketSalesShard.objects.bulk_create(shards, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('events', '0004_ticket_reservations'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='ticket',
+            name='sales_shards',
+            field=models.PositiveSmallIntegerField(default=4, help_text='Number of counter rows sales are spread over', validators=[django.core.validators.MinValueValidator(1), django.core.validators.MaxValueValidator(64)]),
+        ),
+        migrations.AddField(
+            model_name='ticketreservation',
+            name='shard',
+            field=models.PositiveSmallIntegerField(default=0),
+        ),
+        migrations.AlterField(
+            model_name='ticket',
+            name='quantity_held',
+            field=models.IntegerField(default=0, help_text='Seats reserved by checkouts awaiting payment, rolled up from sales shards'),
+        ),
+        migrations.AlterField(
+            model_name='ticket',
+            name='quantity_sold',
+            field=models.IntegerField(default=0, help_text='Rolled up from sales shards; see InventoryService.totals for exact figures'),
+        ),
+        migrations.CreateModel(
+            name='TicketSalesShard',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('is_deleted', models.BooleanField(default=False)),
+                ('deleted_at', models.DateTimeField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('index', models.PositiveSmallIntegerField()),
+                ('capacity', models.IntegerField(blank=True, help_text='Blank when the ticket is unlimited', null=True)),
+                ('sold', models.IntegerField(default=0)),
+                ('held', models.IntegerField(default=0)),
+                ('ticket', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='shards', to='events.ticket')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('ticket', 'index'), name='unique_ticket_shard')],
+            },
+        ),
+        migrations.RunPython(create_shards, migrations.RunPython.noop),
+    ]
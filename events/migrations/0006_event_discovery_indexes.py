@@ -0,0 +1,27 @@
+# Generated by Django 5.2.3 on 2026-10-18 18:53
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('events', '0005_ticket_sales_shards'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='event',
+            index=models.Index(condition=models.Q(('is_cancelled', False), ('is_deleted', False), ('is_published', True)), fields=['date', 'start_time', 'id'], name='event_discovery_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='event',
+            index=models.Index(condition=models.Q(('is_cancelled', False), ('is_deleted', False), ('is_published', True)), fields=['category', 'date', 'start_time', 'id'], name='event_discovery_category_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='event',
+            index=models.Index(condition=models.Q(('is_cancelled', False), ('is_deleted', False), ('is_published', True)), fields=['mode', 'date', 'start_time', 'id'], name='event_discovery_mode_idx'),
+        ),
+    ]
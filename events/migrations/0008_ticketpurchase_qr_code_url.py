@@ -0,0 +1,18 @@
+# Generated by Django 5.2.3 on 2026-10-18 19:07
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('events', '0007_search_vector'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='ticketpurchase',
+            name='qr_code_url',
+            field=models.URLField(blank=True, null=True),
+        ),
+    ]
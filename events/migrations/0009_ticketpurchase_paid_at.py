@@ -0,0 +1,34 @@
+# Generated by Django 5.2.3 on 2026-10-18 19:15
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import F
+
+
+def backfill_paid_at(apps, schema_editor):
+    """
+    Purchases paid before this field existed are treated as paid when created.
+    """
+    TicketPurchase = apps.get_model('events', 'TicketPurchase')
+    TicketPurchase.objects.filter(is_paid=True, paid_at__isnull=True).update(paid_at=F('created_at'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('events', '0008_ticketpurchase_qr_code_url'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='ticketpurchase',
+            name='paid_at',
+            field=models.DateTimeField(blank=True, help_text='When the ticket became valid; scanner manifests are versioned by it', null=True),
+        ),
+        migrations.RunPython(backfill_paid_at, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='ticketpurchase',
+            index=models.Index(condition=models.Q(('is_paid', True)), fields=['ticket', 'paid_at'], name='purchase_paid_at_idx'),
+        ),
+    ]
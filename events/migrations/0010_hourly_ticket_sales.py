@@ -0,0 +1,34 @@
+# Generated by Django 5.2.3 on 2026-10-18 19:20
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('events', '0009_ticketpurchase_paid_at'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='HourlyTicketSales',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('is_deleted', models.BooleanField(default=False)),
+                ('deleted_at', models.DateTimeField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('hour', models.DateTimeField()),
+                ('created', models.PositiveIntegerField(default=0, help_text='Purchases started')),
+                ('paid', models.PositiveIntegerField(default=0)),
+                ('checked_in', models.PositiveIntegerField(default=0)),
+                ('revenue', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('event', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='hourly_sales', to='events.event')),
+                ('ticket', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='hourly_sales', to='events.ticket')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['event', 'hour'], name='hourly_sales_event_idx')],
+                'constraints': [models.UniqueConstraint(fields=('ticket', 'hour'), name='unique_ticket_sales_hour')],
+            },
+        ),
+    ]
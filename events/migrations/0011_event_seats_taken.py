@@ -0,0 +1,34 @@
+# Generated by Django 5.2.3 on 2026-10-18 19:22
+
+from django.db import migrations, models
+from django.db.models import F, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+
+
+def backfill_seats_taken(apps, schema_editor):
+    """
+    Seeds the ledger with the seats already sold or held on each event's live tickets.
+    """
+    Event = apps.get_model('events', 'Event')
+    TicketSalesShard = apps.get_model('events', 'TicketSalesShard')
+
+    shards = TicketSalesShard.objects.filter(ticket__event=OuterRef('pk'), ticket__is_deleted=False).values('ticket__event')
+    Event.objects.update(
+        seats_taken=Coalesce(Subquery(shards.annotate(total=Sum(F('sold') + F('held'))).values('total')), Value(0))
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('events', '0010_hourly_ticket_sales'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='event',
+            name='seats_taken',
+            field=models.PositiveIntegerField(default=0, editable=False, help_text='Seats sold or held across all ticket types; maintained by InventoryService'),
+        ),
+        migrations.RunPython(backfill_seats_taken, migrations.RunPython.noop),
+    ]
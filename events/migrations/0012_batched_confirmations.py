@@ -0,0 +1,55 @@
+# Generated by Django 5.2.3 on 2026-10-18 19:36
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import F
+from django.db.models.functions import Coalesce
+
+
+def backfill_confirmation_sent_at(apps, schema_editor):
+    """
+    Paid purchases from before this field existed already had their email, except
+    those whose per-purchase message is still waiting in the outbox.
+    """
+    TicketPurchase = apps.get_model('events', 'TicketPurchase')
+    OutboxMessage = apps.get_model('events', 'OutboxMessage')
+
+    waiting = [
+        message.payload['ticket_purchase_id']
+        for message in OutboxMessage.objects.filter(topic='email.ticket', status='pending').only('payload')
+        if 'ticket_purchase_id' in message.payload
+    ]
+
+    TicketPurchase.objects.filter(is_paid=True, confirmation_sent_at__isnull=True).exclude(id__in=waiting).update(
+        confirmation_sent_at=Coalesce(F('paid_at'), F('created_at'))
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('events', '0011_event_seats_taken'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='outboxmessage',
+            name='dedupe_key',
+            field=models.CharField(blank=True, help_text='Messages with the same key share one delivery until a worker picks it up', max_length=255, null=True),
+        ),
+        migrations.AddField(
+            model_name='ticketpurchase',
+            name='confirmation_sent_at',
+            field=models.DateTimeField(blank=True, help_text='When the ticket confirmation email went out; unset for paid tickets still waiting on one', null=True),
+        ),
+        migrations.RunPython(backfill_confirmation_sent_at, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='ticketpurchase',
+            index=models.Index(condition=models.Q(('confirmation_sent_at__isnull', True), ('is_paid', True)), fields=['ticket'], name='purchase_confirmation_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='outboxmessage',
+            constraint=models.UniqueConstraint(condition=models.Q(('attempts', 0), ('status', 'pending')), fields=('dedupe_key',), name='outbox_unclaimed_dedupe_key'),
+        ),
+    ]
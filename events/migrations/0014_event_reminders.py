@@ -0,0 +1,65 @@
+# Generated by Django 5.2.3 on 2026-10-18 19:39
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def backfill_starts_at(apps, schema_editor):
+    """
+    Same conversion as Event.save(): date and start_time read in TIME_ZONE.
+    """
+    Event = apps.get_model('events', 'Event')
+    table = Event._meta.db_table
+    schema_editor.execute(
+        f"UPDATE {table} SET starts_at = (date + start_time) AT TIME ZONE %s WHERE starts_at IS NULL",
+        [settings.TIME_ZONE]
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('events', '0013_notification_email_topics'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EventReminder',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('is_deleted', models.BooleanField(default=False)),
+                ('deleted_at', models.DateTimeField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('window', models.CharField(max_length=20)),
+                ('starts_at', models.DateTimeField(help_text='The event start this reminder was scheduled against')),
+                ('recipients', models.PositiveIntegerField(default=0)),
+                ('sent_at', models.DateTimeField(blank=True, null=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='event',
+            name='starts_at',
+            field=models.DateTimeField(editable=False, null=True),
+        ),
+        migrations.RunPython(backfill_starts_at, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='outboxmessage',
+            name='topic',
+            field=models.CharField(choices=[('calendar.sync', 'Calendar sync'), ('email.ticket', 'Ticket confirmation email'), ('email.event_update', 'Schedule update email'), ('email.event_mode', 'Mode change email'), ('email.event_reminder', 'Event reminder email')], max_length=50),
+        ),
+        migrations.AddIndex(
+            model_name='event',
+            index=models.Index(condition=models.Q(('is_cancelled', False), ('is_deleted', False)), fields=['starts_at'], name='event_starts_at_idx'),
+        ),
+        migrations.AddField(
+            model_name='eventreminder',
+            name='event',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='reminders', to='events.event'),
+        ),
+        migrations.AddConstraint(
+            model_name='eventreminder',
+            constraint=models.UniqueConstraint(fields=('event', 'window'), name='unique_event_reminder_window'),
+        ),
+    ]
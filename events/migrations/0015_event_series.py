@@ -0,0 +1,85 @@
+# Generated by Django 5.2.3 on 2026-10-18 19:43
+
+import django.core.validators
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('events', '0014_event_reminders'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SeriesTicket',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('is_deleted', models.BooleanField(default=False)),
+                ('deleted_at', models.DateTimeField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('name', models.CharField(max_length=255)),
+                ('description', models.TextField(blank=True, null=True)),
+                ('price', models.DecimalField(decimal_places=2, max_digits=10, validators=[django.core.validators.MinValueValidator(0)])),
+                ('discount_perc', models.DecimalField(decimal_places=2, default=0, max_digits=5, validators=[django.core.validators.MinValueValidator(0), django.core.validators.MaxValueValidator(100)])),
+                ('quantity', models.IntegerField(blank=True, help_text='Per occurrence; leave blank for unlimited', null=True, validators=[django.core.validators.MinValueValidator(0)])),
+                ('sales_shards', models.PositiveSmallIntegerField(default=4, validators=[django.core.validators.MinValueValidator(1), django.core.validators.MaxValueValidator(64)])),
+                ('type', models.CharField(choices=[('default', 'Default'), ('custom', 'Custom')], default='custom', max_length=20)),
+            ],
+            options={
+                'abstract': False,
+            },
+        ),
+        migrations.AddField(
+            model_name='event',
+            name='occurrence_date',
+            field=models.DateField(blank=True, editable=False, help_text='The date the series rule gave this occurrence', null=True),
+        ),
+        migrations.CreateModel(
+            name='EventSeries',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('is_deleted', models.BooleanField(default=False)),
+                ('deleted_at', models.DateTimeField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('title', models.CharField(max_length=320)),
+                ('description', models.TextField()),
+                ('category', models.CharField(choices=[('workshop', 'Workshop'), ('talk', 'Talk'), ('career', 'Career'), ('donation', 'Donation'), ('networking', 'Networking'), ('symposium', 'Symposium'), ('training', 'Training'), ('other', 'Other')], max_length=50)),
+                ('mode', models.CharField(choices=[('virtual', 'Virtual'), ('physical', 'Physical'), ('hybrid', 'Hybrid')], max_length=20)),
+                ('venue', models.CharField(blank=True, max_length=255, null=True)),
+                ('dtstart', models.DateField(help_text='Date of the first occurrence')),
+                ('start_time', models.TimeField()),
+                ('duration_mins', models.IntegerField(default=60, validators=[django.core.validators.MinValueValidator(0)])),
+                ('rrule', models.CharField(help_text="RRULE value without the 'RRULE:' prefix, e.g. FREQ=WEEKLY;BYDAY=TU;COUNT=10. UNTIL must be in UTC", max_length=500)),
+                ('max_capacity', models.IntegerField(blank=True, help_text='Per occurrence', null=True, validators=[django.core.validators.MinValueValidator(0)])),
+                ('platform', models.CharField(blank=True, choices=[('meet', 'Google Meet'), ('jitsi', 'Jitsi')], max_length=20, null=True)),
+                ('join_url', models.URLField(blank=True, max_length=500, null=True)),
+                ('room_name', models.CharField(blank=True, max_length=255, null=True)),
+                ('external_calendar_event_id', models.CharField(blank=True, max_length=255, null=True)),
+                ('is_cancelled', models.BooleanField(default=False)),
+                ('is_published', models.BooleanField(default=False)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('creator', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='event_series', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['-dtstart'],
+            },
+        ),
+        migrations.AddField(
+            model_name='event',
+            name='series',
+            field=models.ForeignKey(blank=True, editable=False, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='occurrences', to='events.eventseries'),
+        ),
+        migrations.AddConstraint(
+            model_name='event',
+            constraint=models.UniqueConstraint(fields=('series', 'occurrence_date'), name='event_series_occurrence_unique'),
+        ),
+        migrations.AddField(
+            model_name='seriesticket',
+            name='series',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='tickets', to='events.eventseries'),
+        ),
+    ]
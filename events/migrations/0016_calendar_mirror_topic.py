@@ -0,0 +1,18 @@
+# Generated by Django 5.2.3 on 2026-10-18 19:47
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('events', '0015_event_series'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='outboxmessage',
+            name='topic',
+            field=models.CharField(choices=[('calendar.sync', 'Calendar sync'), ('email.ticket', 'Ticket confirmation email'), ('email.event_update', 'Schedule update email'), ('email.event_mode', 'Mode change email'), ('email.event_reminder', 'Event reminder email'), ('calendar.mirror', 'Calendar mirror')], max_length=50),
+        ),
+    ]
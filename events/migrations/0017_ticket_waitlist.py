@@ -0,0 +1,44 @@
+# Generated by Django 5.2.3 on 2026-10-18 19:49
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('events', '0016_calendar_mirror_topic'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='outboxmessage',
+            name='topic',
+            field=models.CharField(choices=[('calendar.sync', 'Calendar sync'), ('email.ticket', 'Ticket confirmation email'), ('email.event_update', 'Schedule update email'), ('email.event_mode', 'Mode change email'), ('email.event_reminder', 'Event reminder email'), ('calendar.mirror', 'Calendar mirror'), ('waitlist.promote', 'Waitlist promotion'), ('email.waitlist_offer', 'Waitlist offer email')], max_length=50),
+        ),
+        migrations.CreateModel(
+            name='WaitlistEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('is_deleted', models.BooleanField(default=False)),
+                ('deleted_at', models.DateTimeField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('email', models.EmailField(max_length=254)),
+                ('status', models.CharField(choices=[('waiting', 'Waiting'), ('offered', 'Offered'), ('claimed', 'Claimed'), ('expired', 'Expired'), ('left', 'Left')], default='waiting', max_length=20)),
+                ('claim_url', models.URLField(help_text='Where the offer email links to, with ?token= appended', max_length=500)),
+                ('claim_token', models.UUIDField(blank=True, editable=False, null=True, unique=True)),
+                ('held_shard', models.PositiveSmallIntegerField(blank=True, help_text="Shard the offer's seat is held on", null=True)),
+                ('offered_at', models.DateTimeField(blank=True, null=True)),
+                ('offer_expires_at', models.DateTimeField(blank=True, null=True)),
+                ('purchase', models.OneToOneField(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='waitlist_entry', to='events.ticketpurchase')),
+                ('ticket', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='waitlist', to='events.ticket')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='waitlist_entries', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(condition=models.Q(('status', 'waiting')), fields=['ticket', 'id'], name='waitlist_queue_idx'), models.Index(condition=models.Q(('status', 'offered')), fields=['offer_expires_at'], name='waitlist_offer_idx')],
+                'constraints': [models.UniqueConstraint(condition=models.Q(('status__in', ['waiting', 'offered'])), fields=('ticket', 'user'), name='waitlist_one_active_entry')],
+            },
+        ),
+    ]
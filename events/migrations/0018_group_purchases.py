@@ -0,0 +1,24 @@
+# Generated by Django 5.2.3 on 2026-10-18 19:51
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('events', '0017_ticket_waitlist'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='ticketpurchase',
+            name='payment_reference',
+            field=models.CharField(blank=True, help_text='Paystack reference of a group checkout; single purchases use ticket_uid', max_length=255, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='ticketpurchase',
+            index=models.Index(condition=models.Q(('payment_reference__isnull', False)), fields=['payment_reference'], name='purchase_payment_reference_idx'),
+        ),
+    ]
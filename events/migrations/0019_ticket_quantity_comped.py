@@ -0,0 +1,18 @@
+# Generated by Django 5.2.3 on 2026-10-18 20:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('events', '0018_group_purchases'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='ticket',
+            name='quantity_comped',
+            field=models.IntegerField(default=0, help_text='Complimentary tickets given out; counted in quantity_sold but not in revenue'),
+        ),
+    ]
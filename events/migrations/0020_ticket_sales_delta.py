@@ -0,0 +1,33 @@
+# Generated by Django 5.2.3 on 2026-10-18 20:02
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('events', '0019_ticket_quantity_comped'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TicketSalesDelta',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('is_deleted', models.BooleanField(default=False)),
+                ('deleted_at', models.DateTimeField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('hour', models.DateTimeField()),
+                ('created', models.IntegerField(default=0)),
+                ('paid', models.IntegerField(default=0)),
+                ('checked_in', models.IntegerField(default=0)),
+                ('revenue', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('event', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='sales_deltas', to='events.event')),
+                ('ticket', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='sales_deltas', to='events.ticket')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['event', 'hour'], name='sales_delta_event_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.3 on 2026-10-18 20:04
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('events', '0020_ticket_sales_delta'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='ticketpurchase',
+            name='confirmation_claimed_until',
+            field=models.DateTimeField(blank=True, help_text='Lease of the run sending the confirmation; another run may take it over once this passes', null=True),
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 5.2.3 on 2026-10-18 20:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('events', '0021_purchase_confirmation_lease'),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name='calendarsync',
+            name='pending_marks',
+        ),
+        migrations.AlterField(
+            model_name='calendarsync',
+            name='syncs_requested',
+            field=models.PositiveIntegerField(default=0, help_text='Purchases that needed adding to the invite'),
+        ),
+    ]
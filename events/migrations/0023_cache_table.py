@@ -0,0 +1,23 @@
+# Generated by Django 5.2.3 on 2026-10-18 21:10
+
+from django.core.management import call_command
+from django.db import migrations
+
+
+def create_cache_table(apps, schema_editor):
+    """
+    The shared cache for QR images and calendar feeds lives in the database.
+    Does nothing if the table already exists.
+    """
+    call_command('createcachetable', database=schema_editor.connection.alias)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('events', '0022_calendar_sync_drop_pending_marks'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_cache_table, migrations.RunPython.noop),
+    ]
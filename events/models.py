@@ -1,4 +1,8 @@
 from django.db import models
+from django.db.models import F, Sum, Value, Case, When, OuterRef, Subquery, ExpressionWrapper
+from django.db.models.functions import Coalesce, Greatest
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
 from django.conf import settings
 from django.utils import timezone
 from django.core.validators import MinValueValidator, MaxValueValidator
@@ -7,8 +11,57 @@ import uuid
 
 from core.models import User
 
-from futaverse.models import BaseModel
+from futaverse.models import BaseModel, ActiveManager
 from decimal import Decimal
+from datetime import datetime
+
+class EventQuerySet(models.QuerySet):
+    def with_starting_price(self):
+        tickets = Ticket.objects.filter(event=OuterRef('pk'))
+        
+        return self.annotate(
+            starting_price=Coalesce(Subquery(tickets.order_by('price').values('price')[:1]), Value(Decimal('0'))),
+        )
+    
+    def with_sales_summary(self):
+        """
+        Annotates starting_price, total_sold, gross_revenue and remaining_capacity
+        with correlated subqueries, so listing a page of events costs the same
+        number of queries however many tickets each one has.
+        """
+        shards = TicketSalesShard.objects.filter(ticket__event=OuterRef('pk'), ticket__is_deleted=False).values('ticket__event')
+        
+        unit_price = ExpressionWrapper(
+            F('ticket__price') * (100 - F('ticket__discount_perc')) / 100,
+            output_field=models.DecimalField(max_digits=12, decimal_places=2)
+        )
+        
+        comps = Ticket.objects.filter(event=OuterRef('pk'), quantity_comped__gt=0).exclude(type=Ticket.Type.DEFAULT).values('event')
+        comp_unit_price = ExpressionWrapper(
+            F('price') * (100 - F('discount_perc')) / 100,
+            output_field=models.DecimalField(max_digits=12, decimal_places=2)
+        )
+        
+        return self.with_starting_price().annotate(
+            total_sold=Coalesce(Subquery(shards.annotate(total=Sum('sold')).values('total')), Value(0)),
+            gross_revenue=Coalesce(
+                # Free tickets take no payment, whatever their listed price
+                Subquery(shards.exclude(ticket__type=Ticket.Type.DEFAULT).annotate(total=Sum(F('sold') * unit_price)).values('total')),
+                Value(Decimal('0')),
+                output_field=models.DecimalField(max_digits=14, decimal_places=2)
+            ) - Coalesce(
+                # Complimentary tickets are sold but not paid for
+                Subquery(comps.annotate(total=Sum(F('quantity_comped') * comp_unit_price)).values('total')),
+                Value(Decimal('0')),
+                output_field=models.DecimalField(max_digits=14, decimal_places=2)
+            ),
+        ).annotate(
+            remaining_capacity=Case(
+                When(max_capacity__isnull=True, then=Value(None)),
+                default=Greatest(F('max_capacity') - F('seats_taken'), Value(0)),
+                output_field=models.IntegerField()
+            )
+        )
 
 class Event(BaseModel):
     class Mode(models.TextChoices):
@@ -39,10 +92,18 @@ class Event(BaseModel):
     duration_mins = models.IntegerField(default=60, validators=[
         MinValueValidator(0)
     ])
+    # date and start_time as one timestamp, kept in step by save(), for range queries
+    starts_at = models.DateTimeField(null=True, editable=False)
 
+    # Set on occurrences materialized from a series
+    series = models.ForeignKey('EventSeries', on_delete=models.CASCADE, related_name='occurrences', null=True, blank=True, editable=False)
+    occurrence_date = models.DateField(null=True, blank=True, editable=False, help_text="The date the series rule gave this occurrence")
+
+    # Change through InventoryService.set_capacity so seats_taken is re-counted
     max_capacity = models.IntegerField(blank=True, null=True, validators=[
         MinValueValidator(0)
     ])
+    seats_taken = models.PositiveIntegerField(default=0, editable=False, help_text="Seats sold or held across all ticket types; maintained by InventoryService")
     allow_sponsorship = models.BooleanField(default=False)
     allow_donations = models.BooleanField(default=False)
 
@@ -54,10 +115,38 @@ class Event(BaseModel):
     is_published = models.BooleanField(default=False)
 
     updated_at = models.DateTimeField(auto_now=True)
+    
+    # Maintained by a database trigger (see migration 0007)
+    search_vector = SearchVectorField(null=True, editable=False)
+    
+    objects = ActiveManager.from_queryset(EventQuerySet)()
 
     class Meta:
         ordering = ["-date"]
+        indexes = [
+            # Keyset pagination for the public discovery feed (see DiscoverEventsView)
+            models.Index(fields=['date', 'start_time', 'id'], name='event_discovery_idx', condition=models.Q(is_published=True, is_cancelled=False, is_deleted=False)),
+            models.Index(fields=['category', 'date', 'start_time', 'id'], name='event_discovery_category_idx', condition=models.Q(is_published=True, is_cancelled=False, is_deleted=False)),
+            models.Index(fields=['mode', 'date', 'start_time', 'id'], name='event_discovery_mode_idx', condition=models.Q(is_published=True, is_cancelled=False, is_deleted=False)),
+            GinIndex(fields=['search_vector'], name='event_search_idx'),
+            # Reminder scheduling (see events/reminders.py)
+            models.Index(fields=['starts_at'], name='event_starts_at_idx', condition=models.Q(is_cancelled=False, is_deleted=False)),
+        ]
+        constraints = [
+            models.UniqueConstraint(fields=['series', 'occurrence_date'], name='event_series_occurrence_unique'),
+        ]
 
+    def save(self, *args, **kwargs):
+        if self.date and self.start_time:
+            self.starts_at = timezone.make_aware(datetime.combine(self.date, self.start_time))
+            
+        # seats_taken only moves through InventoryService's conditional UPDATEs;
+        # writing back a stale copy here would undo concurrent sales
+        if not self._state.adding and kwargs.get('update_fields') is None:
+            kwargs['update_fields'] = [field.name for field in self._meta.concrete_fields if not field.primary_key and field.name != 'seats_taken']
+            
+        super().save(*args, **kwargs)
+        
     def __str__(self):
         return self.title
     
@@ -84,7 +173,13 @@ class Ticket(BaseModel):
         validators=[MinValueValidator(0)],
         help_text="Leave blank for unlimited"
     )
-    quantity_sold = models.IntegerField(default=0)
+    quantity_sold = models.IntegerField(default=0, help_text="Rolled up from sales shards; see InventoryService.totals for exact figures")
+    quantity_held = models.IntegerField(default=0, help_text="Seats reserved by checkouts awaiting payment, rolled up from sales shards")
+    quantity_comped = models.IntegerField(default=0, help_text="Complimentary tickets given out; counted in quantity_sold but not in revenue")
+    sales_shards = models.PositiveSmallIntegerField(default=4, validators=[
+        MinValueValidator(1),
+        MaxValueValidator(64)
+    ], help_text="Number of counter rows sales are spread over")
 
     type = models.CharField(max_length=20, choices=Type.choices, default=Type.CUSTOM)
     sales_start = models.DateTimeField(default=timezone.now)
@@ -105,6 +200,33 @@ class Ticket(BaseModel):
             return price - discount_amount
 
         return price
+    
+    @property
+    def quantity_available(self):
+        if self.quantity is None:
+            return None
+        return max(self.quantity - self.quantity_sold - self.quantity_held, 0)
+
+class TicketSalesShard(BaseModel):
+    """
+    One slice of a ticket's stock. Sales and holds land on a random shard so
+    concurrent buyers of the same ticket lock different rows; each shard owns a
+    share of Ticket.quantity, which keeps the total from ever being oversold.
+    """
+    ticket = models.ForeignKey(Ticket, on_delete=models.CASCADE, related_name="shards")
+    index = models.PositiveSmallIntegerField()
+    
+    capacity = models.IntegerField(null=True, blank=True, help_text="Blank when the ticket is unlimited")
+    sold = models.IntegerField(default=0)
+    held = models.IntegerField(default=0)
+    
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['ticket', 'index'], name='unique_ticket_shard'),
+        ]
+        
+    def __str__(self):
+        return f"{self.ticket.name} shard {self.index}"
 
 class TicketPurchase(BaseModel):
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="purchased_tickets", null=True, blank=True)
@@ -113,15 +235,93 @@ class TicketPurchase(BaseModel):
 
     ticket_uid = models.UUIDField(default=uuid.uuid4, unique=True, editable=False)
     
-    payment_reference = models.CharField(max_length=255, blank=True, null=True)
+    payment_reference = models.CharField(max_length=255, blank=True, null=True, help_text="Paystack reference of a group checkout; single purchases use ticket_uid")
     is_paid = models.BooleanField(default=False)
+    paid_at = models.DateTimeField(blank=True, null=True, help_text="When the ticket became valid; scanner manifests are versioned by it")
 
     checked_in = models.BooleanField(default=False)
     checked_in_at = models.DateTimeField(blank=True, null=True)
+    
+    qr_code_url = models.URLField(blank=True, null=True)
+    
+    calendar_synced = models.BooleanField(default=False, help_text="Whether the attendee is on the event's Google Calendar invite")
+    confirmation_sent_at = models.DateTimeField(blank=True, null=True, help_text="When the ticket confirmation email went out; unset for paid tickets still waiting on one")
+    confirmation_claimed_until = models.DateTimeField(blank=True, null=True, help_text="Lease of the run sending the confirmation; another run may take it over once this passes")
+    
+    class Meta:
+        indexes = [
+            models.Index(fields=['ticket'], name='purchase_calendar_pending_idx', condition=models.Q(is_paid=True, calendar_synced=False)),
+            models.Index(fields=['ticket'], name='purchase_confirmation_idx', condition=models.Q(is_paid=True, confirmation_sent_at__isnull=True)),
+            # Group checkouts share one reference (see events/group_purchases.py)
+            models.Index(fields=['payment_reference'], name='purchase_payment_reference_idx', condition=models.Q(payment_reference__isnull=False)),
+            models.Index(fields=['ticket', 'paid_at'], name='purchase_paid_at_idx', condition=models.Q(is_paid=True)),
+        ]
 
     def __str__(self):
         return f"{self.ticket_uid} - {self.ticket.name}"
     
+class TicketReservation(BaseModel):
+    """
+    A seat held for a purchase while its Paystack checkout is pending.
+    """
+    class Status(models.TextChoices):
+        ACTIVE = "active", "Active"
+        CONVERTED = "converted", "Converted"
+        RELEASED = "released", "Released"
+        
+    ticket = models.ForeignKey(Ticket, on_delete=models.CASCADE, related_name="reservations")
+    purchase = models.OneToOneField(TicketPurchase, on_delete=models.CASCADE, related_name="reservation")
+    shard = models.PositiveSmallIntegerField(default=0)
+    
+    status = models.CharField(max_length=20, choices=Status.choices, default=Status.ACTIVE)
+    expires_at = models.DateTimeField()
+    
+    class Meta:
+        indexes = [
+            models.Index(fields=['expires_at'], name='reservation_active_idx', condition=models.Q(status='active')),
+        ]
+        
+    def __str__(self):
+        return f"Hold on {self.ticket.name} ({self.status})"
+    
+class WaitlistEntry(BaseModel):
+    """
+    A place in a sold out ticket's queue. Entries are served in id order; an
+    offer holds a seat until the claim link expires (see events/waitlist.py).
+    """
+    class Status(models.TextChoices):
+        WAITING = "waiting", "Waiting"
+        OFFERED = "offered", "Offered"
+        CLAIMED = "claimed", "Claimed"
+        EXPIRED = "expired", "Expired"
+        LEFT = "left", "Left"
+        
+    ticket = models.ForeignKey(Ticket, on_delete=models.CASCADE, related_name="waitlist")
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="waitlist_entries")
+    email = models.EmailField()
+    
+    status = models.CharField(max_length=20, choices=Status.choices, default=Status.WAITING)
+    claim_url = models.URLField(max_length=500, help_text="Where the offer email links to, with ?token= appended")
+    
+    claim_token = models.UUIDField(null=True, blank=True, unique=True, editable=False)
+    held_shard = models.PositiveSmallIntegerField(null=True, blank=True, help_text="Shard the offer's seat is held on")
+    offered_at = models.DateTimeField(null=True, blank=True)
+    offer_expires_at = models.DateTimeField(null=True, blank=True)
+    purchase = models.OneToOneField(TicketPurchase, on_delete=models.SET_NULL, null=True, blank=True, related_name="waitlist_entry")
+    
+    class Meta:
+        indexes = [
+            # Head of each ticket's queue
+            models.Index(fields=['ticket', 'id'], name='waitlist_queue_idx', condition=models.Q(status='waiting')),
+            models.Index(fields=['offer_expires_at'], name='waitlist_offer_idx', condition=models.Q(status='offered')),
+        ]
+        constraints = [
+            models.UniqueConstraint(fields=['ticket', 'user'], name='waitlist_one_active_entry', condition=models.Q(status__in=['waiting', 'offered'])),
+        ]
+        
+    def __str__(self):
+        return f"{self.email} waiting for {self.ticket.name} ({self.status})"
+    
 class VirtualMeeting(BaseModel):
     class Platform(models.TextChoices):
         GOOGLE_MEET = 'meet', 'Google Meet'
@@ -136,4 +336,211 @@ class VirtualMeeting(BaseModel):
     room_name = models.CharField(max_length=255, null=True, blank=True)
     
     def __str__(self):
-        return f"{self.platform} meeting for {self.event.title}"
\ No newline at end of file
+        return f"{self.platform} meeting for {self.event.title}"
+    
+class EventSeries(BaseModel):
+    """
+    An event that repeats on an RFC 5545 rule. Occurrences are expanded from the
+    rule when asked for, and an Event row exists only for those someone has
+    bought a ticket for (see events/series.py).
+    """
+    creator = models.ForeignKey(User, on_delete=models.CASCADE, related_name="event_series")
+
+    title = models.CharField(max_length=320)
+    description = models.TextField()
+    category = models.CharField(max_length=50, choices=Event.Category.choices)
+    mode = models.CharField(max_length=20, choices=Event.Mode.choices)
+
+    venue = models.CharField(max_length=255, blank=True, null=True)
+    dtstart = models.DateField(help_text="Date of the first occurrence")
+    start_time = models.TimeField()
+    duration_mins = models.IntegerField(default=60, validators=[
+        MinValueValidator(0)
+    ])
+    rrule = models.CharField(max_length=500, help_text="RRULE value without the 'RRULE:' prefix, e.g. FREQ=WEEKLY;BYDAY=TU;COUNT=10. UNTIL must be in UTC")
+
+    max_capacity = models.IntegerField(blank=True, null=True, validators=[
+        MinValueValidator(0)
+    ], help_text="Per occurrence")
+
+    # One recurring event on the creator's calendar covers every occurrence
+    platform = models.CharField(max_length=20, choices=VirtualMeeting.Platform.choices, blank=True, null=True)
+    join_url = models.URLField(max_length=500, blank=True, null=True)
+    room_name = models.CharField(max_length=255, null=True, blank=True)
+    external_calendar_event_id = models.CharField(max_length=255, null=True, blank=True)
+
+    is_cancelled = models.BooleanField(default=False)
+    is_published = models.BooleanField(default=False)
+
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ["-dtstart"]
+
+    def __str__(self):
+        return self.title
+
+class SeriesTicket(BaseModel):
+    """
+    Copied into a Ticket on each occurrence when it is materialized.
+    """
+    series = models.ForeignKey(EventSeries, on_delete=models.CASCADE, related_name="tickets")
+
+    name = models.CharField(max_length=255)
+    description = models.TextField(blank=True, null=True)
+
+    price = models.DecimalField(max_digits=10, decimal_places=2, validators=[
+        MinValueValidator(0)
+    ])
+    discount_perc = models.DecimalField(max_digits=5, decimal_places=2, default=0, validators=[
+        MinValueValidator(0),
+        MaxValueValidator(100)
+    ])
+    quantity = models.IntegerField(
+        null=True,
+        blank=True,
+        validators=[MinValueValidator(0)],
+        help_text="Per occurrence; leave blank for unlimited"
+    )
+    sales_shards = models.PositiveSmallIntegerField(default=4, validators=[
+        MinValueValidator(1),
+        MaxValueValidator(64)
+    ])
+    type = models.CharField(max_length=20, choices=Ticket.Type.choices, default=Ticket.Type.CUSTOM)
+
+    def __str__(self):
+        return f"{self.name} - {self.series.title}"
+
+class OutboxMessage(BaseModel):
+    """
+    Side effect recorded in the same transaction as the write that caused it and
+    delivered after commit by the outbox worker (see events/outbox.py).
+    """
+    class Topic(models.TextChoices):
+        CALENDAR_SYNC = "calendar.sync", "Calendar sync"
+        TICKET_EMAIL = "email.ticket", "Ticket confirmation email"
+        EVENT_UPDATE_EMAIL = "email.event_update", "Schedule update email"
+        EVENT_MODE_EMAIL = "email.event_mode", "Mode change email"
+        EVENT_REMINDER = "email.event_reminder", "Event reminder email"
+        CALENDAR_MIRROR = "calendar.mirror", "Calendar mirror"
+        WAITLIST_PROMOTION = "waitlist.promote", "Waitlist promotion"
+        WAITLIST_OFFER_EMAIL = "email.waitlist_offer", "Waitlist offer email"
+        
+    class Status(models.TextChoices):
+        PENDING = "pending", "Pending"
+        DONE = "done", "Done"
+        FAILED = "failed", "Failed"
+        
+    topic = models.CharField(max_length=50, choices=Topic.choices)
+    payload = models.JSONField(default=dict, blank=True)
+    status = models.CharField(max_length=20, choices=Status.choices, default=Status.PENDING)
+    
+    attempts = models.PositiveIntegerField(default=0)
+    available_at = models.DateTimeField(default=timezone.now)
+    processed_at = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True, null=True)
+    
+    dedupe_key = models.CharField(max_length=255, null=True, blank=True, help_text="Messages with the same key share one delivery until a worker picks it up")
+    
+    class Meta:
+        indexes = [
+            models.Index(fields=['available_at'], name='outbox_pending_idx', condition=models.Q(status='pending')),
+        ]
+        constraints = [
+            # Only unclaimed messages absorb duplicates; once claimed, a new message is needed for later writes
+            models.UniqueConstraint(fields=['dedupe_key'], name='outbox_unclaimed_dedupe_key', condition=models.Q(status='pending', attempts=0)),
+        ]
+        
+    def __str__(self):
+        return f"{self.topic} ({self.status})"
+
+    
+class EventReminder(BaseModel):
+    """
+    A reminder window claimed for an event. The unique constraint is what stops
+    overlapping scheduler ticks from sending the same reminder twice.
+    """
+    event = models.ForeignKey(Event, on_delete=models.CASCADE, related_name='reminders')
+    window = models.CharField(max_length=20)
+    starts_at = models.DateTimeField(help_text="The event start this reminder was scheduled against")
+    
+    recipients = models.PositiveIntegerField(default=0)
+    sent_at = models.DateTimeField(null=True, blank=True)
+    
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['event', 'window'], name='unique_event_reminder_window'),
+        ]
+        
+    def __str__(self):
+        return f"{self.window} reminder for {self.event_id}"
+    
+class CalendarSync(BaseModel):
+    """
+    Per-event state for coalescing attendee syncs to Google Calendar.
+    """
+    event = models.OneToOneField(Event, on_delete=models.CASCADE, related_name='calendar_sync')
+    
+    dirty_since = models.DateTimeField(null=True, blank=True)
+    
+    syncs_requested = models.PositiveIntegerField(default=0, help_text="Purchases that needed adding to the invite")
+    patches_sent = models.PositiveIntegerField(default=0)
+    last_synced_at = models.DateTimeField(null=True, blank=True)
+    last_lag_ms = models.PositiveIntegerField(null=True, blank=True)
+    max_lag_ms = models.PositiveIntegerField(default=0)
+    
+    @property
+    def calls_saved(self):
+        return self.syncs_requested - self.patches_sent
+    
+    def __str__(self):
+        return f"Calendar sync for {self.event.title}"
+
+class HourlyTicketSales(BaseModel):
+    """
+    Per-ticket, per-hour sales counters, so charts never scan TicketPurchase.
+    Purchases, payments and check-ins land in TicketSalesDelta first and are
+    folded in by `rollup_ticket_sales` (see events/analytics.py).
+    `rebuild_sales_rollups` recomputes them from history.
+    """
+    ticket = models.ForeignKey(Ticket, on_delete=models.CASCADE, related_name="hourly_sales")
+    event = models.ForeignKey(Event, on_delete=models.CASCADE, related_name="hourly_sales")
+    hour = models.DateTimeField()
+    
+    created = models.PositiveIntegerField(default=0, help_text="Purchases started")
+    paid = models.PositiveIntegerField(default=0)
+    checked_in = models.PositiveIntegerField(default=0)
+    revenue = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['ticket', 'hour'], name='unique_ticket_sales_hour'),
+        ]
+        indexes = [
+            models.Index(fields=['event', 'hour'], name='hourly_sales_event_idx'),
+        ]
+        
+    def __str__(self):
+        return f"{self.ticket.name} sales at {self.hour}"
+
+class TicketSalesDelta(BaseModel):
+    """
+    One increment of HourlyTicketSales, waiting to be folded in. Purchases only
+    ever INSERT these, so buyers of the same ticket never wait on a shared row.
+    """
+    ticket = models.ForeignKey(Ticket, on_delete=models.CASCADE, related_name="sales_deltas")
+    event = models.ForeignKey(Event, on_delete=models.CASCADE, related_name="sales_deltas")
+    hour = models.DateTimeField()
+    
+    created = models.IntegerField(default=0)
+    paid = models.IntegerField(default=0)
+    checked_in = models.IntegerField(default=0)
+    revenue = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    
+    class Meta:
+        indexes = [
+            models.Index(fields=['event', 'hour'], name='sales_delta_event_idx'),
+        ]
+        
+    def __str__(self):
+        return f"{self.ticket.name} sales delta at {self.hour}"
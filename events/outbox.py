@@ -0,0 +1,170 @@
+from django.conf import settings
+from django.db import connection, transaction, close_old_connections
+from django.db.models import F
+from django.utils import timezone
+
+from .models import OutboxMessage
+
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from logging import getLogger
+
+import json
+
+logger = getLogger(__name__)
+
+MAX_ATTEMPTS = getattr(settings, "OUTBOX_MAX_ATTEMPTS", 8)
+LEASE_SECONDS = getattr(settings, "OUTBOX_LEASE_SECONDS", 120)
+BACKOFF_BASE_SECONDS = 15
+BACKOFF_MAX_SECONDS = 60 * 60
+
+_handlers = {}
+_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="outbox")
+
+def handles(topic):
+    """
+    Registers the decorated function as the handler for an outbox topic.
+    Handlers receive the message payload and must raise to have it retried.
+    """
+    def decorator(func):
+        _handlers[topic] = func
+        return func
+    return decorator
+
+def enqueue(topic, payload, delay=None, dedupe_key=None):
+    """
+    Records a side effect in the current transaction. Nothing is sent until the
+    surrounding transaction commits, so a rollback discards the message too.
+
+    Messages with a dedupe_key collapse into the one already waiting for a
+    worker, so the handler must work out everything to do from current state
+    rather than from the payload alone. The waiting message stays locked until
+    the enqueuing transaction commits, so writes that run concurrently and
+    often, like purchases, should enqueue plainly and collapse() in the handler.
+    """
+    available_at = timezone.now() + delay if delay else timezone.now()
+
+    if dedupe_key is None:
+        message = OutboxMessage.objects.create(topic=topic, payload=payload, available_at=available_at)
+    else:
+        message = _enqueue_deduplicated(topic, payload, available_at, dedupe_key)
+
+    if getattr(settings, "OUTBOX_DISPATCH_ON_COMMIT", True) and not delay:
+        transaction.on_commit(dispatch)
+
+    return message
+
+def _enqueue_deduplicated(topic, payload, available_at, dedupe_key):
+    # The no-op update locks the waiting message until this transaction commits,
+    # and claim() skips locked rows, so a worker never runs it before this write is visible
+    table = OutboxMessage._meta.db_table
+
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"""
+            INSERT INTO {table} (is_deleted, created_at, topic, payload, status, attempts, available_at, dedupe_key)
+            VALUES (FALSE, now(), %s, %s::jsonb, %s, 0, %s, %s)
+            ON CONFLICT (dedupe_key) WHERE status = %s AND attempts = 0
+            DO UPDATE SET available_at = LEAST({table}.available_at, EXCLUDED.available_at)
+            RETURNING id
+            """,
+            [topic, json.dumps(payload), OutboxMessage.Status.PENDING, available_at, dedupe_key, OutboxMessage.Status.PENDING]
+        )
+        message_id = cursor.fetchone()[0]
+
+    return OutboxMessage(id=message_id, topic=topic, payload=payload, available_at=available_at, dedupe_key=dedupe_key)
+
+def collapse(topic, **payload):
+    """
+    Marks the due messages of a topic whose payload matches as done, for a
+    handler about to work through everything they were queued for. Call it
+    before reading that state: only committed messages match, so whatever they
+    were queued for is already visible. Messages leased by another worker are
+    left to run. Returns how many were collapsed.
+    """
+    now = timezone.now()
+    lookups = {f"payload__{key}": value for key, value in payload.items()}
+
+    return OutboxMessage.objects.filter(topic=topic, status=OutboxMessage.Status.PENDING, available_at__lte=now, **lookups).update(
+        status=OutboxMessage.Status.DONE,
+        processed_at=now
+    )
+
+def dispatch():
+    """
+    Drains the outbox on a background thread so the request that enqueued the
+    message can return as soon as its transaction commits.
+    """
+    _executor.submit(_drain_in_thread)
+
+def _drain_in_thread():
+    try:
+        drain()
+    except Exception as e:
+        logger.error(f"Outbox dispatch failed: {e}")
+    finally:
+        close_old_connections()
+
+def claim(batch_size=50):
+    """
+    Leases up to batch_size due messages. Claimed rows are pushed LEASE_SECONDS
+    into the future, so a worker that dies mid-batch only delays them.
+    """
+    now = timezone.now()
+
+    with transaction.atomic():
+        messages = list(
+            OutboxMessage.objects.select_for_update(skip_locked=True)
+            .filter(status=OutboxMessage.Status.PENDING, available_at__lte=now)
+            .order_by('available_at')[:batch_size]
+        )
+
+        if messages:
+            OutboxMessage.objects.filter(id__in=[m.id for m in messages]).update(
+                available_at=now + timedelta(seconds=LEASE_SECONDS),
+                attempts=F('attempts') + 1
+            )
+
+    return messages
+
+def process(message: OutboxMessage):
+    handler = _handlers.get(message.topic)
+    attempts = message.attempts + 1
+
+    try:
+        if handler is None:
+            raise LookupError(f"No outbox handler registered for '{message.topic}'")
+
+        handler(message.payload)
+
+    except Exception as e:
+        if attempts >= MAX_ATTEMPTS:
+            logger.error(f"Outbox message {message.id} ({message.topic}) failed permanently: {e}")
+            OutboxMessage.objects.filter(id=message.id).update(status=OutboxMessage.Status.FAILED, last_error=str(e))
+            return False
+
+        backoff = min(BACKOFF_BASE_SECONDS * 2 ** (attempts - 1), BACKOFF_MAX_SECONDS)
+        logger.warning(f"Outbox message {message.id} ({message.topic}) failed, retrying in {backoff}s: {e}")
+        OutboxMessage.objects.filter(id=message.id).update(
+            available_at=timezone.now() + timedelta(seconds=backoff),
+            last_error=str(e)
+        )
+        return False
+
+    OutboxMessage.objects.filter(id=message.id).update(status=OutboxMessage.Status.DONE, processed_at=timezone.now(), last_error=None)
+    return True
+
+def drain(batch_size=50):
+    """
+    Processes due messages until none are left. Returns the number processed.
+    """
+    processed = 0
+
+    while True:
+        messages = claim(batch_size)
+        if not messages:
+            return processed
+
+        for message in messages:
+            process(message)
+            processed += 1
@@ -0,0 +1,78 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+
+from .models import TicketPurchase
+
+from futaverse.utils.supabase import upload_file_to_supabase
+
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+from logging import getLogger
+
+import qrcode
+
+logger = getLogger(__name__)
+
+QR_CACHE_TIMEOUT = getattr(settings, "TICKET_QR_CACHE_SECONDS", 60 * 60 * 24 * 30)
+QR_FOLDER = "ticket_qr_codes"
+UPLOAD_WORKERS = getattr(settings, "TICKET_QR_UPLOAD_WORKERS", 8)
+
+def cache_key(ticket_uid):
+    return f"ticket_qr:{ticket_uid}"
+
+def render_png(ticket_uid):
+    """
+    Encodes the ticket_uid, which is all the check-in endpoint needs.
+    """
+    qr = qrcode.QRCode(error_correction=qrcode.constants.ERROR_CORRECT_M, box_size=8, border=2)
+    qr.add_data(str(ticket_uid))
+    qr.make(fit=True)
+
+    buffer = BytesIO()
+    qr.make_image(fill_color="black", back_color="white").save(buffer, format="PNG")
+    return buffer.getvalue()
+
+def get_png(ticket_uid):
+    """
+    Rendered once per ticket; later calls, from any worker, are served from the
+    shared cache.
+    """
+    return cache.get_or_set(cache_key(ticket_uid), lambda: render_png(ticket_uid), QR_CACHE_TIMEOUT)
+
+def upload(ticket_uid):
+    """
+    Uploads the ticket's QR image to Supabase and returns its public URL, or None
+    if the upload failed. The object is named after the ticket, so repeating an
+    upload gives the same URL.
+    """
+    png = get_png(ticket_uid)
+    file = SimpleUploadedFile(f"{ticket_uid}.png", png, content_type="image/png")
+
+    try:
+        return upload_file_to_supabase(file, QR_FOLDER, custom_name=ticket_uid.hex)
+    except Exception as e:
+        logger.warning("QR upload failed for ticket %s: %s", ticket_uid, e)
+        return None
+
+def ensure_qr_codes(purchases):
+    """
+    Uploads the QR images of the purchases that have none yet, UPLOAD_WORKERS at
+    a time, and stores their public URLs with one UPDATE. Purchases whose upload
+    failed keep qr_code_url unset.
+    """
+    missing = [purchase for purchase in purchases if not purchase.qr_code_url]
+    if not missing:
+        return
+
+    # Uploads touch no database connection, so they are safe to run on threads
+    with ThreadPoolExecutor(max_workers=UPLOAD_WORKERS, thread_name_prefix="qr_upload") as executor:
+        urls = list(executor.map(upload, [purchase.ticket_uid for purchase in missing]))
+
+    uploaded = []
+    for purchase, url in zip(missing, urls):
+        if url:
+            purchase.qr_code_url = url
+            uploaded.append(purchase)
+
+    TicketPurchase.objects.bulk_update(uploaded, ['qr_code_url'])
@@ -0,0 +1,119 @@
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .models import Event, EventReminder, TicketPurchase, OutboxMessage
+from . import outbox
+
+from futaverse.utils.email_service import BrevoEmailService
+from futaverse.utils import email_templates
+
+from datetime import timedelta
+from logging import getLogger
+
+logger = getLogger(__name__)
+
+mailer = BrevoEmailService()
+
+# Window name -> minutes before the start
+REMINDER_WINDOWS = getattr(settings, "EVENT_REMINDER_WINDOWS", {"24h": 24 * 60, "1h": 60})
+# How far back a tick looks, so a few missed ticks still send their reminders
+CATCH_UP = timedelta(minutes=getattr(settings, "EVENT_REMINDER_CATCH_UP_MINUTES", 15))
+
+def describe(minutes):
+    if minutes % (24 * 60) == 0:
+        days = minutes // (24 * 60)
+        return "tomorrow" if days == 1 else f"in {days} days"
+    if minutes % 60 == 0:
+        hours = minutes // 60
+        return "in 1 hour" if hours == 1 else f"in {hours} hours"
+    return f"in {minutes} minutes"
+
+class ReminderEngine:
+    """
+    Sends reminder emails ahead of each event, once per window.
+
+    Each tick reads only the events that reach a window within the last
+    CATCH_UP, in one range scan of event_starts_at_idx per window, so its cost
+    follows the events starting soon rather than the size of the table. Claimed
+    windows become EventReminder rows and outbox messages, and the sends go
+    through the bulk sender.
+    """
+    @staticmethod
+    def schedule(now=None):
+        """
+        Claims every reminder due at `now`. Returns how many were claimed.
+        """
+        now = now or timezone.now()
+        claimed = 0
+
+        for window, minutes in REMINDER_WINDOWS.items():
+            edge = now + timedelta(minutes=minutes)
+
+            events = (
+                Event.objects.filter(is_cancelled=False, starts_at__gt=max(now, edge - CATCH_UP), starts_at__lte=edge)
+                .exclude(reminders__window=window)
+                .order_by('starts_at')
+                .values_list('id', 'starts_at')
+            )
+
+            for event_id, starts_at in events:
+                with transaction.atomic():
+                    reminder, created = EventReminder.objects.get_or_create(event_id=event_id, window=window, defaults={'starts_at': starts_at})
+
+                    if created:
+                        outbox.enqueue(OutboxMessage.Topic.EVENT_REMINDER, {"reminder_id": reminder.id})
+                        claimed += 1
+
+        return claimed
+
+    @staticmethod
+    def reset(event: Event):
+        """
+        Frees windows claimed against an old start time, after a reschedule.
+        """
+        EventReminder.objects.filter(event=event).exclude(starts_at=event.starts_at).delete()
+
+    @staticmethod
+    def recipients(event: Event):
+        purchases = TicketPurchase.objects.filter(ticket__event=event, is_paid=True)
+
+        # People on the Google invite already get Calendar's own reminders
+        virtual_meeting = getattr(event, 'virtual_meeting', None)
+        if virtual_meeting and virtual_meeting.external_calendar_event_id:
+            purchases = purchases.filter(calendar_synced=False)
+
+        return list(purchases.values_list('email', flat=True).distinct())
+
+    @staticmethod
+    def send(reminder_id):
+        reminder = EventReminder.objects.select_related('event', 'event__virtual_meeting').filter(id=reminder_id).first()
+        if not reminder:
+            return
+
+        event = reminder.event
+        if event.is_cancelled or event.starts_at != reminder.starts_at or event.starts_at <= timezone.now():
+            logger.info(f"Skipping {reminder.window} reminder for event {event.id}: cancelled, rescheduled or started")
+            return
+
+        recipients = ReminderEngine.recipients(event)
+        virtual_meeting = getattr(event, 'virtual_meeting', None)
+
+        context = {
+            'event_title': event.title,
+            'starts_in': describe(REMINDER_WINDOWS.get(reminder.window, 0)),
+            'event_date': timezone.localtime(event.starts_at).strftime('%B %d, %Y at %I:%M %p'),
+            'event_location': event.venue or "Virtual Meeting",
+            'join_url': virtual_meeting.join_url if virtual_meeting else None,
+        }
+
+        if recipients:
+            mailer.send_bulk(
+                subject=f"Reminder: {event.title} starts {context['starts_in']}",
+                body=email_templates.render('emails/event_reminder.html', context),
+                recipients=recipients,
+                is_html=True,
+                campaign=f"reminder_{reminder.id}"
+            )
+
+        EventReminder.objects.filter(id=reminder.id).update(recipients=len(recipients), sent_at=timezone.now())
@@ -2,7 +2,13 @@ from django.utils import timezone
 
 from rest_framework import serializers
 
-from .models import Event, Ticket, TicketPurchase, VirtualMeeting
+from .models import Event, EventSeries, SeriesTicket, Ticket, TicketPurchase, VirtualMeeting, WaitlistEntry
+from .series import parse_rule
+from .group_purchases import MAX_SEATS as GROUP_MAX_SEATS
+from .comps import MAX_EMAILS as COMP_MAX_EMAILS
+from .inventory import InventoryService
+
+from datetime import datetime
 
 class VirtualMeetingSerializer(serializers.ModelSerializer):
     class Meta:
@@ -23,7 +29,23 @@ class CreateTicketSerializer(serializers.ModelSerializer):
     class Meta:
         model = Ticket
         exclude = ['is_deleted', 'deleted_at']
-        read_only_fields = ['sqid', 'created_at', 'updated_at', 'quantity_sold', 'sales_price']
+        read_only_fields = ['sqid', 'created_at', 'updated_at', 'quantity_sold', 'quantity_held', 'quantity_comped', 'sales_price']
+        
+class UpdateTicketSerializer(serializers.ModelSerializer):
+    sales_price = serializers.ReadOnlyField()
+    
+    class Meta:
+        model = Ticket
+        fields = ['sqid', 'name', 'description', 'price', 'discount_perc', 'quantity', 'quantity_sold', 'quantity_held', 'sales_shards', 'type', 'sales_start', 'sales_end', 'is_active', 'sales_price']
+        read_only_fields = ['sqid', 'quantity_sold', 'quantity_held', 'sales_price']
+        
+    def validate_quantity(self, value):
+        # Exact counts from the shards; rebalance never takes back seats already sold or held
+        totals = InventoryService.totals(self.instance)
+        taken = totals['sold'] + totals['held']
+        if value is not None and value < taken:
+            raise serializers.ValidationError(f"Quantity cannot be lower than already sold or reserved tickets ({taken}).")
+        return value
         
 class TicketSerializer(serializers.ModelSerializer):
     sales_price = serializers.ReadOnlyField()
@@ -32,7 +54,7 @@ class TicketSerializer(serializers.ModelSerializer):
     class Meta:
         model = Ticket
         exclude = ['is_deleted', 'deleted_at', 'id']
-        read_only_fields = ['sqid', 'created_at', 'updated_at', 'quantity_sold', 'sales_price']
+        read_only_fields = ['sqid', 'created_at', 'updated_at', 'quantity_sold', 'quantity_held', 'quantity_comped', 'sales_price']
 
 class EventSerializer(serializers.ModelSerializer):
     tickets = TicketSerializer(many=True, required=False)
@@ -70,6 +92,16 @@ class EventSerializer(serializers.ModelSerializer):
         
         return event
     
+def check_on_sale(ticket: Ticket):
+    if ticket.is_active == False:
+        raise serializers.ValidationError({"ticket": "Ticket is not active"})
+    
+    if ticket.sales_start > timezone.now():
+        raise serializers.ValidationError({"ticket": "Ticket sales have not started yet"})
+    
+    if ticket.sales_end and ticket.sales_end < timezone.now():
+        raise serializers.ValidationError({"ticket": "Ticket sales have ended"})
+    
 class TicketPurchaseSerializer(serializers.ModelSerializer):
     ticket = serializers.SlugRelatedField(queryset=Ticket.objects.all(), slug_field='sqid')
     email = serializers.EmailField(write_only=True, required=False)
@@ -80,17 +112,15 @@ class TicketPurchaseSerializer(serializers.ModelSerializer):
         read_only_fields = ['sqid', 'created_at', 'updated_at']
         
     def validate_ticket(self, value: Ticket):
-        if value.is_active == False:
-            raise serializers.ValidationError({"ticket": "Ticket is not active"})
-        
-        if value.sales_start > timezone.now():
-            raise serializers.ValidationError({"ticket": "Ticket sales have not started yet"})
+        check_on_sale(value)
         
-        if value.sales_end and value.sales_end < timezone.now():
-            raise serializers.ValidationError({"ticket": "Ticket sales have ended"})
+        # Fast path only; InventoryService enforces stock atomically at purchase time
+        if value.quantity_available == 0:
+            raise serializers.ValidationError({"ticket": "Ticket is sold out. Join the waitlist to be offered a seat that frees up."})
         
-        if  value.quantity is not None and value.quantity_sold >= value.quantity:
-            raise serializers.ValidationError({"ticket": "Ticket is sold out"})
+        event = value.event
+        if event.max_capacity is not None and event.seats_taken >= event.max_capacity:
+            raise serializers.ValidationError({"ticket": "Event is at full capacity"})
         
         return value
     
@@ -103,9 +133,10 @@ class UpdateEventSerializer(serializers.ModelSerializer):
         read_only_fields = ['sqid']
         
     def validate_max_capacity(self, value):
-        total_sold = sum(ticket.quantity_sold for ticket in self.instance.tickets.all())
-        if value and value < total_sold:
-            raise serializers.ValidationError(f"Capacity cannot be lower than already sold tickets ({total_sold}).")
+        # The ledger is only kept for capped events; set_capacity re-checks against a fresh count
+        seats_taken = self.instance.seats_taken
+        if self.instance.max_capacity is not None and value is not None and value < seats_taken:
+            raise serializers.ValidationError(f"Capacity cannot be lower than already sold or reserved seats ({seats_taken}).")
         return value
 
     def validate_date(self, value):
@@ -114,17 +145,40 @@ class UpdateEventSerializer(serializers.ModelSerializer):
         return value
         
 class ListEventSerializer(serializers.ModelSerializer):
+    """
+    Expects a queryset built with Event.objects.with_sales_summary().
+    """
     # tickets = TicketSerializer(many=True, read_only=True)
     virtual_meeting = VirtualMeetingSerializer(read_only=True)
-    starting_price = serializers.SerializerMethodField(read_only=True)
+    starting_price = serializers.DecimalField(max_digits=10, decimal_places=2, read_only=True)
+    total_sold = serializers.IntegerField(read_only=True)
+    gross_revenue = serializers.DecimalField(max_digits=14, decimal_places=2, read_only=True)
+    remaining_capacity = serializers.IntegerField(read_only=True, allow_null=True)
     
     class Meta:
         model = Event
         exclude = ['is_deleted', 'deleted_at', 'id', 'creator']
+    
+class DiscoverEventSerializer(serializers.ModelSerializer):
+    """
+    Public view of a published event. Expects Event.objects.with_starting_price().
+    """
+    starting_price = serializers.DecimalField(max_digits=10, decimal_places=2, read_only=True)
+    
+    class Meta:
+        model = Event
+        fields = ['sqid', 'title', 'description', 'category', 'mode', 'venue', 'date', 'start_time', 'duration_mins', 'max_capacity', 'starting_price']
         
-    def get_starting_price(self, obj):
-        lowest = obj.tickets.order_by('price').first()
-        return lowest.price if lowest else 0
+class DiscoverEventsQuerySerializer(serializers.Serializer):
+    category = serializers.ChoiceField(choices=Event.Category, required=False)
+    mode = serializers.ChoiceField(choices=Event.Mode, required=False)
+    date_from = serializers.DateField(required=False)
+    date_to = serializers.DateField(required=False)
+    
+    def validate(self, attrs):
+        if attrs.get('date_from') and attrs.get('date_to') and attrs['date_from'] > attrs['date_to']:
+            raise serializers.ValidationError({"date_to": "date_to cannot be before date_from."})
+        return attrs
     
 class UpdateEventModeSerializer(serializers.ModelSerializer):
     mode = serializers.ChoiceField(choices=Event.Mode, required=True)
@@ -159,5 +213,181 @@ class ListTicketPurchaseSerializer(serializers.ModelSerializer):
     
     class Meta:
         model = TicketPurchase
-        fields = ['email', 'ticket', 'ticket_uid', 'is_paid', 'checked_in', 'checked_in_at']
-        read_only_fields = ['sqid', 'created_at', 'updated_at']
\ No newline at end of file
+        fields = ['email', 'ticket', 'ticket_uid', 'is_paid', 'checked_in', 'checked_in_at', 'qr_code_url']
+        read_only_fields = ['sqid', 'created_at', 'updated_at']
+        
+class CheckInSerializer(serializers.Serializer):
+    ticket_uid = serializers.UUIDField()
+    
+class CheckInResultSerializer(serializers.ModelSerializer):
+    ticket_name = serializers.CharField(source='ticket.name', read_only=True)
+    
+    class Meta:
+        model = TicketPurchase
+        fields = ['ticket_uid', 'email', 'ticket_name', 'checked_in_at']
+        
+class ManifestQuerySerializer(serializers.Serializer):
+    since = serializers.IntegerField(required=False, min_value=0, help_text="Version of the manifest the scanner already has")
+        
+class CheckInScanSerializer(serializers.Serializer):
+    ticket_uid = serializers.UUIDField()
+    checked_in_at = serializers.DateTimeField()
+    
+class BatchCheckInSerializer(serializers.Serializer):
+    scans = CheckInScanSerializer(many=True, allow_empty=False, max_length=10000)
+    
+class BatchCheckInResultSerializer(serializers.Serializer):
+    checked_in = serializers.IntegerField()
+    corrected = serializers.IntegerField()
+    unchanged = serializers.IntegerField()
+    rejected = serializers.ListField(child=serializers.UUIDField())
+    
+class AttendeeExportQuerySerializer(serializers.Serializer):
+    file_format = serializers.ChoiceField(choices=['csv', 'xlsx'], default='csv')
+    
+class SalesAnalyticsQuerySerializer(serializers.Serializer):
+    start = serializers.DateTimeField(required=False, help_text="Defaults to when the event was created")
+    end = serializers.DateTimeField(required=False, help_text="Defaults to now")
+    bucket = serializers.ChoiceField(choices=['hour', 'day'], default='day')
+    
+    def validate(self, attrs):
+        if attrs.get('start') and attrs.get('end') and attrs['start'] >= attrs['end']:
+            raise serializers.ValidationError({"end": "end must be after start."})
+        return attrs
+    
+class SalesPointSerializer(serializers.Serializer):
+    bucket = serializers.DateTimeField()
+    created = serializers.IntegerField()
+    paid = serializers.IntegerField()
+    checked_in = serializers.IntegerField()
+    revenue = serializers.DecimalField(max_digits=14, decimal_places=2)
+    
+class SalesSummarySerializer(serializers.Serializer):
+    created = serializers.IntegerField()
+    paid = serializers.IntegerField()
+    checked_in = serializers.IntegerField()
+    revenue = serializers.DecimalField(max_digits=14, decimal_places=2)
+    conversion_rate = serializers.FloatField(allow_null=True, help_text="Paid purchases over purchases started")
+    check_in_rate = serializers.FloatField(allow_null=True, help_text="Check-ins over paid purchases")
+    
+class SalesAnalyticsSerializer(serializers.Serializer):
+    bucket = serializers.CharField()
+    totals = SalesSummarySerializer()
+    series = SalesPointSerializer(many=True)
+
+class SeriesTicketSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = SeriesTicket
+        exclude = ['is_deleted', 'deleted_at', 'id', 'series']
+        read_only_fields = ['sqid', 'created_at']
+        
+class EventSeriesSerializer(serializers.ModelSerializer):
+    tickets = SeriesTicketSerializer(many=True, required=False)
+    redirect_after_auth = serializers.URLField(required=False, write_only=True)
+    
+    class Meta:
+        model = EventSeries
+        exclude = ['is_deleted', 'deleted_at', 'id']
+        read_only_fields = ['sqid', 'created_at', 'updated_at', 'is_cancelled', 'creator', 'join_url', 'room_name', 'external_calendar_event_id']
+        
+    def validate_rrule(self, value):
+        value = value.strip()
+        if value.upper().startswith("RRULE:"):
+            value = value[len("RRULE:"):]
+        return value
+        
+    def validate(self, attrs):
+        validated_data = super().validate(attrs)
+        
+        mode = validated_data.get("mode")
+        platform = validated_data.get("platform")
+        
+        if mode in [Event.Mode.VIRTUAL, Event.Mode.HYBRID] and not platform:
+            raise serializers.ValidationError({"platform": "Platform is required for events with virtual or hybrid modes"})
+        
+        dtstart = timezone.make_aware(datetime.combine(validated_data['dtstart'], validated_data['start_time']))
+        try:
+            parse_rule(validated_data['rrule'], dtstart)
+        except ValueError as e:
+            raise serializers.ValidationError({"rrule": str(e)})
+        
+        return validated_data
+    
+    def create(self, validated_data):
+        tickets_data = validated_data.pop("tickets", None)
+        series = super().create(validated_data)
+        
+        if not tickets_data:
+            SeriesTicket.objects.create(series=series, name="Free", description="Standard", price=0, type=Ticket.Type.DEFAULT)
+            
+        for ticket_data in tickets_data or []:
+            SeriesTicket.objects.create(series=series, **ticket_data)
+            
+        return series
+    
+class SeriesOccurrenceQuerySerializer(serializers.Serializer):
+    start = serializers.DateField(required=False, help_text="Defaults to today")
+    end = serializers.DateField(required=False, help_text="Defaults to 90 days after start")
+    
+class SeriesOccurrenceSerializer(serializers.Serializer):
+    date = serializers.DateField()
+    starts_at = serializers.DateTimeField()
+    ends_at = serializers.DateTimeField()
+    event = serializers.SlugRelatedField(read_only=True, slug_field='sqid', help_text="Unset until the occurrence has been materialized")
+    
+class WaitlistEntrySerializer(serializers.ModelSerializer):
+    ticket = serializers.SlugRelatedField(read_only=True, slug_field='sqid')
+    position = serializers.IntegerField(read_only=True, allow_null=True, help_text="Place in the queue while waiting")
+    
+    class Meta:
+        model = WaitlistEntry
+        fields = ['sqid', 'ticket', 'status', 'position', 'offer_expires_at', 'created_at']
+        read_only_fields = fields
+        
+class ClaimWaitlistOfferSerializer(serializers.Serializer):
+    token = serializers.UUIDField()
+    
+class GroupPurchaseItemSerializer(serializers.Serializer):
+    ticket = serializers.SlugRelatedField(queryset=Ticket.objects.select_related('event'), slug_field='sqid')
+    quantity = serializers.IntegerField(min_value=1)
+    emails = serializers.ListField(child=serializers.EmailField(), required=False, help_text="Attendee for each seat; seats without one go to the buyer")
+    
+    def validate_ticket(self, value: Ticket):
+        check_on_sale(value)
+        return value
+    
+    def validate(self, attrs):
+        if len(attrs.get('emails', [])) > attrs['quantity']:
+            raise serializers.ValidationError({"emails": "More emails than seats."})
+        return attrs
+    
+class GroupPurchaseSerializer(serializers.Serializer):
+    items = GroupPurchaseItemSerializer(many=True, allow_empty=False)
+    
+    def validate_items(self, value):
+        tickets = [item['ticket'] for item in value]
+        
+        if len(set(tickets)) != len(tickets):
+            raise serializers.ValidationError("List each ticket once, with the number of seats.")
+        if len({ticket.event_id for ticket in tickets}) > 1:
+            raise serializers.ValidationError("All tickets must be for the same event.")
+        if sum(item['quantity'] for item in value) > GROUP_MAX_SEATS:
+            raise serializers.ValidationError(f"At most {GROUP_MAX_SEATS} seats per group purchase.")
+        
+        return value
+    
+class GroupPurchaseResultSerializer(serializers.Serializer):
+    payment_reference = serializers.CharField()
+    checkout_url = serializers.URLField(allow_null=True)
+    tickets = ListTicketPurchaseSerializer(many=True)
+    
+class CompTicketsSerializer(serializers.Serializer):
+    ticket = serializers.SlugRelatedField(queryset=Ticket.objects.all(), slug_field='sqid')
+    emails = serializers.ListField(child=serializers.CharField(max_length=254, allow_blank=True), allow_empty=False, max_length=COMP_MAX_EMAILS, help_text="Invalid addresses are reported back rather than failing the import")
+    
+class CompTicketsResultSerializer(serializers.Serializer):
+    payment_reference = serializers.CharField(allow_null=True, help_text="Shared by every ticket created by this import")
+    created = serializers.IntegerField()
+    already_registered = serializers.ListField(child=serializers.EmailField())
+    invalid = serializers.ListField(child=serializers.CharField())
+
@@ -0,0 +1,175 @@
+"""
+Recurring events.
+
+An EventSeries keeps its schedule as an RRULE and is never expanded up front.
+Listing occurrences runs the rule over the requested window only, and merges in
+the Event rows that already exist for it. An occurrence gets its Event row, with
+tickets copied from the series' templates, the first time someone wants to buy
+a ticket for it. After that it is an ordinary event: checkout, inventory,
+reminders and calendar sync all work on it unchanged.
+"""
+from django.conf import settings
+from django.db import transaction, IntegrityError
+from django.utils import timezone
+
+from rest_framework.exceptions import ValidationError
+
+from dateutil.rrule import rrulestr
+
+from .models import Event, EventSeries, Ticket, VirtualMeeting
+
+from datetime import datetime, timedelta, timezone as dt_timezone
+from functools import lru_cache
+
+# Widest window one listing may expand
+MAX_WINDOW = timedelta(days=getattr(settings, "EVENT_SERIES_MAX_WINDOW_DAYS", 366))
+DEFAULT_WINDOW = timedelta(days=getattr(settings, "EVENT_SERIES_DEFAULT_WINDOW_DAYS", 90))
+
+def first_start(series: EventSeries):
+    return timezone.make_aware(datetime.combine(series.dtstart, series.start_time))
+
+@lru_cache(maxsize=256)
+def _parse(rule, dtstart):
+    return rrulestr(rule, dtstart=dtstart)
+
+def parse_rule(rule, dtstart):
+    """
+    Raises ValueError for anything dateutil or Google would not accept.
+    """
+    if '\n' in rule or 'DTSTART' in rule.upper():
+        raise ValueError("Give a single RRULE; the start comes from dtstart and start_time")
+
+    # Rules without COUNT or UNTIL are fine, nothing expands them past a window
+    return _parse(rule, dtstart)
+
+class SeriesService:
+    @staticmethod
+    def rule(series: EventSeries):
+        return parse_rule(series.rrule, first_start(series))
+
+    @staticmethod
+    def window(start=None, end=None):
+        """
+        Turns optional start/end dates into an aware [start, end] range.
+        """
+        today = timezone.localdate()
+        start = start or today
+        end = end or start + DEFAULT_WINDOW
+
+        if end < start:
+            raise ValidationError({"end": "Must not be before start."})
+        if end - start > MAX_WINDOW:
+            raise ValidationError({"end": f"The window can span at most {MAX_WINDOW.days} days."})
+
+        return (
+            timezone.make_aware(datetime.combine(start, datetime.min.time())),
+            timezone.make_aware(datetime.combine(end, datetime.max.time())),
+        )
+
+    @staticmethod
+    def occurrences(series: EventSeries, start=None, end=None):
+        """
+        The occurrences starting within the window, with the Event for each one
+        that has been materialized.
+        """
+        window_start, window_end = SeriesService.window(start, end)
+        starts = SeriesService.rule(series).between(window_start, window_end, inc=True)
+
+        materialized = {
+            event.occurrence_date: event
+            for event in series.occurrences.filter(occurrence_date__gte=window_start.date(), occurrence_date__lte=window_end.date())
+        }
+
+        return [
+            {
+                'date': starts_at.date(),
+                'starts_at': starts_at,
+                'ends_at': starts_at + timedelta(minutes=series.duration_mins),
+                'event': materialized.get(starts_at.date()),
+            }
+            for starts_at in starts
+        ]
+
+    @staticmethod
+    def instance_id(series: EventSeries, starts_at):
+        """
+        Google's ID for one instance of the series' recurring event.
+        """
+        return f"{series.external_calendar_event_id}_{starts_at.astimezone(dt_timezone.utc):%Y%m%dT%H%M%SZ}"
+
+    @staticmethod
+    def materialize(series: EventSeries, occurrence_date):
+        """
+        Returns the Event for one occurrence, creating it and its tickets the
+        first time. Safe to call concurrently for the same date.
+        """
+        starts_at = timezone.make_aware(datetime.combine(occurrence_date, series.start_time))
+
+        if not SeriesService.rule(series).between(starts_at, starts_at, inc=True):
+            raise ValidationError({"date": "The series has no occurrence on this date."})
+
+        existing = series.occurrences.filter(occurrence_date=occurrence_date).first()
+        if existing:
+            return existing
+
+        if series.is_cancelled:
+            raise ValidationError({"date": "This series has been cancelled."})
+        if starts_at <= timezone.now():
+            raise ValidationError({"date": "This occurrence has already started."})
+
+        try:
+            with transaction.atomic():
+                return SeriesService._create_occurrence(series, occurrence_date, starts_at)
+        except IntegrityError:
+            # Someone else materialized it first
+            return series.occurrences.get(occurrence_date=occurrence_date)
+
+    @staticmethod
+    def _create_occurrence(series: EventSeries, occurrence_date, starts_at):
+        event = Event.objects.create(
+            series=series,
+            occurrence_date=occurrence_date,
+            creator_id=series.creator_id,
+            title=series.title,
+            description=series.description,
+            category=series.category,
+            mode=series.mode,
+            venue=series.venue,
+            date=occurrence_date,
+            start_time=series.start_time,
+            duration_mins=series.duration_mins,
+            max_capacity=series.max_capacity,
+            is_published=series.is_published,
+        )
+
+        # Sales shards are created on first use, so plain rows are enough here
+        Ticket.objects.bulk_create([
+            Ticket(
+                event=event,
+                name=template.name,
+                description=template.description,
+                price=template.price,
+                discount_perc=template.discount_perc,
+                quantity=template.quantity,
+                sales_shards=template.sales_shards,
+                type=template.type,
+            )
+            for template in series.tickets.all()
+        ])
+
+        if series.platform:
+            # Read under the series row lock, so an occurrence created while the series is
+            # being mirrored either gets the instance ID here or is backfilled by the mirror
+            series.external_calendar_event_id = EventSeries.objects.select_for_update(no_key=True).values_list(
+                'external_calendar_event_id', flat=True
+            ).get(pk=series.pk)
+
+            VirtualMeeting.objects.create(
+                event=event,
+                platform=series.platform,
+                join_url=series.join_url,
+                room_name=series.room_name,
+                external_calendar_event_id=SeriesService.instance_id(series, starts_at) if series.external_calendar_event_id else None,
+            )
+
+        return event
@@ -1,83 +1,301 @@
-from django.template.loader import render_to_string
 from django.conf import settings
 from django.utils import timezone
 from django.db import transaction
+from django.db.models import Q, Max
 
 from rest_framework.exceptions import PermissionDenied, ValidationError
 
-from .models import TicketPurchase, Event, VirtualMeeting
+from .models import TicketPurchase, Event, EventSeries, VirtualMeeting, OutboxMessage
+from .calendar_sync import CalendarSyncEngine
+from .analytics import SalesAnalytics
+from .series import SeriesService
+from . import outbox, qr
 from core.models import User
 
 from logging import getLogger
 from datetime import timedelta, datetime
 
-from futaverse.utils.email_service import BrevoEmailService
+from futaverse.utils.email_service import BrevoEmailService, MAX_MESSAGE_VERSIONS
+from futaverse.utils import email_templates
 from futaverse.utils.google.views import build_google_auth_url
+from futaverse.utils.google.calendar import calendar_client
+from futaverse.utils.google.credentials import CredentialManager
 
-from googleapiclient.discovery import build
 from googleapiclient.errors import HttpError
-from google.oauth2.credentials import Credentials
-from google.auth.transport.requests import Request
 
+import time
 import uuid
 
 logger = getLogger(__name__)
 mailer = BrevoEmailService()
 
+# A confirmation batch must be sent well within its lease, or a second run may send it again
+CONFIRMATION_LEASE = timedelta(seconds=getattr(settings, "TICKET_CONFIRMATION_LEASE_SECONDS", 300))
+CONFIRMATION_BATCH_SIZE = min(getattr(settings, "TICKET_CONFIRMATION_BATCH_SIZE", 200), MAX_MESSAGE_VERSIONS)
+
 class EventService:
     @staticmethod
-    def sync_to_calendar(event):
-        try:
-            virtual_meeting = getattr(event, 'virtual_meeting', None)
-            if not virtual_meeting:
-                return
+    def queue_ticket_side_effects(ticket_purchase):
+        """
+        Records the calendar sync and confirmation email for a paid purchase in the
+        outbox. Must be called inside the transaction that marks the purchase paid.
+        """
+        event: Event = ticket_purchase.ticket.event
+        
+        if event.mode in [Event.Mode.VIRTUAL, Event.Mode.HYBRID]:
+            CalendarSyncEngine.mark_dirty(event)
+            
+        # A plain INSERT, so concurrent purchases never wait on each other's message;
+        # the worker collapses everything queued for the event into one run
+        outbox.enqueue(OutboxMessage.Topic.TICKET_EMAIL, {"event_id": event.id})
+    
+    @staticmethod
+    def open_jitsi_meeting(event: Event):
+        """
+        Jitsi rooms need nothing from Google, so the meeting exists as soon as the
+        event does. Mirroring it onto the creator's Google Calendar happens later,
+        and only for creators who have linked Google.
+        """
+        room_name = f"App-{uuid.uuid4().hex}"
+        virtual_meeting = VirtualMeeting.objects.create(
+            event=event,
+            platform=VirtualMeeting.Platform.JITSI,
+            join_url=f"https://meet.jit.si/{room_name}",
+            room_name=room_name
+        )
+        
+        if (event.creator.google_credentials or {}).get('token'):
+            outbox.enqueue(OutboxMessage.Topic.CALENDAR_MIRROR, {"event_id": event.id}, dedupe_key=f"calendar_mirror_{event.id}")
+            
+        return virtual_meeting
+    
+    @staticmethod
+    def mirror_to_calendar(event_id):
+        """
+        Creates the Google Calendar event for a meeting that does not have one yet,
+        inviting everyone who has paid so far. Later purchases are picked up by
+        the usual attendee sync.
+        """
+        event = Event.objects.select_related('creator', 'virtual_meeting').filter(id=event_id).first()
+        virtual_meeting = getattr(event, 'virtual_meeting', None) if event else None
+        
+        if not virtual_meeting or virtual_meeting.external_calendar_event_id or event.is_cancelled:
+            return
+        
+        credentials = get_user_credentials(event.creator)
+        service = GoogleCalendarService(credentials, event.creator)
+        
+        purchases = list(TicketPurchase.objects.filter(ticket__event=event, is_paid=True).values_list('id', 'email'))
+        attendee_emails = list(dict.fromkeys([email for _, email in purchases] + [event.creator.email]))
+        
+        google_event = service.create_event(event, attendee_emails, manual_join_url=virtual_meeting.join_url)
+        
+        with transaction.atomic():
+            claimed = VirtualMeeting.objects.filter(pk=virtual_meeting.pk, external_calendar_event_id__isnull=True).update(
+                external_calendar_event_id=google_event.get('id')
+            )
+            
+            if claimed:
+                TicketPurchase.objects.filter(id__in=[purchase_id for purchase_id, _ in purchases]).update(calendar_synced=True)
+                
+                # Paid for while the event was being created
+                if TicketPurchase.objects.filter(ticket__event=event, is_paid=True, calendar_synced=False).exists():
+                    CalendarSyncEngine.mark_dirty(event)
+                    
+        if not claimed:
+            # The meeting was removed or mirrored by someone else in the meantime
+            service.delete_event(google_event.get('id'))
 
-            credentials = get_user_credentials(event.creator)
-            service = GoogleCalendarService(credentials)
+    @staticmethod
+    def open_jitsi_series(series: EventSeries):
+        """
+        Same as open_jitsi_meeting, for a whole series: the room is shared by
+        every occurrence, and the recurring Calendar event follows from the outbox.
+        """
+        series.room_name = f"App-{uuid.uuid4().hex}"
+        series.join_url = f"https://meet.jit.si/{series.room_name}"
+        series.save(update_fields=['join_url', 'room_name'])
 
-            all_emails = list(TicketPurchase.objects.filter(
-                ticket__event=event, 
-                is_paid=True
-            ).values_list('email', flat=True))
-            
-            if event.creator.email not in all_emails:
-                all_emails.append(event.creator.email)
+        if (series.creator.google_credentials or {}).get('token'):
+            outbox.enqueue(OutboxMessage.Topic.CALENDAR_MIRROR, {"series_id": series.id}, dedupe_key=f"calendar_mirror_series_{series.id}")
+
+    @staticmethod
+    def mirror_series_to_calendar(series_id):
+        """
+        Creates the recurring Google Calendar event for a series that does not have
+        one yet. Occurrences materialized before it existed are pointed at their
+        instances, and their paid attendees invited through the usual sync.
+        """
+        series = EventSeries.objects.select_related('creator').filter(id=series_id).first()
+
+        if not series or not series.join_url or series.external_calendar_event_id or series.is_cancelled:
+            return
 
-            service.add_attendee_to_event(
-                event_id=virtual_meeting.external_calendar_event_id,
-                new_attendee_emails=all_emails
+        credentials = get_user_credentials(series.creator)
+        service = GoogleCalendarService(credentials, series.creator)
+
+        google_event = service.create_recurring_event(series, [series.creator.email], manual_join_url=series.join_url)
+
+        with transaction.atomic():
+            claimed = EventSeries.objects.filter(pk=series.pk, external_calendar_event_id__isnull=True).update(
+                external_calendar_event_id=google_event.get('id')
             )
+
+            if claimed:
+                series.external_calendar_event_id = google_event.get('id')
+
+                unmirrored = VirtualMeeting.objects.select_related('event').select_for_update(of=('self',)).filter(
+                    event__series=series,
+                    external_calendar_event_id__isnull=True
+                )
+
+                for virtual_meeting in unmirrored:
+                    event = virtual_meeting.event
+                    starts_at = timezone.make_aware(datetime.combine(event.occurrence_date, event.start_time))
+                    virtual_meeting.external_calendar_event_id = SeriesService.instance_id(series, starts_at)
+                    virtual_meeting.save(update_fields=['external_calendar_event_id'])
+
+                    if TicketPurchase.objects.filter(ticket__event=event, is_paid=True, calendar_synced=False).exists():
+                        CalendarSyncEngine.mark_dirty(event)
+
+        if not claimed:
+            # The series was cancelled or mirrored by someone else in the meantime
+            service.delete_event(google_event.get('id'))
+
+    @staticmethod
+    def attendee_emails(event):
+        all_emails = list(TicketPurchase.objects.filter(
+            ticket__event=event, 
+            is_paid=True
+        ).values_list('email', flat=True))
+        
+        if event.creator.email not in all_emails:
+            all_emails.append(event.creator.email)
             
-        except Exception as e:
-            logger.error(f"Calendar sync failed: {e}")
+        return all_emails
 
     @staticmethod
-    def send_ticket_email(ticket_purchase):
-        event: Event = ticket_purchase.ticket.event
-        user_name = ticket_purchase.user.get_full_name() if ticket_purchase.user else ticket_purchase.email 
+    def ticket_email_context(event: Event):
         join_url = getattr(event, 'virtual_meeting', None).join_url if hasattr(event, 'virtual_meeting') else None
         start_datetime = timezone.make_aware(datetime.combine(event.date, event.start_time))
         
-        context = {
-            'user_name': user_name,
+        return {
             'event_title': event.title,
             'event_date': start_datetime.strftime('%B %d, %Y at %H:%M %p'),
             'event_location': "Virtual Meeting" if event.mode == "VIRTUAL" else event.venue, # TODO: Add location to event
-            'ticket_uid': str(ticket_purchase.ticket_uid),
             'join_url': join_url
         }
         
-        html_body = render_to_string('emails/ticket_confirmation.html', context)
+    @staticmethod
+    def ticket_email_params(ticket_purchase):
+        """
+        Per-recipient Brevo params. qr_code_url is always set: the template is
+        rendered once with placeholders, so it cannot fall back on its own.
+        """
+        user_name = ticket_purchase.user.get_full_name() if ticket_purchase.user else ticket_purchase.email 
+        ticket_uid = str(ticket_purchase.ticket_uid)
         
-        mailer.send(
-            subject=f"Confirmation: Your Ticket for {event.title}",
-            body=html_body,
-            recipient=ticket_purchase.email,
-            is_html=True
+        return {
+            'user_name': user_name,
+            'ticket_uid': ticket_uid,
+            'qr_code_url': ticket_purchase.qr_code_url or f"https://api.qrserver.com/v1/create-qr-code/?size=180x180&data={ticket_uid}",
+        }
+    
+    @staticmethod
+    def send_ticket_confirmations(event_id):
+        """
+        Emails every paid purchase of the event still waiting on its confirmation,
+        CONFIRMATION_BATCH_SIZE recipients per Brevo call. Each batch is leased
+        for CONFIRMATION_LEASE before its QR codes are uploaded and the email is
+        sent, so a concurrent run skips it. A failed send releases the lease and
+        raises for the outbox to retry. A batch whose run died is taken over once
+        its lease runs out, by the follow-up queued for that moment.
+        """
+        event = Event.all_objects.select_related('virtual_meeting').filter(id=event_id).first()
+        if not event:
+            return 0
+        
+        params = ['user_name', 'ticket_uid', 'qr_code_url']
+        html_body = email_templates.render_with_params('emails/ticket_confirmation.html', EventService.ticket_email_context(event), params)
+        waiting = TicketPurchase.objects.filter(ticket__event=event, is_paid=True, confirmation_sent_at__isnull=True)
+        sent = 0
+        
+        while True:
+            now = timezone.now()
+            
+            with transaction.atomic():
+                ids = list(
+                    waiting.select_for_update(skip_locked=True, of=('self',))
+                    .filter(Q(confirmation_claimed_until__isnull=True) | Q(confirmation_claimed_until__lte=now))
+                    .order_by('id')
+                    .values_list('id', flat=True)[:CONFIRMATION_BATCH_SIZE]
+                )
+                TicketPurchase.objects.filter(id__in=ids).update(confirmation_claimed_until=now + CONFIRMATION_LEASE)
+                
+            if not ids:
+                break
+            
+            purchases = list(TicketPurchase.objects.filter(id__in=ids).select_related('user').order_by('id'))
+            
+            try:
+                qr.ensure_qr_codes(purchases)
+                versions = [
+                    {"to": [{"email": purchase.email}], "params": EventService.ticket_email_params(purchase)}
+                    for purchase in purchases
+                ]
+                mailer.send_versions(f"Confirmation: Your Ticket for {event.title}", html_body, versions)
+                
+            except Exception:
+                TicketPurchase.objects.filter(id__in=ids, confirmation_sent_at__isnull=True).update(confirmation_claimed_until=None)
+                raise
+            
+            TicketPurchase.objects.filter(id__in=ids).update(confirmation_sent_at=timezone.now(), confirmation_claimed_until=None)
+            
+            sent += len(ids)
+            logger.info(f"Sent {len(ids)} ticket confirmation(s) for event {event.id} in one call")
+            
+            if len(ids) < CONFIRMATION_BATCH_SIZE:
+                break
+            
+        # Batches leased by another run: if that run is alive the follow-up finds
+        # them sent, and if it died the follow-up sends them
+        leased_until = waiting.filter(confirmation_claimed_until__gt=timezone.now()).aggregate(until=Max('confirmation_claimed_until'))['until']
+        if leased_until:
+            outbox.enqueue(OutboxMessage.Topic.TICKET_EMAIL, {"event_id": event.id}, delay=leased_until - timezone.now())
+            
+        return sent
+    
+    @staticmethod
+    def check_in(ticket_uid, user):
+        """
+        Admits a ticket with one conditional UPDATE on the ticket_uid index, so two
+        scans of the same ticket cannot both succeed. Returns (checked_in, purchase);
+        purchase is None when no paid or unpaid ticket for the user's events matches.
+        """
+        tickets = TicketPurchase.objects.filter(ticket_uid=ticket_uid, ticket__event__creator=user)
+        
+        with transaction.atomic():
+            checked_in = tickets.filter(is_paid=True, checked_in=False).update(checked_in=True, checked_in_at=timezone.now())
+
+            ticket_purchase = tickets.select_related('ticket').only(
+                'ticket_uid', 'email', 'is_paid', 'checked_in', 'checked_in_at', 'ticket__name', 'ticket__event_id'
+            ).first()
+            
+            if checked_in:
+                SalesAnalytics.record(ticket_purchase.ticket, at=ticket_purchase.checked_in_at, checked_in=1)
+
+        return bool(checked_in), ticket_purchase
+    
+    @staticmethod
+    def queue_event_update_emails(event, old_data):
+        # The campaign key stays the same across outbox retries, so a retry only reaches who was missed
+        outbox.enqueue(
+            OutboxMessage.Topic.EVENT_UPDATE_EMAIL,
+            {"event_id": event.id, "old_data": old_data, "campaign": f"schedule_update_{event.id}_{uuid.uuid4().hex}"}
         )
     
     @staticmethod
-    def send_event_update_emails(event, old_data):
+    def send_event_update_emails(event, old_data, campaign=None):
         attendee_emails = list(TicketPurchase.objects.filter(ticket__event=event, is_paid=True).values_list('email', flat=True).distinct())
 
         if not attendee_emails:
@@ -92,13 +310,14 @@ class EventService:
             'event_url': f"https://google.com" #TODO: Change later to actual event URL
         }
         
-        html_body = render_to_string('emails/event_schedule_update.html', context)
+        html_body = email_templates.render('emails/event_schedule_update.html', context)
         
         mailer.send_bulk(
             subject=f"SCHEDULE UPDATE: {event.title}",
             body=html_body,
             recipients=attendee_emails, 
-            is_html=True
+            is_html=True,
+            campaign=campaign
         )
         
     @staticmethod
@@ -108,10 +327,15 @@ class EventService:
         """
         print()
         if new_mode in [Event.Mode.VIRTUAL, Event.Mode.HYBRID]:
-            if not hasattr(event, 'virtual_meeting'):
+            if not hasattr(event, 'virtual_meeting') and platform == VirtualMeeting.Platform.JITSI:
+                with transaction.atomic():
+                    EventService.open_jitsi_meeting(event)
+                    CalendarSyncEngine.reset(event, synced=False)
+                    
+            elif not hasattr(event, 'virtual_meeting'):
                 try: 
                     credentials = get_user_credentials(user) # TODO: Add redirect after auth
-                    service = GoogleCalendarService(credentials)
+                    service = GoogleCalendarService(credentials, user)
                     
                 except GoogleAuthRequired as e:
                     raise PermissionDenied({
@@ -125,31 +349,24 @@ class EventService:
                 if user.email not in attendee_emails:
                     attendee_emails.append(user.email)
                 
-                if platform == VirtualMeeting.Platform.GOOGLE_MEET:
-                    room_name = None
-                    google_event = service.create_event(event, attendee_emails)
-                    join_url = google_event.get('hangoutLink')
-                    external_calendar_event_id = google_event.get('id')
-                    
-                if platform == VirtualMeeting.Platform.JITSI:
-                    room_name = f"App-{uuid.uuid4().hex}"
-                    join_url = f"https://meet.jit.si/{room_name}"
-                    google_event = service.create_event(event, attendee_emails, manual_join_url=join_url)
-                    external_calendar_event_id = google_event.get('id')
+                google_event = service.create_event(event, attendee_emails)
+                join_url = google_event.get('hangoutLink')
+                external_calendar_event_id = google_event.get('id')
                 
                 try:
                     with transaction.atomic():
-                        VirtualMeeting.objects.create(event=event, platform=platform, join_url=join_url, external_calendar_event_id=external_calendar_event_id, room_name=room_name)
+                        VirtualMeeting.objects.create(event=event, platform=platform, join_url=join_url, external_calendar_event_id=external_calendar_event_id)
+                        CalendarSyncEngine.reset(event, synced=True)
                 except Exception as e:  
                     service.delete_event(external_calendar_event_id)
                     logger.error(f"Failed to save VirtualMeeting to DB. Google Event rolled back: {e}")
                     raise
 
-        if new_mode == Event.Mode.PHYSICAL and hasattr(event, 'virtual_meeting'):
+        if new_mode == Event.Mode.PHYSICAL and hasattr(event, 'virtual_meeting') and event.virtual_meeting.external_calendar_event_id:
             try:
                 try: 
                     credentials = get_user_credentials(user) # TODO: Add redirect after auth
-                    service = GoogleCalendarService(credentials)
+                    service = GoogleCalendarService(credentials, user)
                     
                 except GoogleAuthRequired as e:
                     raise PermissionDenied({
@@ -162,14 +379,23 @@ class EventService:
             
             except Exception as e:
                 logger.error(f"Failed to delete Google Event during mode switch: {e}")
-            
+                
+        if new_mode == Event.Mode.PHYSICAL and hasattr(event, 'virtual_meeting'):
             with transaction.atomic(): 
                 event.venue = venue
                 event.save(update_fields=['venue'])
                 event.virtual_meeting.delete()
+                CalendarSyncEngine.reset(event, synced=False)
                 
     @staticmethod
-    def send_mode_change_email(event, old_mode, new_mode):
+    def queue_mode_change_email(event, old_mode, new_mode):
+        outbox.enqueue(
+            OutboxMessage.Topic.EVENT_MODE_EMAIL,
+            {"event_id": event.id, "old_mode": old_mode, "new_mode": new_mode, "campaign": f"mode_change_{event.id}_{uuid.uuid4().hex}"}
+        )
+    
+    @staticmethod
+    def send_mode_change_email(event, old_mode, new_mode, campaign=None):
         print("Sending mode change email...")
         attendee_emails = list(TicketPurchase.objects.filter(ticket__event=event, is_paid=True).values_list('email', flat=True).distinct())
 
@@ -185,13 +411,14 @@ class EventService:
             'event_url': f"https://google.com" #TODO: Change later to actual event URL
         }
         
-        html_body = render_to_string('emails/event_mode_change.html', context)
+        html_body = email_templates.render('emails/event_mode_change.html', context)
         
         mailer.send_bulk(
             subject=f"Format Change: {event.title}",
             body=html_body,
             recipients=attendee_emails,
-            is_html=True
+            is_html=True,
+            campaign=campaign
         )
     
 class GoogleAuthRequired(Exception):
@@ -199,15 +426,23 @@ class GoogleAuthRequired(Exception):
         self.auth_url = auth_url
         
 class GoogleCalendarService:
-    def __init__(self, credentials):
-        self.service = build("calendar", "v3", credentials=credentials)
-
-    def create_event(self, event: Event, attendees_emails, manual_join_url=None):
+    def __init__(self, credentials, user=None):
+        # Pass the user to reuse their cached client instead of building a new one
+        client = calendar_client(credentials, user.id if user else None)
+        self.service = client.service
+        self.events = client.events
         
-        start_datetime = timezone.make_aware(datetime.combine(event.date, event.start_time))
+    def batch(self, retries=2):
+        return CalendarBatch(self, retries=retries)
+    
+    def event_body(self, event, start_date, attendees_emails, manual_join_url=None):
+        """
+        Insert body for an Event, or for an EventSeries starting on its dtstart.
+        """
+        start_datetime = timezone.make_aware(datetime.combine(start_date, event.start_time))
         end_datetime = start_datetime + timedelta(minutes=event.duration_mins)
         
-        body = {
+        return {
             'summary': event.title,
             'description': f"Join Meeting: {manual_join_url}\n\n{event.description}" if manual_join_url else event.description,
             'start': {
@@ -233,41 +468,42 @@ class GoogleCalendarService:
                     }
                 }
             }
-
-        try:
-            return self.service.events().insert(
-                calendarId='primary',
-                body=body,
-                conferenceDataVersion=1 if not manual_join_url else 0,
-                sendUpdates='all'        
-            ).execute()
-            
-        except HttpError as e:
-            logger.error(f"Google Calendar Create Error: {e}")
-            raise 
+    
+    def create_event_request(self, event: Event, attendees_emails, manual_join_url=None):
+        return self.events.insert(
+            calendarId='primary',
+            body=self.event_body(event, event.date, attendees_emails, manual_join_url),
+            conferenceDataVersion=1 if not manual_join_url else 0,
+            sendUpdates='all'        
+        )
         
-    def add_attendee_to_event(self, event_id, new_attendee_emails):
+    def create_recurring_event_request(self, series: EventSeries, attendees_emails, manual_join_url=None):
         """
-        event_id: The external_calendar_event_id
-        new_attendee_emails: List of current + new attendee emails
+        One recurring event for the whole series. Occurrences are addressed as
+        instances of it, see SeriesService.instance_id.
         """
-        try:
-            body = {
-                'attendees': [{'email': email} for email in new_attendee_emails]
-            }
-
-            return self.service.events().patch(
-                calendarId='primary',
-                eventId=event_id,
-                body=body,
-                sendUpdates='all'  
-            ).execute()
-            
-        except HttpError as e:
-            logger.error(f"Error patching calendar attendees: {e}")
-            return None
+        body = self.event_body(series, series.dtstart, attendees_emails, manual_join_url)
+        body['recurrence'] = [f"RRULE:{series.rrule}"]
         
-    def update_event_details(self, event: Event, changes, manual_join_url=None):
+        return self.events.insert(
+            calendarId='primary',
+            body=body,
+            conferenceDataVersion=1 if not manual_join_url else 0,
+            sendUpdates='all'
+        )
+        
+    def attendees_request(self, event_id, attendee_emails):
+        return self.events.patch(
+            calendarId='primary',
+            eventId=event_id,
+            body={'attendees': [{'email': email} for email in attendee_emails]},
+            sendUpdates='all'  
+        )
+        
+    def update_event_request(self, event: Event, changes, manual_join_url=None):
+        """
+        Returns None when none of the changes are mirrored on the calendar.
+        """
         body = {}
         
         date_fields = ['date', 'start_time', 'duration_mins']
@@ -294,16 +530,56 @@ class GoogleCalendarService:
         if body == {}:
             return None 
         
+        return self.events.patch(
+            calendarId='primary',
+            eventId=event.virtual_meeting.external_calendar_event_id,
+            body=body,
+            conferenceDataVersion=1,
+            sendUpdates='all' 
+        )
+        
+    def delete_event_request(self, event_id):
+        return self.events.delete(
+            calendarId='primary',
+            eventId=event_id,
+            sendUpdates='all' 
+        )
+
+    def create_event(self, event: Event, attendees_emails, manual_join_url=None):
         try:
-            external_id = event.virtual_meeting.external_calendar_event_id
+            return self.create_event_request(event, attendees_emails, manual_join_url).execute()
             
-            return self.service.events().patch(
-                calendarId='primary',
-                eventId=external_id,
-                body=body,
-                conferenceDataVersion=1,
-                sendUpdates='all' 
-            ).execute()
+        except HttpError as e:
+            logger.error(f"Google Calendar Create Error: {e}")
+            raise 
+        
+    def create_recurring_event(self, series: EventSeries, attendees_emails, manual_join_url=None):
+        try:
+            return self.create_recurring_event_request(series, attendees_emails, manual_join_url).execute()
+            
+        except HttpError as e:
+            logger.error(f"Google Calendar Create Error: {e}")
+            raise
+        
+    def add_attendee_to_event(self, event_id, new_attendee_emails):
+        """
+        event_id: The external_calendar_event_id
+        new_attendee_emails: List of current + new attendee emails
+        """
+        try:
+            return self.attendees_request(event_id, new_attendee_emails).execute()
+            
+        except HttpError as e:
+            logger.error(f"Error patching calendar attendees: {e}")
+            raise
+        
+    def update_event_details(self, event: Event, changes, manual_join_url=None):
+        request = self.update_event_request(event, changes, manual_join_url)
+        if request is None:
+            return None
+        
+        try:
+            return request.execute()
             
         except HttpError as e:
             logger.error(f"Google Calendar Update Error: {e}")
@@ -314,11 +590,7 @@ class GoogleCalendarService:
         Deletes an event from the user's primary calendar.
         """
         try:
-            self.service.events().delete(
-                calendarId='primary',
-                eventId=event_id,
-                sendUpdates='all' 
-            ).execute()
+            self.delete_event_request(event_id).execute()
             return True
         
         except HttpError as e:
@@ -329,34 +601,181 @@ class GoogleCalendarService:
             logger.error(f"Google Calendar Delete Error: {e}")
             raise
         
-def get_user_credentials(user: User, redirect_after_auth=None):
-    creds_data = user.google_credentials
-    google_auth_url = build_google_auth_url(user.sqid, redirect_after_auth)
-    
-    if not creds_data or not creds_data.get('token'):
-        print("no creds")
-        raise GoogleAuthRequired(google_auth_url)
+class CalendarOperationError(Exception):
+    RETRYABLE_STATUSES = {429, 500, 502, 503, 504}
+    RATE_LIMIT_REASONS = {'rateLimitExceeded', 'userRateLimitExceeded'}
     
-    credentials = Credentials.from_authorized_user_info(creds_data)
+    def __init__(self, message, status=None, reason=None):
+        super().__init__(message)
+        self.status = status
+        self.reason = reason
+        
+    @property
+    def retryable(self):
+        if self.status is None:
+            return True
+        return self.status in self.RETRYABLE_STATUSES or (self.status == 403 and self.reason in self.RATE_LIMIT_REASONS)
+        
+    @classmethod
+    def from_exception(cls, exception):
+        if not isinstance(exception, HttpError):
+            return cls(str(exception))
+        
+        details = exception.error_details if isinstance(exception.error_details, list) else []
+        reason = next((detail.get('reason') for detail in details if isinstance(detail, dict)), None)
+        return cls(str(exception), status=exception.resp.status, reason=reason)
     
-    if not credentials.expired:
-        return credentials
+class CalendarOperation:
+    def __init__(self, request, callback=None, ignore_statuses=()):
+        self.request = request
+        self.callback = callback
+        self.ignore_statuses = set(ignore_statuses)
+        self.response = None
+        self.error = None
+        
+    def finish(self, response, error):
+        self.response = response
+        self.error = error
+        if self.callback:
+            self.callback(response, error)
+        
+class CalendarBatch:
+    """
+    Queues Calendar operations and sends them through googleapiclient's
+    BatchHttpRequest, LIMIT per HTTP call, instead of one round trip each.
 
-    if credentials.expired and credentials.refresh_token:
-        try:
-            credentials.refresh(Request())
+    Every operation's callback receives (response, error), where error is a
+    CalendarOperationError or None, exactly once. Rate-limit and 5xx failures
+    are re-sent in a later batch up to `retries` times; other failures are
+    reported straight away. A callback that raises does not stop the others
+    from running; execute() raises its error once every operation is reported.
+    Used as a context manager, the queue is flushed on a clean exit.
+    """
+    LIMIT = 50
+    RETRY_DELAY_SECONDS = 1
+    
+    def __init__(self, calendar: GoogleCalendarService, retries=2):
+        self.calendar = calendar
+        self.retries = retries
+        self.operations = []
+        self._queue = []
+        self._callback_errors = []
+        
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.execute()
             
-            user.google_credentials = {
-                **creds_data,
-                'token': credentials.token,
-                'refresh_token': credentials.refresh_token
-            }
-            user.save(update_fields=['google_credentials'])
+    @property
+    def errors(self):
+        return [operation.error for operation in self.operations if operation.error is not None]
+        
+    def add(self, request, callback=None, ignore_statuses=()):
+        operation = CalendarOperation(request, callback, ignore_statuses)
+        self._queue.append(operation)
+        self.operations.append(operation)
+        return operation
+    
+    def create_event(self, event: Event, attendees_emails, manual_join_url=None, callback=None):
+        return self.add(self.calendar.create_event_request(event, attendees_emails, manual_join_url), callback)
+    
+    def add_attendees(self, event_id, attendee_emails, callback=None):
+        return self.add(self.calendar.attendees_request(event_id, attendee_emails), callback)
+    
+    def update_event_details(self, event: Event, changes, manual_join_url=None, callback=None):
+        request = self.calendar.update_event_request(event, changes, manual_join_url)
+        if request is None:
+            return None
+        return self.add(request, callback)
+    
+    def delete_event(self, event_id, callback=None):
+        # Already gone counts as deleted
+        return self.add(self.calendar.delete_event_request(event_id), callback, ignore_statuses=(404, 410))
+    
+    def execute(self):
+        """
+        Sends everything queued and returns the operations that failed.
+        """
+        pending, self._queue = self._queue, []
+        attempt = 0
+        
+        while pending:
+            final = attempt >= self.retries
+            retry = []
             
-            return credentials
+            for start in range(0, len(pending), self.LIMIT):
+                retry.extend(self._send(pending[start:start + self.LIMIT], final))
+                
+            if not retry:
+                break
+            
+            attempt += 1
+            logger.warning(f"Retrying {len(retry)} Google Calendar operation(s), attempt {attempt}")
+            time.sleep(self.RETRY_DELAY_SECONDS * 2 ** (attempt - 1))
+            pending = retry
+            
+        if self._callback_errors:
+            error, self._callback_errors = self._callback_errors[0], []
+            raise error
+            
+        return [operation for operation in self.operations if operation.error is not None]
+    
+    def _send(self, operations, final):
+        retry = []
+        # Finished or queued for a retry; either way reported for this send
+        handled = set()
         
-        except Exception as e:
-            logger.error(f"Refresh token failed for {user.email}: {e}")
-            raise GoogleAuthRequired(google_auth_url)
+        def on_response(request_id, response, exception):
+            index = int(request_id)
+            if index in handled:
+                return
+            handled.add(index)
+            
+            operation = operations[index]
+            error = CalendarOperationError.from_exception(exception) if exception is not None else None
             
-    raise GoogleAuthRequired(google_auth_url)
\ No newline at end of file
+            if error and error.status in operation.ignore_statuses:
+                response, error = None, None
+                
+            if error and error.retryable and not final:
+                retry.append(operation)
+                return
+            
+            if error:
+                logger.error(f"Google Calendar batch operation failed: {error}")
+                
+            try:
+                operation.finish(response, error)
+            except Exception as e:
+                self._callback_errors.append(e)
+            
+        if len(operations) == 1:
+            # A batch of one costs more than the plain request
+            try:
+                on_response("0", operations[0].request.execute(), None)
+            except Exception as e:
+                on_response("0", None, e)
+            return retry
+        
+        batch = self.calendar.service.new_batch_http_request(callback=on_response)
+        for i, operation in enumerate(operations):
+            batch.add(operation.request, request_id=str(i))
+            
+        try:
+            batch.execute()
+        except Exception as e:
+            # The batch itself failed before reaching these operations' callbacks
+            for i in range(len(operations)):
+                on_response(str(i), None, e)
+                
+        return retry
+        
+def get_user_credentials(user: User, redirect_after_auth=None):
+    credentials = CredentialManager.get(user)
+    
+    if credentials is None:
+        raise GoogleAuthRequired(build_google_auth_url(user.sqid, redirect_after_auth))
+    
+    return credentials
@@ -0,0 +1,71 @@
+from .models import Event, TicketPurchase, OutboxMessage
+from .outbox import handles, collapse
+from .calendar_sync import CalendarSyncEngine
+from .reminders import ReminderEngine
+from .waitlist import WaitlistService
+from .services import EventService, GoogleAuthRequired
+
+from logging import getLogger
+
+logger = getLogger(__name__)
+
+@handles(OutboxMessage.Topic.CALENDAR_SYNC)
+def sync_calendar(payload):
+    try:
+        CalendarSyncEngine.flush_from_payload(payload)
+    except GoogleAuthRequired:
+        # Retrying cannot help until the creator re-links Google
+        logger.warning(f"Skipping calendar sync for event {payload['event_id']}: creator is not authenticated with Google")
+
+@handles(OutboxMessage.Topic.CALENDAR_MIRROR)
+def mirror_to_calendar(payload):
+    try:
+        if "series_id" in payload:
+            EventService.mirror_series_to_calendar(payload["series_id"])
+        else:
+            EventService.mirror_to_calendar(payload["event_id"])
+    except GoogleAuthRequired:
+        # Mirroring is optional; the meeting works without it
+        logger.info(f"Not mirroring {payload} to Google Calendar: creator is not authenticated with Google")
+
+@handles(OutboxMessage.Topic.TICKET_EMAIL)
+def send_ticket_email(payload):
+    event_id = payload.get("event_id")
+
+    if event_id is None:
+        # Per-purchase messages queued before confirmations were batched
+        event_id = TicketPurchase.all_objects.filter(id=payload["ticket_purchase_id"]).values_list('ticket__event_id', flat=True).first()
+        if event_id is None:
+            return
+
+    # One run confirms every purchase of the event, so the other queued messages are redundant
+    collapse(OutboxMessage.Topic.TICKET_EMAIL, event_id=event_id)
+    EventService.send_ticket_confirmations(event_id)
+
+@handles(OutboxMessage.Topic.EVENT_UPDATE_EMAIL)
+def send_event_update_emails(payload):
+    event = Event.objects.filter(id=payload["event_id"]).first()
+    if not event:
+        return
+
+    EventService.send_event_update_emails(event, payload["old_data"], campaign=payload["campaign"])
+
+@handles(OutboxMessage.Topic.EVENT_MODE_EMAIL)
+def send_mode_change_email(payload):
+    event = Event.objects.select_related('virtual_meeting').filter(id=payload["event_id"]).first()
+    if not event:
+        return
+
+    EventService.send_mode_change_email(event, payload["old_mode"], payload["new_mode"], campaign=payload["campaign"])
+
+@handles(OutboxMessage.Topic.EVENT_REMINDER)
+def send_event_reminder(payload):
+    ReminderEngine.send(payload["reminder_id"])
+
+@handles(OutboxMessage.Topic.WAITLIST_PROMOTION)
+def promote_waitlist(payload):
+    WaitlistService.promote(payload["ticket_id"])
+
+@handles(OutboxMessage.Topic.WAITLIST_OFFER_EMAIL)
+def send_waitlist_offers(payload):
+    WaitlistService.send_offers(payload["entry_ids"])
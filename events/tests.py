@@ -1,3 +1,636 @@
-from django.test import TestCase
+from django.db import connection, transaction
+from django.test import SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.utils import timezone
 
-# Create your tests here.
+from googleapiclient.discovery import build_from_document
+
+from core.models import User
+
+from .models import Event, Ticket, TicketPurchase, TicketReservation, TicketSalesShard, OutboxMessage
+from .inventory import InventoryService, TicketSoldOut, EventFull
+from .comps import CompService
+from . import outbox
+from .services import GoogleCalendarService, CalendarBatch
+
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from datetime import date, time, timedelta
+from decimal import Decimal
+from pathlib import Path
+from types import SimpleNamespace
+from unittest import mock
+
+import googleapiclient
+import httplib2
+import json
+import re
+import threading
+
+DISCOVERY_DOCUMENT = Path(googleapiclient.__file__).parent / "discovery_cache" / "documents" / "calendar.v3.json"
+
+REASONS = {200: "OK", 204: "No Content", 400: "Bad Request", 403: "Forbidden", 404: "Not Found", 410: "Gone", 429: "Too Many Requests", 500: "Internal Server Error", 503: "Service Unavailable"}
+
+class FakeCalendar(BaseHTTPRequestHandler):
+    """
+    Answers Calendar API calls, singly or inside a /batch envelope. Each event ID
+    is given a script of statuses (see FakeCalendarServer.script); calls beyond
+    the end of the script get the last status again, and unscripted IDs succeed.
+    """
+    def log_message(self, *args):
+        pass
+
+    def _read_body(self):
+        return self.rfile.read(int(self.headers.get("Content-Length") or 0)).decode()
+
+    def _respond(self, method, path):
+        event_id = re.search(r"/events/([^/?]+)", path)
+        event_id = event_id.group(1) if event_id else None
+
+        server = self.server
+        with server.lock:
+            server.calls.append((method, event_id))
+            attempt = sum(1 for _, called in server.calls if called == event_id) - 1
+
+        statuses = server.scripts.get(event_id) or [204 if method == "DELETE" else 200]
+        status = statuses[min(attempt, len(statuses) - 1)]
+
+        if status == 204:
+            return status, ""
+        if status >= 300:
+            reason = "rateLimitExceeded" if status == 403 else "backendError"
+            return status, json.dumps({"error": {"code": status, "message": REASONS[status], "errors": [{"reason": reason}]}})
+        return status, json.dumps({"id": event_id, "status": "confirmed"})
+
+    def _send(self, status, content_type, body):
+        payload = body.encode()
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def _single(self):
+        self._read_body()
+        status, body = self._respond(self.command, self.path)
+        self._send(status, "application/json", body)
+
+    do_PATCH = do_DELETE = _single
+
+    def do_POST(self):
+        if not self.path.startswith("/batch"):
+            return self._single()
+
+        body = self._read_body()
+        with self.server.lock:
+            self.server.batch_sizes.append(0)
+
+        if self.server.fail_batches:
+            return self._send(503, "application/json", json.dumps({"error": {"code": 503, "message": "Unavailable"}}))
+
+        boundary = re.search(r'boundary="?([^";]+)', self.headers["Content-Type"]).group(1)
+        parts = [part for part in body.split(f"--{boundary}") if part.strip() and part.strip() != "--"]
+        self.server.batch_sizes[-1] = len(parts)
+
+        responses = []
+        for part in parts:
+            content_id = re.search(r"Content-ID: <([^>]+)>", part, re.I).group(1)
+            request_line = re.split(r"\r?\n\r?\n", part, maxsplit=1)[1].strip().splitlines()[0]
+            method, path = request_line.split()[:2]
+
+            status, content = self._respond(method, path)
+            responses.append(
+                f"--RESPONSE\r\nContent-Type: application/http\r\nContent-ID: <response-{content_id}>\r\n\r\n"
+                f"HTTP/1.1 {status} {REASONS[status]}\r\nContent-Type: application/json\r\nContent-Length: {len(content)}\r\n\r\n{content}\r\n"
+            )
+
+        self._send(200, "multipart/mixed; boundary=RESPONSE", "".join(responses) + "--RESPONSE--\r\n")
+
+class FakeCalendarServer(ThreadingHTTPServer):
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), FakeCalendar)
+        self.lock = threading.Lock()
+        self.calls = []
+        self.batch_sizes = []
+        self.scripts = {}
+        self.fail_batches = False
+
+    def script(self, event_id, *statuses):
+        self.scripts[event_id] = list(statuses)
+
+    def attempts(self, event_id):
+        return sum(1 for _, called in self.calls if called == event_id)
+
+class CalendarBatchTests(SimpleTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.server = FakeCalendarServer()
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+
+        document = json.loads(DISCOVERY_DOCUMENT.read_text())
+        document["rootUrl"] = f"http://127.0.0.1:{cls.server.server_port}/"
+        cls.document = document
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+        super().tearDownClass()
+
+    def setUp(self):
+        self.server.calls.clear()
+        self.server.batch_sizes.clear()
+        self.server.scripts.clear()
+        self.server.fail_batches = False
+
+        service = build_from_document(self.document, http=httplib2.Http())
+        client = SimpleNamespace(service=service, events=service.events())
+
+        with mock.patch("events.services.calendar_client", return_value=client):
+            self.calendar = GoogleCalendarService(credentials=None)
+
+        no_delay = mock.patch.object(CalendarBatch, "RETRY_DELAY_SECONDS", 0)
+        no_delay.start()
+        self.addCleanup(no_delay.stop)
+
+        self.results = {}
+
+    def record(self, key):
+        def callback(response, error):
+            self.results.setdefault(key, []).append((response, error))
+        return callback
+
+    def test_splits_operations_into_batches_of_fifty(self):
+        with self.calendar.batch() as batch:
+            for i in range(120):
+                batch.add_attendees(f"event{i}", ["a@example.com"], callback=self.record(i))
+
+        self.assertEqual(self.server.batch_sizes, [50, 50, 20])
+        self.assertEqual(len(self.results), 120)
+        self.assertTrue(all(len(calls) == 1 and calls[0][1] is None for calls in self.results.values()))
+        self.assertEqual(self.results[0][0][0]["id"], "event0")
+
+    def test_single_operation_skips_the_batch_envelope(self):
+        batch = self.calendar.batch()
+        batch.add_attendees("event1", ["a@example.com"], callback=self.record("event1"))
+
+        self.assertEqual(batch.execute(), [])
+        self.assertEqual(self.server.batch_sizes, [])
+        self.assertEqual(self.server.calls, [("PATCH", "event1")])
+
+    def test_retries_rate_limits_and_server_errors(self):
+        self.server.script("limited", 429, 200)
+        self.server.script("quota", 403, 200)
+        self.server.script("flaky", 503, 500, 200)
+        self.server.script("down", 503)
+        self.server.script("invalid", 400)
+
+        batch = self.calendar.batch(retries=2)
+        for event_id in ["limited", "quota", "flaky", "down", "invalid", "fine"]:
+            batch.add_attendees(event_id, ["a@example.com"], callback=self.record(event_id))
+        failed = batch.execute()
+
+        for event_id in ["limited", "quota", "flaky", "fine"]:
+            self.assertEqual([error for _, error in self.results[event_id]], [None], event_id)
+
+        self.assertEqual(self.server.attempts("limited"), 2)
+        self.assertEqual(self.server.attempts("quota"), 2)
+        self.assertEqual(self.server.attempts("flaky"), 3)
+
+        # Retries give up after the last attempt; other client errors are not retried
+        self.assertEqual(self.server.attempts("down"), 3)
+        self.assertEqual(self.results["down"][0][1].status, 503)
+        self.assertEqual(self.server.attempts("invalid"), 1)
+        self.assertFalse(self.results["invalid"][0][1].retryable)
+
+        self.assertEqual(sorted(operation.error.status for operation in failed), [400, 503])
+
+    def test_delete_of_a_missing_event_counts_as_success(self):
+        self.server.script("gone404", 404)
+        self.server.script("gone410", 410)
+        self.server.script("patch404", 404)
+
+        batch = self.calendar.batch()
+        batch.delete_event("gone404", callback=self.record("gone404"))
+        batch.delete_event("gone410", callback=self.record("gone410"))
+        batch.delete_event("deleted", callback=self.record("deleted"))
+        batch.add_attendees("patch404", ["a@example.com"], callback=self.record("patch404"))
+        failed = batch.execute()
+
+        for event_id in ["gone404", "gone410", "deleted"]:
+            self.assertEqual([error for _, error in self.results[event_id]], [None], event_id)
+
+        # Only deletes ignore a missing event
+        self.assertEqual(self.results["patch404"][0][1].status, 404)
+        self.assertEqual([operation.error.status for operation in failed], [404])
+
+    def test_failed_batch_reports_each_operation_once(self):
+        self.server.fail_batches = True
+
+        batch = self.calendar.batch(retries=1)
+        for event_id in ["first", "second"]:
+            batch.add_attendees(event_id, ["a@example.com"], callback=self.record(event_id))
+        failed = batch.execute()
+
+        self.assertEqual(len(self.server.batch_sizes), 2)
+        self.assertEqual(len(failed), 2)
+        for event_id in ["first", "second"]:
+            self.assertEqual(len(self.results[event_id]), 1)
+            self.assertEqual(self.results[event_id][0][1].status, 503)
+
+    def test_raising_callback_does_not_report_other_operations_twice(self):
+        def broken(response, error):
+            self.record("broken")(response, error)
+            raise RuntimeError("callback failed")
+
+        batch = self.calendar.batch()
+        batch.add_attendees("broken", ["a@example.com"], callback=broken)
+        batch.add_attendees("after", ["a@example.com"], callback=self.record("after"))
+
+        with self.assertRaises(RuntimeError):
+            batch.execute()
+
+        self.assertEqual(self.results["broken"], [({"id": "broken", "status": "confirmed"}, None)])
+        self.assertEqual(self.results["after"], [({"id": "after", "status": "confirmed"}, None)])
+        self.assertEqual(len(self.server.calls), 2)
+
+class InventoryTests(TestCase):
+    def setUp(self):
+        self.creator = User.objects.create(email="host@example.com", role="Alumni")
+        self.event = Event.objects.create(
+            creator=self.creator, title="Launch", description="d", category=Event.Category.TALK,
+            mode=Event.Mode.PHYSICAL, date=date.today() + timedelta(days=30), start_time=time(18)
+        )
+
+    def ticket(self, quantity=None, sales_shards=4, price=0, type=Ticket.Type.CUSTOM):
+        return Ticket.objects.create(event=self.event, name="General", price=price, quantity=quantity, sales_shards=sales_shards, type=type)
+
+    def purchase(self, ticket, email="buyer@example.com"):
+        return TicketPurchase.objects.create(ticket=ticket, email=email)
+
+    def seats_taken(self):
+        return Event.all_objects.values_list('seats_taken', flat=True).get(pk=self.event.pk)
+
+    def assertShardsWithinCapacity(self, ticket):
+        for capacity, sold, held in TicketSalesShard.objects.filter(ticket=ticket).values_list('capacity', 'sold', 'held'):
+            self.assertTrue(capacity is None or sold + held <= capacity, (capacity, sold, held))
+
+    def test_never_sells_beyond_quantity(self):
+        ticket = self.ticket(quantity=5, sales_shards=3)
+
+        # Whichever shard is tried first, full shards fall back to the others until all 5 are gone
+        for _ in range(5):
+            InventoryService.sell(ticket)
+
+        with self.assertRaises(TicketSoldOut), transaction.atomic():
+            InventoryService.sell(ticket)
+
+        self.assertEqual(InventoryService.totals(ticket), {"sold": 5, "held": 0})
+        self.assertShardsWithinCapacity(ticket)
+
+    def test_held_seats_are_not_sold(self):
+        ticket = self.ticket(quantity=2, sales_shards=1)
+        InventoryService.hold(ticket)
+        InventoryService.hold(ticket)
+
+        with self.assertRaises(TicketSoldOut), transaction.atomic():
+            InventoryService.sell(ticket)
+
+        self.assertEqual(InventoryService.totals(ticket), {"sold": 0, "held": 2})
+
+    def test_group_larger_than_any_shard_is_split_across_them(self):
+        ticket = self.ticket(quantity=8, sales_shards=4)
+
+        seats = InventoryService.take_group({ticket: 7}, 'sold')
+
+        self.assertEqual(len(seats[ticket.id]), 7)
+        self.assertEqual(InventoryService.totals(ticket)["sold"], 7)
+        self.assertShardsWithinCapacity(ticket)
+
+    def test_group_that_does_not_fit_takes_nothing(self):
+        first, second = self.ticket(quantity=3), self.ticket(quantity=1)
+
+        with self.assertRaises(TicketSoldOut), transaction.atomic():
+            InventoryService.take_group({first: 2, second: 2}, 'sold')
+
+        self.assertEqual(InventoryService.totals(first), {"sold": 0, "held": 0})
+        self.assertEqual(InventoryService.totals(second), {"sold": 0, "held": 0})
+
+    def test_never_sells_beyond_max_capacity(self):
+        general, vip = self.ticket(), self.ticket()
+        InventoryService.set_capacity(self.event, 3)
+
+        InventoryService.sell(general, 2)
+        InventoryService.hold(vip)
+
+        with self.assertRaises(EventFull), transaction.atomic():
+            InventoryService.sell(vip)
+
+        # The shard taken before the ledger refused is rolled back with it
+        self.assertEqual(InventoryService.totals(vip), {"sold": 0, "held": 1})
+        self.assertEqual(self.seats_taken(), 3)
+
+    def test_set_capacity_recounts_the_ledger(self):
+        ticket = self.ticket()
+        InventoryService.sell(ticket, 2)
+        InventoryService.hold(ticket)
+
+        # Uncapped events keep no ledger, so the count starts when a cap is set
+        self.assertEqual(self.seats_taken(), 0)
+        self.assertEqual(InventoryService.set_capacity(self.event, 10), 3)
+        self.assertEqual(self.seats_taken(), 3)
+
+        with self.assertRaises(EventFull), transaction.atomic():
+            InventoryService.set_capacity(self.event, 2)
+
+        self.assertEqual(Event.all_objects.values_list('max_capacity', flat=True).get(pk=self.event.pk), 10)
+
+    def test_release_returns_the_seat_to_the_shard_and_the_ledger(self):
+        ticket = self.ticket(quantity=1)
+        InventoryService.set_capacity(self.event, 1)
+
+        reservation = InventoryService.reserve(self.purchase(ticket))
+        self.assertEqual(InventoryService.totals(ticket), {"sold": 0, "held": 1})
+        self.assertEqual(self.seats_taken(), 1)
+
+        self.assertTrue(InventoryService.release(reservation))
+        self.assertFalse(InventoryService.release(reservation))
+
+        self.assertEqual(InventoryService.totals(ticket), {"sold": 0, "held": 0})
+        self.assertEqual(self.seats_taken(), 0)
+
+        # The freed seat can be sold again
+        InventoryService.sell(ticket)
+        self.assertEqual(InventoryService.totals(ticket)["sold"], 1)
+
+    def test_release_expired_only_returns_lapsed_holds(self):
+        ticket = self.ticket(quantity=5)
+        InventoryService.set_capacity(self.event, 5)
+
+        lapsed = InventoryService.reserve(self.purchase(ticket, "lapsed@example.com"))
+        InventoryService.reserve(self.purchase(ticket, "active@example.com"))
+        TicketReservation.objects.filter(pk=lapsed.pk).update(expires_at=timezone.now() - timedelta(minutes=1))
+
+        self.assertEqual(InventoryService.release_expired(), 1)
+        self.assertEqual(InventoryService.release_expired(), 0)
+
+        self.assertEqual(TicketReservation.objects.get(pk=lapsed.pk).status, TicketReservation.Status.RELEASED)
+        self.assertEqual(InventoryService.totals(ticket), {"sold": 0, "held": 1})
+        self.assertEqual(self.seats_taken(), 1)
+
+    def test_confirm_many_sells_held_seats_without_counting_them_again(self):
+        ticket = self.ticket(quantity=3)
+        InventoryService.set_capacity(self.event, 3)
+
+        purchases = [self.purchase(ticket, f"buyer{i}@example.com") for i in range(3)]
+        reservations = [InventoryService.reserve(purchase) for purchase in purchases]
+
+        # A lapsed hold is sold afresh, from the seat its release gave back
+        InventoryService.release(reservations[0])
+        InventoryService.confirm_many(purchases)
+
+        self.assertEqual(InventoryService.totals(ticket), {"sold": 3, "held": 0})
+        self.assertEqual(self.seats_taken(), 3)
+        self.assertEqual(TicketReservation.objects.filter(status=TicketReservation.Status.CONVERTED).count(), 2)
+
+    def test_confirm_many_raises_when_a_lapsed_seat_is_gone(self):
+        ticket = self.ticket(quantity=1)
+        purchases = [self.purchase(ticket, "late@example.com"), self.purchase(ticket, "early@example.com")]
+
+        InventoryService.release(InventoryService.reserve(purchases[0]))
+        InventoryService.reserve(purchases[1])
+
+        with self.assertRaises(TicketSoldOut), transaction.atomic():
+            InventoryService.confirm_many(purchases)
+
+        self.assertEqual(InventoryService.totals(ticket), {"sold": 0, "held": 1})
+
+    def test_sell_held_moves_the_seat_from_held_to_sold(self):
+        ticket = self.ticket(quantity=2)
+        InventoryService.set_capacity(self.event, 2)
+
+        shard = InventoryService.hold(ticket)
+        InventoryService.sell_held(ticket, shard)
+
+        self.assertEqual(InventoryService.totals(ticket), {"sold": 1, "held": 0})
+        self.assertEqual(self.seats_taken(), 1)
+
+    def test_rebalance_keeps_sold_and_held_seats(self):
+        ticket = self.ticket(quantity=10, sales_shards=2)
+        InventoryService.sell(ticket, 3)
+        InventoryService.hold(ticket)
+        InventoryService.hold(ticket)
+
+        ticket.quantity, ticket.sales_shards = 8, 4
+        ticket.save(update_fields=['quantity', 'sales_shards'])
+        InventoryService.rebalance(ticket)
+
+        self.assertEqual(TicketSalesShard.objects.filter(ticket=ticket).count(), 4)
+        self.assertEqual(sum(TicketSalesShard.objects.filter(ticket=ticket).values_list('capacity', flat=True)), 8)
+        self.assertEqual(InventoryService.totals(ticket), {"sold": 3, "held": 2})
+        self.assertShardsWithinCapacity(ticket)
+
+        InventoryService.sell(ticket, 3)
+        with self.assertRaises(TicketSoldOut), transaction.atomic():
+            InventoryService.sell(ticket)
+
+    def test_rebalance_below_the_seats_taken_stops_sales_without_losing_any(self):
+        ticket = self.ticket(quantity=10, sales_shards=4)
+        InventoryService.take_group({ticket: 6}, 'sold')
+
+        ticket.quantity, ticket.sales_shards = 4, 2
+        ticket.save(update_fields=['quantity', 'sales_shards'])
+        InventoryService.rebalance(ticket)
+
+        self.assertEqual(InventoryService.totals(ticket), {"sold": 6, "held": 0})
+        self.assertShardsWithinCapacity(ticket)
+
+        with self.assertRaises(TicketSoldOut), transaction.atomic():
+            InventoryService.sell(ticket)
+
+    def test_comps_count_as_sold_once_and_earn_nothing(self):
+        ticket = self.ticket(quantity=10, price=Decimal("1000.00"))
+        InventoryService.sell(ticket)
+
+        summary = CompService.issue(self.event, ticket, ["a@example.com", "B@example.com", "not-an-email"])
+        self.assertEqual(summary["created"], 2)
+        self.assertEqual(summary["invalid"], ["not-an-email"])
+
+        # Issuing to the same addresses again gives out nothing new
+        self.assertEqual(CompService.issue(self.event, ticket, ["b@example.com"])["created"], 0)
+
+        ticket.refresh_from_db()
+        self.assertEqual((ticket.quantity_sold, ticket.quantity_comped), (3, 2))
+
+        InventoryService.rollup(Ticket.objects.filter(pk=ticket.pk))
+        ticket.refresh_from_db()
+        self.assertEqual(ticket.quantity_sold, 3)
+
+        event = Event.objects.with_sales_summary().get(pk=self.event.pk)
+        self.assertEqual(event.total_sold, 3)
+        self.assertEqual(event.gross_revenue, Decimal("1000.00"))
+
+@override_settings(OUTBOX_DISPATCH_ON_COMMIT=False)
+class OutboxTests(TransactionTestCase):
+    topic = OutboxMessage.Topic.TICKET_EMAIL
+
+    def setUp(self):
+        self.calls = []
+        handlers = mock.patch.dict(outbox._handlers, {self.topic: self.handler})
+        handlers.start()
+        self.addCleanup(handlers.stop)
+        self.failing = False
+
+    def handler(self, payload):
+        self.calls.append(payload)
+        if self.failing:
+            raise RuntimeError("send failed")
+
+    def hold_open(self, work):
+        """
+        Runs work in a transaction on another connection and keeps it open until
+        the returned function is called, which commits it.
+        """
+        opened, done = threading.Event(), threading.Event()
+
+        def run():
+            try:
+                with transaction.atomic():
+                    work()
+                    opened.set()
+                    done.wait(10)
+            finally:
+                opened.set()
+                connection.close()
+
+        thread = threading.Thread(target=run)
+        thread.start()
+        opened.wait(10)
+
+        def commit():
+            done.set()
+            thread.join()
+        # Also on failure, so the flush after the test is not left waiting on its locks
+        self.addCleanup(commit)
+        return commit
+
+    def claim_without_waiting(self):
+        # Errors instead of queueing behind a row lock
+        with transaction.atomic():
+            with connection.cursor() as cursor:
+                cursor.execute("SET LOCAL lock_timeout = '1s'")
+            return outbox.claim()
+
+    def message(self, message_id):
+        return OutboxMessage.objects.get(pk=message_id)
+
+    def make_due(self, message_id):
+        OutboxMessage.objects.filter(pk=message_id).update(available_at=timezone.now() - timedelta(seconds=1))
+
+    def test_leased_message_is_not_claimed_twice(self):
+        message = outbox.enqueue(self.topic, {"event_id": 1})
+
+        self.assertEqual([m.id for m in outbox.claim()], [message.id])
+        self.assertEqual(outbox.claim(), [])
+
+        leased = self.message(message.id)
+        self.assertEqual(leased.attempts, 1)
+        self.assertGreater(leased.available_at, timezone.now() + timedelta(seconds=outbox.LEASE_SECONDS - 5))
+
+        # A worker that died mid-batch only delays the message until its lease runs out
+        self.make_due(message.id)
+        self.assertEqual([m.id for m in outbox.claim()], [message.id])
+        self.assertEqual(self.message(message.id).attempts, 2)
+
+    def test_claim_skips_a_message_another_worker_is_claiming(self):
+        message = outbox.enqueue(self.topic, {"event_id": 1})
+
+        claimed = []
+        commit = self.hold_open(lambda: claimed.extend(outbox.claim()))
+
+        self.assertEqual(self.claim_without_waiting(), [])
+        commit()
+
+        self.assertEqual([m.id for m in claimed], [message.id])
+        self.assertEqual(outbox.claim(), [])
+
+    def test_failure_reschedules_with_backoff(self):
+        self.failing = True
+        message = outbox.enqueue(self.topic, {"event_id": 1})
+
+        for attempt, backoff in [(1, 15), (2, 30), (3, 60)]:
+            before = timezone.now()
+            [claimed] = outbox.claim()
+            self.assertFalse(outbox.process(claimed))
+
+            failed = self.message(message.id)
+            self.assertEqual((failed.status, failed.attempts, failed.last_error), (OutboxMessage.Status.PENDING, attempt, "send failed"))
+            self.assertGreaterEqual(failed.available_at, before + timedelta(seconds=backoff))
+            self.assertLess(failed.available_at, timezone.now() + timedelta(seconds=backoff + 1))
+
+            self.assertEqual(outbox.claim(), [])
+            self.make_due(message.id)
+
+    def test_last_attempt_marks_the_message_failed(self):
+        self.failing = True
+        message = outbox.enqueue(self.topic, {"event_id": 1})
+        OutboxMessage.objects.filter(pk=message.id).update(attempts=outbox.MAX_ATTEMPTS - 1)
+
+        [claimed] = outbox.claim()
+        self.assertFalse(outbox.process(claimed))
+
+        self.assertEqual(self.message(message.id).status, OutboxMessage.Status.FAILED)
+        self.assertEqual(outbox.claim(), [])
+
+    def test_success_marks_the_message_done(self):
+        message = outbox.enqueue(self.topic, {"event_id": 1})
+
+        self.assertEqual(outbox.drain(), 1)
+
+        self.assertEqual(self.calls, [{"event_id": 1}])
+        done = self.message(message.id)
+        self.assertEqual((done.status, done.last_error), (OutboxMessage.Status.DONE, None))
+        self.assertIsNotNone(done.processed_at)
+
+    def test_dedupe_key_shares_the_waiting_message(self):
+        first = outbox.enqueue(self.topic, {"event_id": 1}, delay=timedelta(minutes=5), dedupe_key="event_1")
+        second = outbox.enqueue(self.topic, {"event_id": 1}, dedupe_key="event_1")
+
+        self.assertEqual(first.id, second.id)
+        self.assertEqual(OutboxMessage.objects.count(), 1)
+        # The earlier of the two times wins
+        self.assertLessEqual(self.message(first.id).available_at, timezone.now())
+
+        # Once a worker has it, the next write needs a message of its own
+        outbox.claim()
+        third = outbox.enqueue(self.topic, {"event_id": 1}, dedupe_key="event_1")
+
+        self.assertNotEqual(third.id, first.id)
+        self.assertEqual(OutboxMessage.objects.count(), 2)
+
+    def test_deduplicated_message_waits_for_the_enqueuing_transaction(self):
+        message = outbox.enqueue(self.topic, {"event_id": 1}, dedupe_key="event_1")
+
+        commit = self.hold_open(lambda: outbox.enqueue(self.topic, {"event_id": 1}, dedupe_key="event_1"))
+        self.assertEqual(self.claim_without_waiting(), [])
+        commit()
+
+        self.assertEqual([m.id for m in outbox.claim()], [message.id])
+
+    def test_collapse_only_takes_committed_unleased_messages_of_the_event(self):
+        due = outbox.enqueue(self.topic, {"event_id": 1})
+        other_event = outbox.enqueue(self.topic, {"event_id": 2})
+        other_topic = outbox.enqueue(OutboxMessage.Topic.CALENDAR_SYNC, {"event_id": 1})
+        delayed = outbox.enqueue(self.topic, {"event_id": 1}, delay=timedelta(minutes=5))
+
+        leased = outbox.enqueue(self.topic, {"event_id": 1})
+        OutboxMessage.objects.filter(pk=leased.id).update(available_at=timezone.now() + timedelta(seconds=outbox.LEASE_SECONDS), attempts=1)
+
+        uncommitted = []
+        commit = self.hold_open(lambda: uncommitted.append(outbox.enqueue(self.topic, {"event_id": 1})))
+
+        self.assertEqual(outbox.collapse(self.topic, event_id=1), 1)
+        commit()
+
+        self.assertEqual(self.message(due.id).status, OutboxMessage.Status.DONE)
+        for message in [other_event, other_topic, delayed, leased, uncommitted[0]]:
+            self.assertEqual(self.message(message.id).status, OutboxMessage.Status.PENDING)
@@ -1,17 +1,37 @@
 from django.urls import path
-from .views import CreateEventView, CreateTicketView, CreateTicketPurchaseView, UpdateEventView, ListEventsView, RetrieveEventView, UpdateEventModeView, ListPurchasedTicketsView
+from .views import CreateEventView, CreateTicketView, CreateTicketPurchaseView, UpdateEventView, ListEventsView, RetrieveEventView, UpdateEventModeView, ListPurchasedTicketsView, DiscoverEventsView, CheckInView, TicketQRCodeView, EventManifestView, BatchCheckInView, ExportAttendeesView, EventSalesAnalyticsView, CreateEventSeriesView, RetrieveEventSeriesView, ListSeriesOccurrencesView, MaterializeOccurrenceView, CalendarFeedLinkView, CalendarFeedView, WaitlistView, ClaimWaitlistOfferView, GroupPurchaseView, CompTicketsView, UpdateTicketView
 
 urlpatterns = [
     path('', CreateEventView.as_view(), name='create-event'),
     
     path('ticket', CreateTicketView.as_view(), name='create-ticket'),
+    path('ticket/<slug:sqid>/waitlist', WaitlistView.as_view(), name='ticket-waitlist'),
+    path('waitlist/claim', ClaimWaitlistOfferView.as_view(), name='claim-waitlist-offer'),
     path('register', CreateTicketPurchaseView.as_view(), name='create-ticket-purchase'),
+    path('register/group', GroupPurchaseView.as_view(), name='create-group-purchase'),
     
     path('list', ListEventsView.as_view(), name='list-events'),
+    path('discover', DiscoverEventsView.as_view(), name='discover-events'),
     path('tickets', ListPurchasedTicketsView.as_view(), name='list-purchased-tickets'),
+    path('tickets/<uuid:ticket_uid>/qr', TicketQRCodeView.as_view(), name='ticket-qr-code'),
+    path('calendar', CalendarFeedLinkView.as_view(), name='calendar-feed-link'),
+    path('calendar/<str:token>.ics', CalendarFeedView.as_view(), name='calendar-feed'),
+    path('check-in', CheckInView.as_view(), name='check-in'),
     
+    path('update/ticket/<slug:sqid>', UpdateTicketView.as_view(), name='update-ticket'),
     path('update/<slug:sqid>', UpdateEventView.as_view(), name='update-event'),
     path('update/<slug:sqid>/mode', UpdateEventModeView.as_view(), name='update-event-mode'),
     
+    path('series', CreateEventSeriesView.as_view(), name='create-event-series'),
+    path('series/<slug:sqid>', RetrieveEventSeriesView.as_view(), name='retrieve-event-series'),
+    path('series/<slug:sqid>/occurrences', ListSeriesOccurrencesView.as_view(), name='list-series-occurrences'),
+    path('series/<slug:sqid>/occurrences/<str:date>', MaterializeOccurrenceView.as_view(), name='materialize-series-occurrence'),
+    
+    path('<slug:sqid>/manifest', EventManifestView.as_view(), name='event-checkin-manifest'),
+    path('<slug:sqid>/check-ins', BatchCheckInView.as_view(), name='event-batch-check-in'),
+    path('<slug:sqid>/attendees/export', ExportAttendeesView.as_view(), name='export-attendees'),
+    path('<slug:sqid>/comps', CompTicketsView.as_view(), name='comp-tickets'),
+    path('<slug:sqid>/analytics', EventSalesAnalyticsView.as_view(), name='event-sales-analytics'),
+    
     path('<slug:sqid>', RetrieveEventView.as_view(), name='retrieve-event'),
 ]
\ No newline at end of file
@@ -1,28 +1,51 @@
 from django.db import transaction
-from django.db.models import F
-from django.core.cache import cache
+from django.db.models import Q
+from django.utils import timezone
+from django.http import HttpResponse, HttpResponseRedirect, StreamingHttpResponse
+from django.urls import reverse
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
 
 from rest_framework import generics, status
-from rest_framework.exceptions import PermissionDenied
+from rest_framework.exceptions import PermissionDenied, ValidationError, NotFound
 from rest_framework.response import Response
-from rest_framework.permissions import IsAuthenticated
+from rest_framework.permissions import IsAuthenticated, AllowAny
 
 from drf_spectacular.utils import extend_schema
 
-from .serializers import EventSerializer, CreateTicketSerializer, TicketPurchaseSerializer, UpdateEventSerializer, ListEventSerializer, UpdateEventModeSerializer, ListTicketPurchaseSerializer
-from .models import Event, VirtualMeeting, Ticket, TicketPurchase
+from .serializers import EventSerializer, CreateTicketSerializer, TicketPurchaseSerializer, UpdateEventSerializer, ListEventSerializer, UpdateEventModeSerializer, ListTicketPurchaseSerializer, DiscoverEventSerializer, DiscoverEventsQuerySerializer, CheckInSerializer, CheckInResultSerializer, ManifestQuerySerializer, BatchCheckInSerializer, BatchCheckInResultSerializer, AttendeeExportQuerySerializer, SalesAnalyticsQuerySerializer, SalesAnalyticsSerializer, EventSeriesSerializer, SeriesOccurrenceQuerySerializer, SeriesOccurrenceSerializer, WaitlistEntrySerializer, ClaimWaitlistOfferSerializer, GroupPurchaseSerializer, GroupPurchaseResultSerializer, CompTicketsSerializer, CompTicketsResultSerializer, UpdateTicketSerializer
+from .models import Event, EventSeries, VirtualMeeting, Ticket, TicketPurchase
 from .services import EventService, GoogleCalendarService, get_user_credentials, GoogleAuthRequired
+from .inventory import InventoryService, TicketSoldOut, EventFull
+from .checkin import CheckInService
+from .exports import AttendeeExport
+from .analytics import SalesAnalytics
+from .reminders import ReminderEngine
+from .series import SeriesService
+from .waitlist import WaitlistService, WAITLIST_CLAIM_URL
+from .group_purchases import GroupPurchaseService
+from .comps import CompService
+from . import qr, calendar
+
+from core.models import User
 
 from futaverse.utils.email_service import BrevoEmailService
+from futaverse.pagination import KeysetPagination
+from futaverse.utils.locks import LeaseLock
 # from futaverse.permissions import 
 from payments.requests import initialize_transaction
 
+from datetime import date
+
 import uuid
 import logging
 
 mailer = BrevoEmailService()
 logger = logging.getLogger(__name__)
 
+class EventFeedPagination(KeysetPagination):
+    ordering = ('date', 'start_time', 'id')
+
 @extend_schema(tags=['Events'], summary="Create an event")
 class CreateEventView(generics.CreateAPIView):
     serializer_class = EventSerializer
@@ -40,10 +63,13 @@ class CreateEventView(generics.CreateAPIView):
         
         event: Event = serializer.save(creator=user, **validated_data)
         
-        if mode in [Event.Mode.VIRTUAL, Event.Mode.HYBRID]:
+        if mode in [Event.Mode.VIRTUAL, Event.Mode.HYBRID] and platform == VirtualMeeting.Platform.JITSI:
+            # No Google round trip in the request; mirrored to Calendar from the outbox
+            EventService.open_jitsi_meeting(event)
+            
+        elif mode in [Event.Mode.VIRTUAL, Event.Mode.HYBRID]:
             try:
                 credentials = get_user_credentials(user, redirect_after_auth)
-                print(credentials)
                 
             except GoogleAuthRequired as e:
                 raise PermissionDenied({
@@ -52,26 +78,40 @@ class CreateEventView(generics.CreateAPIView):
                     "auth_url": e.auth_url
                 })
                             
-            service = GoogleCalendarService(credentials)
+            service = GoogleCalendarService(credentials, user)
             
-            if platform == VirtualMeeting.Platform.GOOGLE_MEET:
-                room_name = None
-                google_event = service.create_event(event, [user.email])
-                join_url = google_event.get('hangoutLink')
-                external_calendar_event_id = google_event.get('id')
-                
-            if platform == VirtualMeeting.Platform.JITSI:
-                room_name = f"App-{uuid.uuid4().hex}"
-                join_url = f"https://meet.jit.si/{room_name}"
-                google_event = service.create_event(event, [user.email], manual_join_url=join_url)
-                external_calendar_event_id = google_event.get('id')
+            # The Meet link only exists once Google has created the event
+            google_event = service.create_event(event, [user.email])
+            join_url = google_event.get('hangoutLink')
+            external_calendar_event_id = google_event.get('id')
                 
-            VirtualMeeting.objects.create(event=event, platform=platform, join_url=join_url, external_calendar_event_id=external_calendar_event_id, room_name=room_name)
+            VirtualMeeting.objects.create(event=event, platform=platform, join_url=join_url, external_calendar_event_id=external_calendar_event_id)
             
 @extend_schema(tags=['Events'], summary="Add ticket for an event")
 class CreateTicketView(generics.CreateAPIView):
     serializer_class = CreateTicketSerializer
             
+@extend_schema(tags=['Events'], summary="Update a ticket")
+class UpdateTicketView(generics.UpdateAPIView):
+    serializer_class = UpdateTicketSerializer
+    permission_classes = [IsAuthenticated]
+    lookup_field = 'sqid'
+    http_method_names = ['patch']
+    
+    def get_queryset(self):
+        return Ticket.objects.filter(event__creator=self.request.user)
+    
+    def perform_update(self, serializer):
+        validated_data = serializer.validated_data
+        stock_changed = any(field in validated_data and validated_data[field] != getattr(serializer.instance, field) for field in ['quantity', 'sales_shards'])
+        
+        with transaction.atomic():
+            ticket = serializer.save()
+            
+            if stock_changed:
+                # Re-splits the stock over the shards and queues waitlist promotions for any seats freed
+                InventoryService.rebalance(ticket)
+            
 @extend_schema(tags=['Events'], summary="Register for an event")
 class CreateTicketPurchaseView(generics.CreateAPIView):
     serializer_class = TicketPurchaseSerializer
@@ -90,39 +130,96 @@ class CreateTicketPurchaseView(generics.CreateAPIView):
             
         return Response(serializer.data, status=status.HTTP_201_CREATED)
     
-    @transaction.atomic
     def perform_create(self, serializer):
         #TODO: Handle when action is not performed by user
         
         user = self.request.user
         validated_data = serializer.validated_data
         ticket: Ticket = validated_data.get("ticket")
-        event = ticket.event
         
         ticket_uid = uuid.uuid4().hex 
         
         is_free = ticket.sales_price == 0 or ticket.type == Ticket.Type.DEFAULT
         
-        ticket_purchase = TicketPurchase.objects.create(user=user, ticket=ticket, is_paid=is_free, ticket_uid=ticket_uid, email=user.email)
-             
-        if is_free:
-            Ticket.objects.filter(id=ticket.id).update(quantity_sold=F('quantity_sold') + 1)
-            
-            if event.mode in [Event.Mode.VIRTUAL, Event.Mode.HYBRID]:
-                EventService.sync_to_calendar(event)
+        try:
+            if is_free:
+                with transaction.atomic():
+                    InventoryService.sell(ticket)
+                    ticket_purchase = TicketPurchase.objects.create(user=user, ticket=ticket, is_paid=True, paid_at=timezone.now(), ticket_uid=ticket_uid, email=user.email)
+                    
+                    # Calendar and email calls happen in the outbox worker once this commits
+                    EventService.queue_ticket_side_effects(ticket_purchase)
+                    SalesAnalytics.record(ticket, at=ticket_purchase.paid_at, created=1, paid=1)
                 
-            EventService.send_ticket_email(ticket_purchase)
+                return None
             
-            return None
+            # The hold commits before Paystack is called so the ticket row is never
+            # locked for the length of an HTTP round trip
+            with transaction.atomic():
+                ticket_purchase = TicketPurchase.objects.create(user=user, ticket=ticket, is_paid=False, ticket_uid=ticket_uid, email=user.email)
+                reservation = InventoryService.reserve(ticket_purchase)
+                SalesAnalytics.record(ticket, created=1)
+                
+        except EventFull:
+            raise ValidationError({"ticket": "Event is at full capacity"})
+        except TicketSoldOut:
+            raise ValidationError({"ticket": "Ticket is sold out. Join the waitlist to be offered a seat that frees up."})
             
-        else:
+        try:
             authorization_url = initialize_transaction({
                 "amount": int(ticket.sales_price * 100), 
                 "email": user.email,
                 "reference": str(ticket_uid)
             })
             
-            return authorization_url
+        except Exception:
+            InventoryService.release(reservation)
+            raise
+        
+        return authorization_url
+
+@extend_schema(tags=['Events'], summary="Register several seats with one checkout", responses=GroupPurchaseResultSerializer)
+class GroupPurchaseView(generics.GenericAPIView):
+    serializer_class = GroupPurchaseSerializer
+    permission_classes = [IsAuthenticated]
+    
+    def post(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        
+        user = request.user
+        items = [
+            (item['ticket'], item.get('emails', []) + [user.email] * (item['quantity'] - len(item.get('emails', []))))
+            for item in serializer.validated_data['items']
+        ]
+        
+        try:
+            reference, purchases, reservations = GroupPurchaseService.reserve(user, items)
+            
+        except EventFull:
+            raise ValidationError({"items": "Event does not have that many seats left"})
+        except TicketSoldOut:
+            raise ValidationError({"items": "Not enough tickets left"})
+        
+        checkout_url = None
+        if reservations:
+            # One Paystack transaction for the whole group, made after the holds commit
+            try:
+                checkout_url = initialize_transaction({
+                    "amount": int(GroupPurchaseService.total(items) * 100),
+                    "email": user.email,
+                    "reference": reference
+                })
+                
+            except Exception:
+                InventoryService.release_many([reservation.id for reservation in reservations])
+                raise
+            
+        return Response(GroupPurchaseResultSerializer({
+            "payment_reference": reference,
+            "checkout_url": checkout_url,
+            "tickets": purchases,
+        }).data, status=status.HTTP_201_CREATED)
 
 @extend_schema(tags=['Events'], summary="Update an event")     
 class UpdateEventView(generics.UpdateAPIView):
@@ -134,11 +231,11 @@ class UpdateEventView(generics.UpdateAPIView):
     def perform_update(self, serializer):
         instance: Event = self.get_object()
         
-        lock_key = f"info_update_{instance.sqid}"
-        if cache.get(lock_key):
-            return Response({"detail": "Request already in progress."}, status=409)
-        cache.set(lock_key, True, timeout=5) 
-        
+        # Held for the whole update so a repeat request cannot patch the calendar or email attendees twice
+        with LeaseLock(f"event_update_{instance.sqid}"):
+            self.apply_update(instance, serializer)
+            
+    def apply_update(self, instance: Event, serializer):
         old_data = {
             'date': instance.date.strftime('%B %d, %Y'),
             'time': instance.start_time.strftime('%I:%M %p')
@@ -150,9 +247,17 @@ class UpdateEventView(generics.UpdateAPIView):
         time_changed = any(field in validated_data and validated_data[field] != getattr(instance, field) for field in time_fields)
         
         with transaction.atomic():
+            if 'max_capacity' in validated_data and validated_data['max_capacity'] != instance.max_capacity:
+                # Before the save, which would lock the event row ahead of its shards
+                try:
+                    InventoryService.set_capacity(serializer.instance, validated_data.pop('max_capacity'))
+                except EventFull:
+                    raise ValidationError({"max_capacity": "Capacity cannot be lower than already sold or reserved seats."})
+                
             event = serializer.save()
         
-        if hasattr(event, 'virtual_meeting'):
+        # Jitsi meetings of creators without Google have nothing on a calendar to patch
+        if hasattr(event, 'virtual_meeting') and event.virtual_meeting.external_calendar_event_id:
             try:
                 user = self.request.user
                 redirect_after_auth = validated_data.get("redirect_after_auth", None)
@@ -167,11 +272,12 @@ class UpdateEventView(generics.UpdateAPIView):
                 })
             
             is_jitsi = event.virtual_meeting.platform == VirtualMeeting.Platform.JITSI           
-            service = GoogleCalendarService(credentials)
+            service = GoogleCalendarService(credentials, user)
             service.update_event_details(event, validated_data, manual_join_url=event.virtual_meeting.join_url if is_jitsi else None)
         
         if time_changed:
-            EventService.send_event_update_emails(event, old_data)
+            ReminderEngine.reset(event)
+            EventService.queue_event_update_emails(event, old_data)
 
 @extend_schema(tags=['Events'], summary="List user's hosted events")             
 class ListEventsView(generics.ListAPIView):
@@ -180,7 +286,32 @@ class ListEventsView(generics.ListAPIView):
     
     def get_queryset(self):
         user = self.request.user
-        return Event.objects.filter(creator=user).prefetch_related('tickets', 'virtual_meeting').select_related('creator')
+        return Event.objects.filter(creator=user).with_sales_summary().select_related('virtual_meeting')
+    
+@extend_schema(tags=['Events'], summary="Browse published upcoming events", parameters=[DiscoverEventsQuerySerializer])
+class DiscoverEventsView(generics.ListAPIView):
+    serializer_class = DiscoverEventSerializer
+    permission_classes = [IsAuthenticated]
+    pagination_class = EventFeedPagination
+    
+    def get_queryset(self):
+        params = DiscoverEventsQuerySerializer(data=self.request.query_params)
+        params.is_valid(raise_exception=True)
+        filters = params.validated_data
+        
+        today = timezone.localdate()
+        date_from = max(filters.get('date_from', today), today)
+        
+        queryset = Event.objects.filter(is_published=True, is_cancelled=False, date__gte=date_from)
+        
+        if 'date_to' in filters:
+            queryset = queryset.filter(date__lte=filters['date_to'])
+        if 'category' in filters:
+            queryset = queryset.filter(category=filters['category'])
+        if 'mode' in filters:
+            queryset = queryset.filter(mode=filters['mode'])
+            
+        return queryset.with_starting_price()
     
 @extend_schema(tags=['Events'], summary="Get event's details")
 class RetrieveEventView(generics.RetrieveAPIView):
@@ -202,11 +333,10 @@ class UpdateEventModeView(generics.UpdateAPIView):
     def perform_update(self, serializer):
         instance = self.get_object()
         
-        lock_key = f"mode_update_{instance.sqid}"
-        if cache.get(lock_key):
-            return Response({"detail": "Request already in progress."}, status=409)
-        cache.set(lock_key, True, timeout=10) 
-        
+        with LeaseLock(f"event_update_{instance.sqid}"):
+            self.apply_update(instance, serializer)
+            
+    def apply_update(self, instance: Event, serializer):
         old_mode = instance.mode
         new_mode = serializer.validated_data.get('mode')
         
@@ -218,7 +348,7 @@ class UpdateEventModeView(generics.UpdateAPIView):
 
         if old_mode != new_mode:
             EventService.reconcile_mode_change(event, old_mode, new_mode, self.request.user, platform=platform, venue=venue)
-            EventService.send_mode_change_email(event, old_mode, new_mode)
+            EventService.queue_mode_change_email(event, old_mode, new_mode)
             
 @extend_schema(tags=['Events'], summary="List user's purchased tickets")
 class ListPurchasedTicketsView(generics.ListAPIView):
@@ -229,4 +359,357 @@ class ListPurchasedTicketsView(generics.ListAPIView):
     def get_queryset(self):
         user = self.request.user
         return TicketPurchase.objects.filter(user=user).select_related('ticket', 'ticket__event').order_by('-created_at')
-    
\ No newline at end of file
+    
+        
+@extend_schema(tags=['Events'], summary="Check in a ticket at the door", request=CheckInSerializer, responses=CheckInResultSerializer)
+class CheckInView(generics.GenericAPIView):
+    serializer_class = CheckInSerializer
+    permission_classes = [IsAuthenticated]
+    
+    def post(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        
+        checked_in, ticket_purchase = EventService.check_in(serializer.validated_data['ticket_uid'], request.user)
+        
+        if not ticket_purchase:
+            raise NotFound("Ticket not found")
+        
+        if not ticket_purchase.is_paid:
+            raise ValidationError({"ticket_uid": "Ticket has not been paid for"})
+        
+        data = CheckInResultSerializer(ticket_purchase).data
+        
+        if not checked_in:
+            return Response({"detail": "Ticket already checked in", **data}, status=status.HTTP_409_CONFLICT)
+        
+        return Response(data, status=status.HTTP_200_OK)
+    
+@extend_schema(tags=['Events'], summary="Get a ticket's QR code image")
+class TicketQRCodeView(generics.GenericAPIView):
+    permission_classes = [AllowAny]
+    
+    def get(self, request, ticket_uid, *args, **kwargs):
+        purchase = TicketPurchase.objects.filter(ticket_uid=ticket_uid, is_paid=True).values('qr_code_url').first()
+        if purchase is None:
+            raise NotFound("Ticket not found")
+        
+        # Confirmation emails upload the image to Supabase, so most tickets are never rendered here
+        if purchase['qr_code_url']:
+            response = HttpResponseRedirect(purchase['qr_code_url'])
+        else:
+            response = HttpResponse(qr.get_png(ticket_uid), content_type="image/png")
+            
+        # The image only encodes the ticket_uid, so it never changes
+        response["Cache-Control"] = "public, max-age=31536000, immutable"
+        return response
+        
+@extend_schema(tags=['Events'], summary="Download the offline check-in manifest for an event", parameters=[ManifestQuerySerializer])
+class EventManifestView(generics.GenericAPIView):
+    permission_classes = [IsAuthenticated]
+    lookup_field = 'sqid'
+    
+    def get_queryset(self):
+        return Event.objects.filter(creator=self.request.user)
+    
+    def get(self, request, *args, **kwargs):
+        event = self.get_object()
+        
+        params = ManifestQuerySerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        
+        version, chunks = CheckInService.manifest(event, since=params.validated_data.get('since'))
+        
+        response = StreamingHttpResponse(chunks, content_type="application/octet-stream")
+        response["X-Manifest-Version"] = str(version)
+        response["Cache-Control"] = "no-store"
+        return response
+    
+@extend_schema(tags=['Events'], summary="Upload offline check-in scans", request=BatchCheckInSerializer, responses=BatchCheckInResultSerializer)
+class BatchCheckInView(generics.GenericAPIView):
+    serializer_class = BatchCheckInSerializer
+    permission_classes = [IsAuthenticated]
+    lookup_field = 'sqid'
+    
+    def get_queryset(self):
+        return Event.objects.filter(creator=self.request.user)
+    
+    def post(self, request, *args, **kwargs):
+        event = self.get_object()
+        
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        
+        result = CheckInService.apply_scans(event, serializer.validated_data['scans'])
+        return Response(BatchCheckInResultSerializer(result).data, status=status.HTTP_200_OK)
+    
+@extend_schema(tags=['Events'], summary="Export an event's attendees as CSV or XLSX", parameters=[AttendeeExportQuerySerializer])
+class ExportAttendeesView(generics.GenericAPIView):
+    permission_classes = [IsAuthenticated]
+    lookup_field = 'sqid'
+    
+    def get_queryset(self):
+        return Event.objects.filter(creator=self.request.user)
+    
+    def get(self, request, *args, **kwargs):
+        event = self.get_object()
+        
+        params = AttendeeExportQuerySerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        file_format = params.validated_data['file_format']
+        
+        response = StreamingHttpResponse(AttendeeExport.stream(event, file_format), content_type=AttendeeExport.content_types[file_format])
+        response["Content-Disposition"] = f'attachment; filename="{AttendeeExport.filename(event, file_format)}"'
+        response["Cache-Control"] = "no-store"
+        return response
+        
+@extend_schema(tags=['Events'], summary="Get ticket sales over time for an event", parameters=[SalesAnalyticsQuerySerializer], responses=SalesAnalyticsSerializer)
+class EventSalesAnalyticsView(generics.GenericAPIView):
+    permission_classes = [IsAuthenticated]
+    lookup_field = 'sqid'
+    
+    def get_queryset(self):
+        return Event.objects.filter(creator=self.request.user)
+    
+    def get(self, request, *args, **kwargs):
+        event = self.get_object()
+        
+        params = SalesAnalyticsQuerySerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        
+        bucket = params.validated_data['bucket']
+        start = params.validated_data.get('start', event.created_at)
+        end = params.validated_data.get('end', timezone.now())
+        
+        series = SalesAnalytics.series(event, start, end, bucket=bucket)
+        
+        return Response(SalesAnalyticsSerializer({
+            'bucket': bucket,
+            'totals': SalesAnalytics.summarize(series),
+            'series': series,
+        }).data, status=status.HTTP_200_OK)
+
+@extend_schema(tags=['Events'], summary="Create a recurring event series")
+class CreateEventSeriesView(generics.CreateAPIView):
+    serializer_class = EventSeriesSerializer
+    permission_classes = [IsAuthenticated]
+    
+    @transaction.atomic
+    def perform_create(self, serializer):
+        user = self.request.user
+        
+        redirect_after_auth = serializer.validated_data.pop("redirect_after_auth", None)
+        series: EventSeries = serializer.save(creator=user)
+        
+        if series.mode not in [Event.Mode.VIRTUAL, Event.Mode.HYBRID]:
+            return
+        
+        if series.platform == VirtualMeeting.Platform.JITSI:
+            # No Google round trip in the request; mirrored to Calendar from the outbox
+            EventService.open_jitsi_series(series)
+            return
+        
+        try:
+            credentials = get_user_credentials(user, redirect_after_auth)
+            
+        except GoogleAuthRequired as e:
+            raise PermissionDenied({
+                "detail": "Authenticate with Google",
+                "error": "AUTH_REQUIRED",
+                "auth_url": e.auth_url
+            })
+            
+        service = GoogleCalendarService(credentials, user)
+        
+        # One insert with an RRULE, however many times the series repeats
+        google_event = service.create_recurring_event(series, [user.email])
+        series.join_url = google_event.get('hangoutLink')
+        series.external_calendar_event_id = google_event.get('id')
+        series.save(update_fields=['join_url', 'external_calendar_event_id'])
+        
+class SeriesLookupMixin:
+    lookup_field = 'sqid'
+    
+    def get_queryset(self):
+        return EventSeries.objects.filter(Q(is_published=True) | Q(creator=self.request.user))
+        
+@extend_schema(tags=['Events'], summary="Get a recurring event series")
+class RetrieveEventSeriesView(SeriesLookupMixin, generics.RetrieveAPIView):
+    serializer_class = EventSeriesSerializer
+    permission_classes = [IsAuthenticated]
+    
+    def get_queryset(self):
+        return super().get_queryset().prefetch_related('tickets')
+        
+@extend_schema(tags=['Events'], summary="List a series' occurrences in a date window", parameters=[SeriesOccurrenceQuerySerializer], responses=SeriesOccurrenceSerializer(many=True))
+class ListSeriesOccurrencesView(SeriesLookupMixin, generics.GenericAPIView):
+    permission_classes = [IsAuthenticated]
+    
+    def get(self, request, *args, **kwargs):
+        series = self.get_object()
+        
+        params = SeriesOccurrenceQuerySerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        
+        occurrences = SeriesService.occurrences(series, params.validated_data.get('start'), params.validated_data.get('end'))
+        
+        return Response(SeriesOccurrenceSerializer(occurrences, many=True).data, status=status.HTTP_200_OK)
+    
+@extend_schema(tags=['Events'], summary="Open an occurrence of a series for ticket sales", request=None, responses=EventSerializer)
+class MaterializeOccurrenceView(SeriesLookupMixin, generics.GenericAPIView):
+    """
+    Returns the occurrence as an event, with tickets that can be bought through
+    the register endpoint. Creates it on first call.
+    """
+    permission_classes = [IsAuthenticated]
+    
+    def post(self, request, *args, **kwargs):
+        series = self.get_object()
+        
+        try:
+            occurrence_date = date.fromisoformat(kwargs['date'])
+        except ValueError:
+            raise ValidationError({"date": "Use YYYY-MM-DD."})
+        
+        event = SeriesService.materialize(series, occurrence_date)
+        
+        return Response(EventSerializer(event).data, status=status.HTTP_200_OK)
+
+@extend_schema(tags=['Events'], summary="Get the link to your calendar feed")
+class CalendarFeedLinkView(generics.GenericAPIView):
+    permission_classes = [IsAuthenticated]
+    
+    def get(self, request, *args, **kwargs):
+        url = request.build_absolute_uri(reverse('calendar-feed', kwargs={'token': calendar.feed_token(request.user)}))
+        
+        return Response({
+            "url": url,
+            "webcal_url": url.replace("https://", "webcal://", 1).replace("http://", "webcal://", 1),
+        }, status=status.HTTP_200_OK)
+    
+@extend_schema(tags=['Events'], summary="iCalendar feed of your hosted events and tickets", responses={(200, 'text/calendar'): str})
+class CalendarFeedView(generics.GenericAPIView):
+    """
+    Polled by calendar apps, which cannot send our auth headers; the signed token
+    in the URL identifies the user.
+    """
+    permission_classes = [AllowAny]
+    authentication_classes = []
+    
+    def get(self, request, token, *args, **kwargs):
+        user_sqid = calendar.user_sqid_for_token(token)
+        user_id = User.objects.filter(sqid=user_sqid).values_list('id', flat=True).first() if user_sqid else None
+        if user_id is None:
+            raise NotFound("Calendar feed not found")
+        
+        etag, last_modified = calendar.feed_validators(user_id)
+        last_modified_ts = int(last_modified.timestamp()) if last_modified else None
+        
+        response = get_conditional_response(request, etag=etag, last_modified=last_modified_ts)
+        if response is None:
+            response = HttpResponse(calendar.render_feed(user_id, etag), content_type="text/calendar; charset=utf-8")
+            
+        response["ETag"] = etag
+        if last_modified_ts:
+            response["Last-Modified"] = http_date(last_modified_ts)
+        response["Cache-Control"] = "private, max-age=300"
+        return response
+
+@extend_schema(tags=['Events'], summary="Join or leave a sold out ticket's waitlist")
+class WaitlistView(generics.GenericAPIView):
+    serializer_class = WaitlistEntrySerializer
+    permission_classes = [IsAuthenticated]
+    lookup_field = 'sqid'
+    
+    def get_queryset(self):
+        return Ticket.objects.filter(is_active=True, event__is_cancelled=False)
+    
+    def entry_data(self, entry):
+        entry.position = WaitlistService.position(entry)
+        return WaitlistEntrySerializer(entry).data
+    
+    @extend_schema(responses=WaitlistEntrySerializer)
+    def get(self, request, *args, **kwargs):
+        entry = WaitlistService.active_entry(self.get_object(), request.user)
+        if not entry:
+            raise NotFound("You are not on this waitlist")
+        
+        return Response(self.entry_data(entry), status=status.HTTP_200_OK)
+    
+    @extend_schema(request=None, responses=WaitlistEntrySerializer)
+    def post(self, request, *args, **kwargs):
+        ticket = self.get_object()
+        
+        # Never taken from the request: the link goes out from the platform's sender with the claim token
+        claim_url = WAITLIST_CLAIM_URL or request.build_absolute_uri(reverse('claim-waitlist-offer'))
+        entry, created = WaitlistService.join(ticket, request.user, claim_url)
+        
+        return Response(self.entry_data(entry), status=status.HTTP_201_CREATED if created else status.HTTP_200_OK)
+    
+    def delete(self, request, *args, **kwargs):
+        entry = WaitlistService.active_entry(self.get_object(), request.user)
+        if not entry or not WaitlistService.leave(entry):
+            raise NotFound("You are not on this waitlist")
+        
+        return Response(status=status.HTTP_204_NO_CONTENT)
+    
+@extend_schema(tags=['Events'], summary="Claim a seat offered from a waitlist")
+class ClaimWaitlistOfferView(generics.GenericAPIView):
+    serializer_class = ClaimWaitlistOfferSerializer
+    permission_classes = [IsAuthenticated]
+    
+    def post(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        
+        purchase, reservation = WaitlistService.claim(serializer.validated_data['token'], request.user)
+        
+        if reservation is None:
+            return Response(ListTicketPurchaseSerializer(purchase).data, status=status.HTTP_201_CREATED)
+        
+        try:
+            authorization_url = initialize_transaction({
+                "amount": int(purchase.ticket.sales_price * 100),
+                "email": purchase.email,
+                "reference": str(purchase.ticket_uid)
+            })
+            
+        except Exception:
+            InventoryService.release(reservation)
+            raise
+        
+        return Response({
+            "checkout_url": authorization_url,
+            "message": "Payment required to complete registration"
+        }, status=status.HTTP_201_CREATED)
+
+@extend_schema(tags=['Events'], summary="Give complimentary tickets to a list of emails", responses=CompTicketsResultSerializer)
+class CompTicketsView(generics.GenericAPIView):
+    serializer_class = CompTicketsSerializer
+    permission_classes = [IsAuthenticated]
+    lookup_field = 'sqid'
+    
+    def get_queryset(self):
+        return Event.objects.filter(creator=self.request.user)
+    
+    def post(self, request, *args, **kwargs):
+        event = self.get_object()
+        
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        
+        ticket: Ticket = serializer.validated_data['ticket']
+        if ticket.event_id != event.id:
+            raise ValidationError({"ticket": "Ticket does not belong to this event."})
+        ticket.event = event
+        
+        try:
+            result = CompService.issue(event, ticket, serializer.validated_data['emails'])
+            
+        except EventFull:
+            raise ValidationError({"emails": "The event does not have enough seats left for this list."})
+        except TicketSoldOut:
+            raise ValidationError({"emails": "The ticket does not have enough stock left for this list."})
+        
+        return Response(CompTicketsResultSerializer(result).data, status=status.HTTP_201_CREATED)
+
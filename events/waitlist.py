@@ -0,0 +1,262 @@
+"""
+Waitlists for sold out tickets.
+
+Each ticket's queue is its WAITING entries in id order, read through the
+waitlist_queue_idx partial index. Joining is one INSERT and promoting reads only
+the head of the queue, so neither gets slower as the queue grows.
+
+Whenever seats may have come free (a checkout hold or waitlist offer lapses or
+is released, or quantity/max_capacity goes up), InventoryService queues one
+deduplicated promotion per ticket. The outbox worker then offers the freed
+seats to the head of the queue in batches. Each offer holds its seat and emails
+a claim link that expires after WAITLIST_OFFER_TTL_MINUTES. Lapsed offers are
+returned by release_expired_holds, which queues the next promotion.
+"""
+from django.conf import settings
+from django.db import transaction, IntegrityError
+from django.utils import timezone
+
+from rest_framework.exceptions import NotFound, ValidationError
+
+from .models import Ticket, TicketPurchase, TicketReservation, WaitlistEntry, OutboxMessage
+from .inventory import InventoryService, TicketSoldOut, HOLD_TTL_MINUTES
+from .services import EventService
+from .analytics import SalesAnalytics
+from . import outbox
+
+from futaverse.utils.email_service import BrevoEmailService
+from futaverse.utils import email_templates
+
+from collections import Counter
+from datetime import timedelta
+from logging import getLogger
+
+import uuid
+
+logger = getLogger(__name__)
+
+mailer = BrevoEmailService()
+
+OFFER_TTL = timedelta(minutes=getattr(settings, "WAITLIST_OFFER_TTL_MINUTES", 30))
+PROMOTION_BATCH_SIZE = getattr(settings, "WAITLIST_PROMOTION_BATCH_SIZE", 50)
+# Frontend page the offer email links to; without it the email links to the claim endpoint
+WAITLIST_CLAIM_URL = getattr(settings, "WAITLIST_CLAIM_URL", None)
+
+def claim_link(entry: WaitlistEntry):
+    claim_url = WAITLIST_CLAIM_URL or entry.claim_url
+    separator = "&" if "?" in claim_url else "?"
+    return f"{claim_url}{separator}token={entry.claim_token}"
+
+class WaitlistService:
+    @staticmethod
+    def join(ticket: Ticket, user, claim_url):
+        """
+        Returns (entry, created). Joining again while waiting or holding an offer
+        returns the existing entry.
+        """
+        try:
+            with transaction.atomic():
+                entry = WaitlistEntry.objects.create(ticket=ticket, user=user, email=user.email, claim_url=claim_url)
+                # Seats may already be free again by the time someone joins
+                WaitlistService.queue_promotions([ticket.id])
+                return entry, True
+
+        except IntegrityError:
+            return WaitlistService.active_entry(ticket, user), False
+
+    @staticmethod
+    def active_entry(ticket: Ticket, user):
+        return WaitlistEntry.objects.filter(
+            ticket=ticket, user=user, status__in=[WaitlistEntry.Status.WAITING, WaitlistEntry.Status.OFFERED]
+        ).first()
+
+    @staticmethod
+    def position(entry: WaitlistEntry):
+        """
+        1 for the head of the queue; None once the entry has left it.
+        """
+        if entry.status != WaitlistEntry.Status.WAITING:
+            return None
+
+        return WaitlistEntry.objects.filter(ticket_id=entry.ticket_id, status=WaitlistEntry.Status.WAITING, id__lt=entry.id).count() + 1
+
+    @staticmethod
+    def leave(entry: WaitlistEntry):
+        """
+        Leaves the queue, or declines an open offer and passes its seat on.
+        """
+        with transaction.atomic():
+            if WaitlistEntry.objects.filter(pk=entry.pk, status=WaitlistEntry.Status.WAITING).update(status=WaitlistEntry.Status.LEFT):
+                return True
+
+            if WaitlistEntry.objects.filter(pk=entry.pk, status=WaitlistEntry.Status.OFFERED).update(status=WaitlistEntry.Status.LEFT):
+                InventoryService.unhold({(entry.ticket_id, entry.held_shard): 1})
+                return True
+
+        return False
+
+    @staticmethod
+    def queue_promotions(ticket_ids):
+        """
+        Queues a promotion for each of the tickets that has someone waiting. Call
+        inside the transaction that frees the seats.
+        """
+        waiting = (
+            WaitlistEntry.objects.filter(ticket_id__in=list(ticket_ids), status=WaitlistEntry.Status.WAITING)
+            .values_list('ticket_id', flat=True)
+            .distinct()
+        )
+
+        for ticket_id in waiting:
+            outbox.enqueue(OutboxMessage.Topic.WAITLIST_PROMOTION, {"ticket_id": ticket_id}, dedupe_key=f"waitlist_promote_{ticket_id}")
+
+    @staticmethod
+    def promote(ticket_id):
+        """
+        Offers free seats to the head of the ticket's queue, up to
+        PROMOTION_BATCH_SIZE at a time. Returns how many offers were made.
+        """
+        ticket = Ticket.objects.select_related('event').filter(id=ticket_id).first()
+        now = timezone.now()
+
+        if not ticket or not ticket.is_active or ticket.event.is_cancelled or (ticket.sales_end and ticket.sales_end < now):
+            return 0
+
+        with transaction.atomic():
+            entries = list(
+                WaitlistEntry.objects.select_for_update(skip_locked=True)
+                .filter(ticket_id=ticket_id, status=WaitlistEntry.Status.WAITING)
+                .order_by('id')[:PROMOTION_BATCH_SIZE]
+            )
+
+            offered = []
+            for entry in entries:
+                try:
+                    with transaction.atomic():
+                        entry.held_shard = InventoryService.hold(ticket)
+                except TicketSoldOut:
+                    break
+
+                entry.status = WaitlistEntry.Status.OFFERED
+                entry.claim_token = uuid.uuid4()
+                entry.offered_at = now
+                entry.offer_expires_at = now + OFFER_TTL
+                offered.append(entry)
+
+            WaitlistEntry.objects.bulk_update(offered, ['status', 'held_shard', 'claim_token', 'offered_at', 'offer_expires_at'])
+
+            if offered:
+                outbox.enqueue(OutboxMessage.Topic.WAITLIST_OFFER_EMAIL, {"entry_ids": [entry.id for entry in offered]})
+
+            # A full batch may have left more seats, and more people, behind it
+            if len(offered) == PROMOTION_BATCH_SIZE:
+                outbox.enqueue(OutboxMessage.Topic.WAITLIST_PROMOTION, {"ticket_id": ticket_id}, dedupe_key=f"waitlist_promote_{ticket_id}")
+
+        if offered:
+            logger.info(f"Offered {len(offered)} seat(s) of ticket {ticket_id} to its waitlist")
+
+        return len(offered)
+
+    @staticmethod
+    def expire_offers(batch_size=500):
+        """
+        Returns the seats of lapsed offers, which queues the next promotions.
+        """
+        expired_count = 0
+
+        while True:
+            with transaction.atomic():
+                expired = list(
+                    WaitlistEntry.objects.select_for_update(skip_locked=True)
+                    .filter(status=WaitlistEntry.Status.OFFERED, offer_expires_at__lte=timezone.now())
+                    .order_by('offer_expires_at')[:batch_size]
+                )
+
+                WaitlistEntry.objects.filter(id__in=[entry.id for entry in expired]).update(status=WaitlistEntry.Status.EXPIRED)
+
+                if expired:
+                    InventoryService.unhold(Counter((entry.ticket_id, entry.held_shard) for entry in expired))
+
+                expired_count += len(expired)
+
+            if len(expired) < batch_size:
+                return expired_count
+
+    @staticmethod
+    def claim(token, user):
+        """
+        Turns an open offer into a purchase on the seat it holds. Returns
+        (purchase, reservation); the reservation is None for free tickets, which
+        are paid for on the spot.
+        """
+        now = timezone.now()
+
+        with transaction.atomic():
+            entry = (
+                WaitlistEntry.objects.select_for_update(of=('self',))
+                .select_related('ticket', 'ticket__event')
+                .filter(claim_token=token, user=user)
+                .first()
+            )
+
+            if not entry:
+                raise NotFound("Offer not found")
+            if entry.status != WaitlistEntry.Status.OFFERED or entry.offer_expires_at <= now:
+                raise ValidationError({"token": "This offer has expired or was already used."})
+
+            ticket = entry.ticket
+            is_free = ticket.sales_price == 0 or ticket.type == Ticket.Type.DEFAULT
+
+            purchase = TicketPurchase.objects.create(
+                user=user,
+                ticket=ticket,
+                email=entry.email,
+                is_paid=is_free,
+                paid_at=now if is_free else None,
+            )
+
+            if is_free:
+                reservation = None
+                InventoryService.sell_held(ticket, entry.held_shard)
+                EventService.queue_ticket_side_effects(purchase)
+                SalesAnalytics.record(ticket, at=now, created=1, paid=1)
+            else:
+                # The offer's seat becomes the checkout hold
+                reservation = TicketReservation.objects.create(
+                    ticket=ticket,
+                    purchase=purchase,
+                    shard=entry.held_shard,
+                    expires_at=now + timedelta(minutes=HOLD_TTL_MINUTES)
+                )
+                SalesAnalytics.record(ticket, created=1)
+
+            entry.status = WaitlistEntry.Status.CLAIMED
+            entry.purchase = purchase
+            entry.save(update_fields=['status', 'purchase'])
+
+        return purchase, reservation
+
+    @staticmethod
+    def send_offers(entry_ids):
+        """
+        One Brevo call for a promotion batch; each recipient gets their own link.
+        """
+        entries = list(
+            WaitlistEntry.objects.select_related('ticket', 'ticket__event')
+            .filter(id__in=entry_ids, status=WaitlistEntry.Status.OFFERED)
+            .order_by('id')
+        )
+        if not entries:
+            return
+
+        ticket = entries[0].ticket
+        context = {
+            'event_title': ticket.event.title,
+            'ticket_name': ticket.name,
+            'offer_minutes': int(OFFER_TTL.total_seconds() // 60),
+        }
+
+        html_body = email_templates.render_with_params('emails/waitlist_offer.html', context, ['claim_url'])
+        versions = [{"to": [{"email": entry.email}], "params": {"claim_url": claim_link(entry)}} for entry in entries]
+
+        mailer.send_versions(f"A seat opened up for {ticket.event.title}", html_body, versions)
@@ -0,0 +1,97 @@
+from django.core import signing
+from django.db.models import Q
+
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+class KeysetPagination(BasePagination):
+    """
+    Cursor pagination that seeks on every ordering field instead of an OFFSET.
+
+    The cursor is the signed key of the last row on the page, and the next page is
+    `WHERE (f1, f2, ...) > cursor ORDER BY f1, f2, ... LIMIT size + 1`, so each
+    page is an index range scan no matter how deep it is. There is no total count.
+    `ordering` must be ascending and end in a unique field.
+    """
+    ordering = ('id',)
+    page_size = 10
+    page_size_query_param = 'size'
+    max_page_size = 100
+    cursor_query_param = 'cursor'
+    invalid_cursor_message = 'Invalid cursor'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        self.model = queryset.model
+
+        cursor = request.query_params.get(self.cursor_query_param)
+        if cursor:
+            queryset = queryset.filter(self.seek(self.decode_cursor(cursor)))
+
+        rows = list(queryset.order_by(*self.ordering)[:self.page_size + 1])
+        self.has_next = len(rows) > self.page_size
+        self.page = rows[:self.page_size]
+
+        return self.page
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params.get(self.page_size_query_param, self.page_size))
+        except ValueError:
+            return self.page_size
+
+        return max(1, min(size, self.max_page_size))
+
+    def seek(self, key):
+        """
+        Expands the row comparison into `f1 >= v1 AND (f1 > v1 OR (f1 = v1 AND ...))`.
+        The leading `>=` lets Postgres start the index scan at the cursor.
+        """
+        condition = Q()
+        for i, field in enumerate(self.ordering):
+            equal = {name: key[name] for name in self.ordering[:i]}
+            condition |= Q(**equal, **{f"{field}__gt": key[field]})
+
+        first = self.ordering[0]
+        return Q(**{f"{first}__gte": key[first]}) & condition
+
+    def encode_cursor(self, row):
+        key = [str(getattr(row, field)) for field in self.ordering]
+        return signing.dumps(key, salt=self.__class__.__name__, compress=True)
+
+    def decode_cursor(self, cursor):
+        try:
+            values = signing.loads(cursor, salt=self.__class__.__name__)
+            return {
+                field: self.model._meta.get_field(field).to_python(value)
+                for field, value in zip(self.ordering, values, strict=True)
+            }
+        except Exception:
+            raise NotFound(self.invalid_cursor_message)
+
+    def get_next_link(self):
+        url = self.request.build_absolute_uri()
+
+        if not self.has_next:
+            return None
+
+        return replace_query_param(url, self.cursor_query_param, self.encode_cursor(self.page[-1]))
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_next_link(),
+            'results': data,
+        })
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
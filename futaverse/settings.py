@@ -23,6 +23,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
     
     'rest_framework',
     'rest_framework_simplejwt',
@@ -36,6 +37,7 @@ INSTALLED_APPS = [
     'mentorships',
     'events',
     'payments',
+    'search',
 ]
 
 AUTH_USER_MODEL = "core.User"
@@ -73,19 +75,31 @@ WSGI_APPLICATION = 'futaverse.wsgi.application'
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.postgresql',
-        'NAME': 'postgres',
+        'NAME': os.environ.get('DB_NAME', 'postgres'),
         'USER': os.environ['DB_USER'],
         'PASSWORD': os.environ['DB_PASSWORD'],
-        'HOST': 'aws-1-eu-west-1.pooler.supabase.com',
-        'PORT': '6543',
+        'HOST': os.environ.get('DB_HOST', 'aws-1-eu-west-1.pooler.supabase.com'),
+        'PORT': os.environ.get('DB_PORT', '6543'),
         'OPTIONS': {
-            'sslmode': 'verify-full',
+            'sslmode': os.environ.get('DB_SSLMODE', 'verify-full'),
             'sslrootcert': os.path.join(BASE_DIR, 'root.crt'),
             'connect_timeout': 30,
         }
     }
 }
 
+# Shared by every worker, so QR images and calendar feed blocks are rendered once
+# per deployment rather than once per process. The table is created by a migration
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+        'LOCATION': 'django_cache',
+        'OPTIONS': {
+            'MAX_ENTRIES': int(os.environ.get('CACHE_MAX_ENTRIES', 100000)),
+        }
+    }
+}
+
 
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -19,4 +19,5 @@ urlpatterns = [
     path('api/students', include('students.urls')),
     path('api/events/', include('events.urls')),
     path('api/payments', include('payments.urls')),
+    path('api/search', include('search.urls')),
 ]
@@ -1,18 +1,76 @@
 from sib_api_v3_sdk import Configuration, ApiClient, TransactionalEmailsApi, SendSmtpEmail
+from sib_api_v3_sdk.rest import ApiException
 import os
 from rest_framework.response import Response
 from rest_framework import status
 import logging
 
+from django.conf import settings
+from django.db.models import F
+from django.utils import timezone
+
+from core.models import EmailDelivery
+
+from concurrent.futures import ThreadPoolExecutor, as_completed
+import random
+import threading
+import time
+import uuid
+
 logger = logging.getLogger(__name__)
 
+# Brevo's cap on message_versions in one call
+MAX_MESSAGE_VERSIONS = 1000
+
+BULK_CHUNK_SIZE = min(getattr(settings, "BREVO_BULK_CHUNK_SIZE", MAX_MESSAGE_VERSIONS), MAX_MESSAGE_VERSIONS)
+BULK_WORKERS = getattr(settings, "BREVO_BULK_WORKERS", 4)
+BULK_RETRIES = getattr(settings, "BREVO_BULK_RETRIES", 3)
+BULK_BACKOFF_SECONDS = getattr(settings, "BREVO_BULK_BACKOFF_SECONDS", 1)
+REQUESTS_PER_SECOND = getattr(settings, "BREVO_REQUESTS_PER_SECOND", 10)
+
+class TokenBucket:
+    """
+    Allows `rate` calls per second on average with bursts up to `capacity`;
+    take() blocks until a call is allowed.
+    """
+    def __init__(self, rate, capacity=None):
+        self.rate = rate
+        self.capacity = capacity or rate
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+        
+    def take(self):
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                
+                wait = (1 - self.tokens) / self.rate
+                
+            time.sleep(wait)
+
+# Shared by every send in the process, since Brevo's limit is per account
+_rate_limit = TokenBucket(REQUESTS_PER_SECOND)
+
+class BulkEmailFailed(Exception):
+    def __init__(self, campaign, failed):
+        super().__init__(f"{len(failed)} recipient(s) of {campaign} were not sent")
+        self.campaign = campaign
+        self.failed = failed
+
 class BrevoEmailService:
     def __init__(self):
         self.configuration = Configuration()
         self.configuration.api_key['api-key'] = os.getenv("BREVO_API_KEY")
         self.api_instance = TransactionalEmailsApi(ApiClient(self.configuration))
 
-    def send(self, subject: str, body: str, recipient: str, sender_name="FutaVerse Services", sender_email=None, is_html=False,):
+    def send(self, subject: str, body: str, recipient: str, sender_name="FutaVerse Services", sender_email=None, is_html=False, fail_silently=True):
         sender_email = sender_email or os.getenv("MAIL_USERNAME")
         content_field = "html_content" if is_html else "text_content"
 
@@ -26,33 +84,118 @@ class BrevoEmailService:
         email = SendSmtpEmail(**email_data)
         
         try:
+            _rate_limit.take()
             self.api_instance.send_transac_email(email)
         
         except Exception as e:
             print(f"Email send failed: {e}")
+            if not fail_silently:
+                raise
             return Response({"detail": str(e), "status": "error"}, status=status.HTTP_400_BAD_REQUEST)
         
-    def send_bulk(self, subject: str, body: str, recipients: list, is_html=True):
+    def send_bulk(self, subject: str, body: str, recipients: list, is_html=True, campaign=None):
         """
         recipients: list of strings ['a@b.com', 'c@d.com']
+        
+        Splits recipients into BULK_CHUNK_SIZE message_versions calls, sent
+        BULK_WORKERS at a time under the process-wide rate limit. Failed chunks
+        are retried with backoff, and every recipient's outcome is recorded as an
+        EmailDelivery under the campaign. Sending a campaign again only reaches
+        the recipients it has not reached yet. Raises BulkEmailFailed if any
+        recipient is still unsent at the end.
+        """
+        campaign = campaign or f"bulk_{uuid.uuid4().hex}"
+        recipients = list(dict.fromkeys(email for email in recipients if email))
+        
+        EmailDelivery.objects.bulk_create(
+            [EmailDelivery(campaign=campaign, email=email) for email in recipients],
+            batch_size=1000,
+            ignore_conflicts=True
+        )
+        already_sent = set(
+            EmailDelivery.objects.filter(campaign=campaign, status=EmailDelivery.Status.SENT).values_list('email', flat=True)
+        )
+        pending = [email for email in recipients if email not in already_sent]
+        
+        chunks = [pending[i:i + BULK_CHUNK_SIZE] for i in range(0, len(pending), BULK_CHUNK_SIZE)]
+        content_field = "html_content" if is_html else "text_content"
+        failed = []
+        
+        if chunks:
+            with ThreadPoolExecutor(max_workers=min(BULK_WORKERS, len(chunks)), thread_name_prefix="brevo") as pool:
+                futures = {pool.submit(self._send_chunk, subject, body, chunk, content_field): chunk for chunk in chunks}
+                
+                # Results are recorded here, on the caller's database connection
+                for future in as_completed(futures):
+                    chunk = futures[future]
+                    tries, error = future.result()
+                    deliveries = EmailDelivery.objects.filter(campaign=campaign, email__in=chunk)
+                    
+                    if error is None:
+                        deliveries.update(status=EmailDelivery.Status.SENT, sent_at=timezone.now(), attempts=F('attempts') + tries, last_error=None)
+                    else:
+                        failed.extend(chunk)
+                        deliveries.update(status=EmailDelivery.Status.FAILED, attempts=F('attempts') + tries, last_error=error)
+                        logger.error(f"Bulk email chunk of {len(chunk)} for {campaign} failed after {tries} tries: {error}")
+                        
+        logger.info(f"Bulk email {campaign}: {len(pending) - len(failed)} sent in {len(chunks)} call(s), {len(already_sent)} already sent, {len(failed)} failed")
+        
+        if failed:
+            raise BulkEmailFailed(campaign, failed)
+        
+        return {'campaign': campaign, 'sent': len(pending), 'skipped': len(already_sent)}
+    
+    def _send_chunk(self, subject, body, chunk, content_field):
         """
+        Returns (tries, error); error is None once the chunk went out.
+        """
+        sender_email = os.getenv("MAIL_USERNAME")
+        email = SendSmtpEmail(
+            sender={"email": sender_email, "name": "FutaVerse Services"},
+            subject=subject,
+            message_versions=[{"to": [{"email": recipient}]} for recipient in chunk],
+            **{content_field: body}
+        )
+        
+        for attempt in range(BULK_RETRIES + 1):
+            _rate_limit.take()
+            
+            try:
+                self.api_instance.send_transac_email(email)
+                return attempt + 1, None
+            
+            except ApiException as e:
+                error = f"{e.status} {e.reason}"
+                retryable = e.status in (None, 0, 429) or e.status >= 500
+                
+            except Exception as e:
+                # Connection errors and timeouts
+                error = str(e)
+                retryable = True
+                
+            if not retryable or attempt == BULK_RETRIES:
+                return attempt + 1, error
+            
+            time.sleep(BULK_BACKOFF_SECONDS * 2 ** attempt + random.uniform(0, BULK_BACKOFF_SECONDS))
+            
+    def send_versions(self, subject: str, body: str, versions: list, is_html=True, sender_name="FutaVerse Services"):
+        """
+        One API call for up to MAX_MESSAGE_VERSIONS recipients that share a body.
+        versions: [{"to": [{"email": ...}], "params": {...}}, ...]; {{ params.x }}
+        in the body and subject is filled in per version. Raises on failure.
+        """
+        if len(versions) > MAX_MESSAGE_VERSIONS:
+            raise ValueError(f"At most {MAX_MESSAGE_VERSIONS} message versions per call")
+        
         sender_email = os.getenv("MAIL_USERNAME")
         content_field = "html_content" if is_html else "text_content"
-
-        message_versions = [
-            {"to": [{"email": email}]} for email in recipients
-        ]
-
-        email_data = {
-            "sender": {"email": sender_email, "name": "FutaVerse Services"},
-            "subject": subject,
-            content_field: body,
-            "message_versions": message_versions
-        }
         
-        email = SendSmtpEmail(**email_data)
+        email = SendSmtpEmail(
+            sender={"email": sender_email, "name": sender_name},
+            subject=subject,
+            message_versions=versions,
+            **{content_field: body}
+        )
         
-        try:
-            self.api_instance.send_transac_email(email)
-        except Exception as e:
-            logger.error(f"Bulk Email send failed: {e}")
\ No newline at end of file
+        _rate_limit.take()
+        self.api_instance.send_transac_email(email)
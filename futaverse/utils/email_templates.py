@@ -0,0 +1,29 @@
+"""
+Email rendering. Each template is loaded and compiled once per process; sends
+only pay for Template.render.
+
+For batched sends, per-recipient fields are rendered as Brevo placeholders
+({{ params.name }}) so the HTML is built once per batch and Brevo fills in
+each message_version's params. Brevo escapes params itself, so values are
+passed raw.
+"""
+from django.template.loader import get_template
+from django.utils.safestring import mark_safe
+
+from functools import lru_cache
+
+@lru_cache(maxsize=None)
+def compiled(template_name):
+    return get_template(template_name)
+
+def render(template_name, context):
+    return compiled(template_name).render(context)
+
+def render_with_params(template_name, context, params):
+    """
+    Renders the template once, leaving a Brevo placeholder wherever one of
+    params is used. Placeholders are truthy, so `{% if %}` on a per-recipient
+    field always takes the branch that shows it.
+    """
+    placeholders = {name: mark_safe(f"{{{{ params.{name} }}}}") for name in params}
+    return render(template_name, {**context, **placeholders})
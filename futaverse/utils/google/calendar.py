@@ -0,0 +1,97 @@
+"""
+Per-process factory for authorized Google Calendar clients.
+
+build() reads and parses the ~120KB discovery document, generates the resource
+classes and opens a fresh HTTP connection on every call, and every
+service.events() call generates the collection's methods again. Here the
+document is parsed once per process, and each worker thread keeps a small LRU
+of per-user clients. Each client holds its service and its events collection,
+and its AuthorizedHttp transport keeps connections to Google open between
+requests. httplib2 is not thread-safe, so clients are never shared
+across threads.
+"""
+from django.conf import settings
+
+from googleapiclient.discovery import build_from_document
+from googleapiclient.discovery_cache import get_static_doc
+
+from collections import OrderedDict, namedtuple
+import hashlib
+import json
+import threading
+
+SERVICE_CACHE_SIZE = getattr(settings, "GOOGLE_CALENDAR_SERVICE_CACHE_SIZE", 64)
+
+_discovery = None
+_discovery_lock = threading.Lock()
+
+# Bumped by evict() so other threads drop their copy on next use
+_generations = {}
+_generations_lock = threading.Lock()
+
+_local = threading.local()
+
+CalendarClient = namedtuple("CalendarClient", ["service", "events"])
+
+def discovery_document():
+    global _discovery
+
+    if _discovery is None:
+        with _discovery_lock:
+            if _discovery is None:
+                _discovery = json.loads(get_static_doc("calendar", "v3"))
+
+    return _discovery
+
+def fingerprint(credentials):
+    """
+    Changes whenever the token does, so a refreshed or re-authorized user never
+    gets a client bound to stale credentials.
+    """
+    raw = f"{credentials.token}:{getattr(credentials, 'refresh_token', None)}"
+    return hashlib.sha256(raw.encode()).hexdigest()[:16]
+
+def _cache():
+    clients = getattr(_local, "clients", None)
+    if clients is None:
+        clients = _local.clients = OrderedDict()
+    return clients
+
+def _build(credentials):
+    service = build_from_document(discovery_document(), credentials=credentials)
+    return CalendarClient(service, service.events())
+
+def calendar_client(credentials, user_id=None):
+    """
+    Returns an authorized Calendar v3 client. Without a user_id the client is
+    built fresh (still from the parsed document) and not cached.
+    """
+    if user_id is None:
+        return _build(credentials)
+
+    clients = _cache()
+    key = fingerprint(credentials)
+    generation = _generations.get(user_id, 0)
+
+    entry = clients.get(user_id)
+    if entry and entry[0] == key and entry[1] == generation:
+        clients.move_to_end(user_id)
+        return entry[2]
+
+    client = _build(credentials)
+    clients[user_id] = (key, generation, client)
+    clients.move_to_end(user_id)
+
+    while len(clients) > SERVICE_CACHE_SIZE:
+        clients.popitem(last=False)
+
+    return client
+
+def evict(user_id):
+    """
+    Drops the user's cached clients in every thread, e.g. after they re-authorize.
+    """
+    with _generations_lock:
+        _generations[user_id] = _generations.get(user_id, 0) + 1
+
+    _cache().pop(user_id, None)
@@ -0,0 +1,170 @@
+"""
+Google OAuth credentials for calendar calls.
+
+Credentials built from User.google_credentials are kept in memory per process,
+so most calls never touch the token endpoint. A token is refreshed on a
+background thread once it is within REFRESH_AHEAD of expiry. Only an already
+expired token makes the request wait for Google.
+
+Refreshes are single-flight. Within a process they serialize on a per-user lock.
+Across processes they take select_for_update on the user row and re-read it, so
+whoever waited behind a refresh picks up the new token instead of spending the
+refresh token again.
+"""
+from django.conf import settings
+from django.db import transaction, close_old_connections
+
+from google.oauth2.credentials import Credentials
+from google.auth.transport.requests import Request
+from google.auth.exceptions import RefreshError, TransportError
+
+from core.models import User
+
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone as dt_timezone
+from functools import partial
+from logging import getLogger
+
+import json
+import threading
+
+logger = getLogger(__name__)
+
+REFRESH_AHEAD = timedelta(seconds=getattr(settings, "GOOGLE_TOKEN_REFRESH_AHEAD_SECONDS", 600))
+REFRESH_TIMEOUT_SECONDS = getattr(settings, "GOOGLE_TOKEN_REFRESH_TIMEOUT_SECONDS", 10)
+
+_cache = {}
+_cache_lock = threading.Lock()
+_user_locks = defaultdict(threading.Lock)
+_refreshing = set()
+_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="google-token")
+
+def credentials_info(credentials: Credentials):
+    """
+    What gets stored in User.google_credentials, including the expiry.
+    """
+    return json.loads(credentials.to_json())
+
+def time_left(credentials: Credentials):
+    # google-auth keeps expiry as naive UTC
+    if credentials.expiry is None:
+        return None
+    return credentials.expiry - datetime.now(dt_timezone.utc).replace(tzinfo=None)
+
+def _is_fresh(credentials):
+    remaining = time_left(credentials) if credentials else None
+    return remaining is not None and remaining > REFRESH_AHEAD
+
+def _is_usable(credentials):
+    remaining = time_left(credentials) if credentials else None
+    return remaining is not None and remaining > timedelta(0) and bool(credentials.token)
+
+class CredentialManager:
+    @staticmethod
+    def get(user: User):
+        """
+        Returns usable credentials for the user, or None when they have to
+        authorize again.
+        """
+        stored = user.google_credentials or {}
+        if not stored.get('token'):
+            return None
+
+        credentials = CredentialManager._cached(user.id, stored)
+
+        if not _is_usable(credentials):
+            return CredentialManager.refresh(user.id)
+
+        if not _is_fresh(credentials):
+            CredentialManager.refresh_in_background(user.id)
+
+        return credentials
+
+    @staticmethod
+    def _cached(user_id, stored):
+        with _cache_lock:
+            cached = _cache.get(user_id)
+
+        if cached and cached.token == stored.get('token'):
+            return cached
+
+        credentials = Credentials.from_authorized_user_info(stored) if stored.get('refresh_token') else Credentials(token=stored['token'])
+
+        # The user row may have been loaded before this process refreshed the token
+        if cached and time_left(cached) and time_left(credentials) and time_left(cached) > time_left(credentials):
+            return cached
+
+        with _cache_lock:
+            _cache[user_id] = credentials
+
+        return credentials
+
+    @staticmethod
+    def refresh(user_id):
+        """
+        Refreshes the user's token unless someone else already did, and returns
+        the current credentials (None if the refresh token no longer works).
+        """
+        with _cache_lock:
+            lock = _user_locks[user_id]
+
+        with lock:
+            with _cache_lock:
+                cached = _cache.get(user_id)
+
+            if _is_fresh(cached):
+                return cached
+
+            with transaction.atomic():
+                stored = User.objects.select_for_update().filter(pk=user_id).values_list('google_credentials', flat=True).first()
+
+                if not stored or not stored.get('token') or not stored.get('refresh_token'):
+                    CredentialManager.forget(user_id)
+                    return None
+
+                credentials = Credentials.from_authorized_user_info(stored)
+
+                if not _is_fresh(credentials):
+                    try:
+                        credentials.refresh(partial(Request(), timeout=REFRESH_TIMEOUT_SECONDS))
+                    except RefreshError as e:
+                        # Revoked or expired refresh token; only re-authorizing helps
+                        logger.error(f"Google token refresh failed for user {user_id}: {e}")
+                        CredentialManager.forget(user_id)
+                        return None
+                    except TransportError as e:
+                        logger.error(f"Google token endpoint unreachable for user {user_id}: {e}")
+                        return cached if _is_usable(cached) else None
+
+                    User.objects.filter(pk=user_id).update(google_credentials={**stored, **credentials_info(credentials)})
+
+            with _cache_lock:
+                _cache[user_id] = credentials
+
+            return credentials
+
+    @staticmethod
+    def refresh_in_background(user_id):
+        with _cache_lock:
+            if user_id in _refreshing:
+                return
+            _refreshing.add(user_id)
+
+        _executor.submit(CredentialManager._refresh_in_thread, user_id)
+
+    @staticmethod
+    def _refresh_in_thread(user_id):
+        try:
+            CredentialManager.refresh(user_id)
+        except Exception as e:
+            logger.error(f"Background Google token refresh failed for user {user_id}: {e}")
+        finally:
+            with _cache_lock:
+                _refreshing.discard(user_id)
+            close_old_connections()
+
+    @staticmethod
+    def forget(user_id):
+        with _cache_lock:
+            _cache.pop(user_id, None)
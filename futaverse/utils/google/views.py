@@ -13,6 +13,8 @@ from dotenv import load_dotenv
 import os
 
 from core.models import User
+from .calendar import evict
+from .credentials import CredentialManager, credentials_info
 
 logger = logging.getLogger(__name__)
 
@@ -121,16 +123,11 @@ def google_auth_callback(request):
     flow.fetch_token(authorization_response=request.build_absolute_uri())
     creds = flow.credentials
 
-    User.objects.filter(sqid=user_id).update(
-        google_credentials={
-            "token": creds.token,
-            "refresh_token": creds.refresh_token,
-            "token_uri": creds.token_uri,
-            "client_id": creds.client_id,
-            "client_secret": creds.client_secret,
-            "scopes": creds.scopes,
-        }
-    )
+    User.objects.filter(sqid=user_id).update(google_credentials=credentials_info(creds))
+    
+    for pk in User.objects.filter(sqid=user_id).values_list('id', flat=True):
+        CredentialManager.forget(pk)
+        evict(pk)
 
     if redirect_after_auth:
         return redirect(redirect_after_auth)
@@ -0,0 +1,114 @@
+"""
+Leases for work that must not run twice at once across workers and nodes,
+typically a request that calls out to Google or sends email.
+
+Leases live in the core_resourcelock table, so they hold across every gunicorn
+worker that shares the database. Each lease has an owner token and a TTL, and a
+holder renews it on a background thread for as long as it runs. If a holder
+crashes, its lease simply expires. Postgres advisory locks would need a session
+that outlives the transaction pooler's, and the default LocMem cache is per
+process.
+"""
+from django.conf import settings
+from django.db import connection
+
+from rest_framework import status
+from rest_framework.exceptions import APIException
+
+from core.models import ResourceLock
+
+from logging import getLogger
+
+import threading
+import uuid
+
+logger = getLogger(__name__)
+
+LOCK_TTL_SECONDS = getattr(settings, "RESOURCE_LOCK_TTL_SECONDS", 30)
+
+ACQUIRE_SQL = """
+    INSERT INTO {table} (is_deleted, created_at, key, owner, expires_at)
+    VALUES (FALSE, now(), %s, %s, now() + make_interval(secs => %s))
+    ON CONFLICT (key) DO UPDATE SET
+        owner = EXCLUDED.owner,
+        created_at = EXCLUDED.created_at,
+        expires_at = EXCLUDED.expires_at
+    WHERE {table}.expires_at < now()
+    RETURNING owner
+"""
+
+RENEW_SQL = """
+    UPDATE {table} SET expires_at = now() + make_interval(secs => %s)
+    WHERE key = %s AND owner = %s
+"""
+
+class ResourceLocked(APIException):
+    status_code = status.HTTP_409_CONFLICT
+    default_detail = "Request already in progress."
+    default_code = "resource_locked"
+
+class LeaseLock:
+    """
+    with LeaseLock(f"event_update_{event.sqid}"):
+        ...  # raises ResourceLocked if someone else holds the key
+
+    Must be taken outside transaction.atomic(), otherwise other workers would
+    not see the lease until the transaction commits.
+    """
+    def __init__(self, key, ttl=LOCK_TTL_SECONDS, renew=True):
+        self.key = key
+        self.ttl = ttl
+        self.renew_in_background = renew
+        self.owner = uuid.uuid4()
+        self.lost = False
+        self._stop = threading.Event()
+        self._renewer = None
+
+    def acquire(self):
+        if connection.in_atomic_block:
+            raise RuntimeError("LeaseLock must be acquired outside a transaction")
+
+        table = ResourceLock._meta.db_table
+        with connection.cursor() as cursor:
+            cursor.execute(ACQUIRE_SQL.format(table=table), [self.key, self.owner, self.ttl])
+            return cursor.fetchone() is not None
+
+    def renew(self):
+        table = ResourceLock._meta.db_table
+        with connection.cursor() as cursor:
+            cursor.execute(RENEW_SQL.format(table=table), [self.ttl, self.key, self.owner])
+            return cursor.rowcount == 1
+
+    def release(self):
+        self._stop.set()
+        if self._renewer:
+            self._renewer.join()
+            self._renewer = None
+
+        ResourceLock.objects.filter(key=self.key, owner=self.owner).delete()
+
+    def _renew_until_stopped(self):
+        try:
+            while not self._stop.wait(self.ttl / 3):
+                if not self.renew():
+                    self.lost = True
+                    logger.warning(f"Lease on {self.key} expired before it could be renewed")
+                    return
+        except Exception as e:
+            logger.error(f"Renewing lease on {self.key} failed: {e}")
+        finally:
+            # The thread's own connection; nothing else will close it
+            connection.close()
+
+    def __enter__(self):
+        if not self.acquire():
+            raise ResourceLocked()
+
+        if self.renew_in_background:
+            self._renewer = threading.Thread(target=self._renew_until_stopped, name=f"lease-{self.key}", daemon=True)
+            self._renewer.start()
+
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.release()
@@ -0,0 +1,53 @@
+# Generated by Django 5.2.3 on 2026-10-18 18:54
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.db import migrations
+
+SEARCH_VECTOR_SQL = """
+CREATE OR REPLACE FUNCTION internships_internship_search_vector_update() RETURNS trigger AS $$
+BEGIN
+    NEW.search_vector :=
+        setweight(to_tsvector('english', coalesce(NEW.title, '')), 'A') ||
+        setweight(to_tsvector('english', coalesce(NEW.industry, '')), 'B') ||
+        setweight(to_tsvector('english', coalesce(
+            CASE WHEN jsonb_typeof(NEW.skills_required) = 'array'
+                THEN (SELECT string_agg(skill, ' ') FROM jsonb_array_elements_text(NEW.skills_required) AS skill)
+            END, '')), 'B') ||
+        setweight(to_tsvector('english', coalesce(NEW.description, '')), 'C');
+    RETURN NEW;
+END
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER internships_internship_search_vector_trigger
+BEFORE INSERT OR UPDATE OF title, industry, skills_required, description ON internships_internship
+FOR EACH ROW EXECUTE FUNCTION internships_internship_search_vector_update();
+
+UPDATE internships_internship SET title = title;
+"""
+
+DROP_SEARCH_VECTOR_SQL = """
+DROP TRIGGER IF EXISTS internships_internship_search_vector_trigger ON internships_internship;
+DROP FUNCTION IF EXISTS internships_internship_search_vector_update();
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('alumnus', '0001_initial'),
+        ('internships', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='internship',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='internship',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='internship_search_idx'),
+        ),
+        migrations.RunSQL(SEARCH_VECTOR_SQL, DROP_SEARCH_VECTOR_SQL),
+    ]
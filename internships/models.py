@@ -1,4 +1,6 @@
 from django.db import models
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
 from alumnus.models import AlumniProfile
 from students.models import StudentProfile
 from futaverse.models import BaseModel
@@ -45,6 +47,14 @@ class Internship(BaseModel):
     
     updated_at = models.DateTimeField(auto_now=True)
     
+    # Maintained by a database trigger (see migration 0002)
+    search_vector = SearchVectorField(null=True, editable=False)
+    
+    class Meta:
+        indexes = [
+            GinIndex(fields=['search_vector'], name='internship_search_idx'),
+        ]
+    
     def toggle_active(self):
         self.is_active = not self.is_active
         self.save(update_fields=['is_active'])
@@ -0,0 +1,49 @@
+# Generated by Django 5.2.3 on 2026-10-18 18:54
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.db import migrations
+
+SEARCH_VECTOR_SQL = """
+CREATE OR REPLACE FUNCTION mentorships_mentorship_search_vector_update() RETURNS trigger AS $$
+BEGIN
+    NEW.search_vector :=
+        setweight(to_tsvector('english', coalesce(NEW.title, '')), 'A') ||
+        setweight(to_tsvector('english', coalesce(NEW.category, '')), 'B') ||
+        setweight(to_tsvector('english', coalesce(NEW.description, '')), 'C');
+    RETURN NEW;
+END
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER mentorships_mentorship_search_vector_trigger
+BEFORE INSERT OR UPDATE OF title, category, description ON mentorships_mentorship
+FOR EACH ROW EXECUTE FUNCTION mentorships_mentorship_search_vector_update();
+
+UPDATE mentorships_mentorship SET title = title;
+"""
+
+DROP_SEARCH_VECTOR_SQL = """
+DROP TRIGGER IF EXISTS mentorships_mentorship_search_vector_trigger ON mentorships_mentorship;
+DROP FUNCTION IF EXISTS mentorships_mentorship_search_vector_update();
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('alumnus', '0001_initial'),
+        ('mentorships', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='mentorship',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='mentorship',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='mentorship_search_idx'),
+        ),
+        migrations.RunSQL(SEARCH_VECTOR_SQL, DROP_SEARCH_VECTOR_SQL),
+    ]
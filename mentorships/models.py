@@ -1,4 +1,6 @@
 from django.db import models
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
 from alumnus.models import AlumniProfile
 from students.models import StudentProfile
 from futaverse.models import BaseModel
@@ -32,6 +34,14 @@ class Mentorship(BaseModel):
     is_active = models.BooleanField(default=True)
     updated_at = models.DateTimeField(auto_now=True)
     
+    # Maintained by a database trigger (see migration 0002)
+    search_vector = SearchVectorField(null=True, editable=False)
+    
+    class Meta:
+        indexes = [
+            GinIndex(fields=['search_vector'], name='mentorship_search_idx'),
+        ]
+    
     def __str__(self):
         return f"{self.title} (mentorship)"
     
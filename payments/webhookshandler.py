@@ -1,8 +1,11 @@
-from django.db.models import F
 from django.db import transaction
+from django.utils import timezone
 
-from events.models import Event, Ticket, TicketPurchase
+from events.models import TicketPurchase
 from events.services import EventService
+from events.inventory import InventoryService, TicketSoldOut
+from events.analytics import SalesAnalytics
+from events.group_purchases import GroupPurchaseService, is_group_reference
 
 from logging import getLogger
 logger = getLogger(__name__)
@@ -11,6 +14,9 @@ def handle_charge_success(data):
     print("Handling charge success webhook...")
     reference = data.get("reference")
     
+    if is_group_reference(reference):
+        return handle_group_charge_success(reference)
+    
     try:
         with transaction.atomic():
             ticket_purchase = TicketPurchase.objects.select_for_update().select_related('ticket', 'ticket__event', 'ticket__event__creator').get(ticket_uid=reference)
@@ -19,20 +25,31 @@ def handle_charge_success(data):
                 logger.info(f"Purchase {reference} already processed. Skipping.")
                 return
             
+            InventoryService.confirm(ticket_purchase)
+            
             ticket_purchase.is_paid = True
+            ticket_purchase.paid_at = timezone.now()
             ticket_purchase.save()
-
-            ticket = ticket_purchase.ticket
-            event = ticket.event
             
-            Ticket.objects.filter(id=ticket.id).update(quantity_sold=F('quantity_sold') + 1)
-        
-        if event.mode in [Event.Mode.VIRTUAL, Event.Mode.HYBRID]:
-            EventService.sync_to_calendar(event)
-        
-        EventService.send_ticket_email(ticket_purchase)
+            EventService.queue_ticket_side_effects(ticket_purchase)
+            SalesAnalytics.record(ticket_purchase.ticket, at=ticket_purchase.paid_at, paid=1, revenue=ticket_purchase.ticket.sales_price)
                 
     except TicketPurchase.DoesNotExist:
         logger.error(f"Purchase not found for reference: {reference}")
+    except TicketSoldOut:
+        logger.error(f"Payment {reference} arrived after its hold expired and the ticket sold out. Refund required.")
     except Exception as e:
-        logger.error(f"Error processing webhook for {reference}: {str(e)}")
\ No newline at end of file
+        logger.error(f"Error processing webhook for {reference}: {str(e)}")
+
+def handle_group_charge_success(reference):
+    try:
+        fulfilled = GroupPurchaseService.fulfil(reference)
+        
+        if not fulfilled:
+            logger.info(f"Group purchase {reference} already processed. Skipping.")
+            
+    except TicketSoldOut:
+        logger.error(f"Payment {reference} arrived after its holds expired and the tickets sold out. Refund required.")
+    except Exception as e:
+        logger.error(f"Error processing webhook for {reference}: {str(e)}")
+
@@ -0,0 +1,130 @@
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.utils import timezone
+
+from core.models import User
+from alumnus.models import AlumniProfile
+from events.models import Event
+from internships.models import Internship
+from mentorships.models import Mentorship
+from search.services import SearchService
+
+from datetime import timedelta
+from itertools import accumulate
+import random
+import statistics
+import time
+import uuid
+
+VOCABULARY = (
+    "python django react data science machine learning cloud devops security design product marketing "
+    "finance accounting law medicine nursing agriculture engineering civil mechanical electrical chemical "
+    "robotics blockchain fintech startup career networking leadership communication research thesis "
+    "internship mentorship workshop symposium hackathon bootcamp training seminar conference webinar "
+    "analytics statistics mathematics physics biology chemistry geology architecture urban planning "
+    "entrepreneurship investment banking consulting strategy operations logistics supply chain energy "
+    "solar renewable climate policy governance public health nutrition sports media journalism film "
+    "music art photography writing editing translation languages education teaching tutoring coding "
+    "mobile android ios backend frontend fullstack database postgres kubernetes docker linux networking"
+).split()
+
+QUERIES = [
+    "machine learning", "python", "career networking", "cloud security", "public health research",
+    "mobile android", "renewable energy", "investment banking", "data science internship", "react frontend",
+    "supply chain logistics", "hackathon", "mentorship leadership", "climate policy", "kubernetes docker",
+]
+
+SYLLABLES = "ba ko ri mu te sa lo ne di fa gu pe zo ya wi ka".split()
+
+def build_vocabulary(size=5000):
+    """
+    The real-word vocabulary padded with generated words. Terms are drawn with
+    Zipf weights (1/rank) so a few are very common and most are rare, like real text.
+    """
+    vocabulary = list(VOCABULARY)
+    while len(vocabulary) < size:
+        vocabulary.append("".join(random.choices(SYLLABLES, k=random.randint(2, 4))))
+
+    return vocabulary, list(accumulate(1 / rank for rank in range(1, len(vocabulary) + 1)))
+
+ZIPF_VOCABULARY, ZIPF_WEIGHTS = build_vocabulary()
+
+def words(count):
+    return " ".join(random.choices(ZIPF_VOCABULARY, cum_weights=ZIPF_WEIGHTS, k=count))
+
+class Command(BaseCommand):
+    help = (
+        "Generates a synthetic corpus of events, internships and mentorships and reports search latency "
+        "percentiles. Run against a local database; the corpus is deleted afterwards unless --keep is given."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=500_000, help="Total rows across the three types")
+        parser.add_argument("--queries", type=int, default=300)
+        parser.add_argument("--batch-size", type=int, default=5000)
+        parser.add_argument("--keep", action="store_true")
+
+    def handle(self, *args, **options):
+        marker = uuid.uuid4().hex[:8]
+        user = User.objects.create(email=f"bench-search-{marker}@futaverse.local", role=User.Role.ALUMNI)
+        alumnus = AlumniProfile.objects.create(
+            user=user, phone_num="0", gender=AlumniProfile.Gender.UNKNOWN, firstname="Bench", lastname="Search",
+            address="-", state="-", country="-", department="-", faculty="-", grad_year="2020",
+            current_job_title="-", current_company="-", industry="-", years_of_exp=0
+        )
+
+        try:
+            self.generate(user, alumnus, options["rows"], options["batch_size"])
+
+            with connection.cursor() as cursor:
+                cursor.execute("ANALYZE events_event; ANALYZE internships_internship; ANALYZE mentorships_mentorship;")
+
+            self.measure(options["queries"])
+        finally:
+            if not options["keep"]:
+                user.delete()
+
+    def generate(self, user, alumnus, rows, batch_size):
+        today = timezone.now().date()
+        split = {"event": rows // 2, "internship": rows // 4, "mentorship": rows - rows // 2 - rows // 4}
+        started = time.perf_counter()
+
+        builders = {
+            "event": lambda: Event(
+                creator=user, title=words(6), description=words(80), category=random.choice(Event.Category.values),
+                mode=Event.Mode.PHYSICAL, date=today + timedelta(days=random.randint(0, 365)), start_time="10:00",
+                is_published=True
+            ),
+            "internship": lambda: Internship(
+                alumnus=alumnus, title=words(5), description=words(80), work_mode=Internship.WorkMode.REMOTE,
+                engagement_type=Internship.EngagementType.FULL_TIME, location="Akure", industry=words(1),
+                skills_required=words(4).split(), duration_weeks=12, start_date=today, end_date=today + timedelta(weeks=12)
+            ),
+            "mentorship": lambda: Mentorship(alumnus=alumnus, title=words(5), description=words(80), category=words(1)),
+        }
+        models = {"event": Event, "internship": Internship, "mentorship": Mentorship}
+
+        for type_name, count in split.items():
+            for offset in range(0, count, batch_size):
+                batch = [builders[type_name]() for _ in range(min(batch_size, count - offset))]
+                models[type_name].objects.bulk_create(batch)
+
+            self.stdout.write(f"Generated {count:,} {type_name} rows")
+
+        self.stdout.write(f"Corpus ready in {time.perf_counter() - started:.1f}s")
+
+    def measure(self, total):
+        timings = []
+
+        for i in range(total):
+            text = QUERIES[i % len(QUERIES)]
+
+            started = time.perf_counter()
+            SearchService.search(text, limit=10)
+            timings.append((time.perf_counter() - started) * 1000)
+
+        timings.sort()
+        p50 = statistics.median(timings)
+        p95 = timings[int(len(timings) * 0.95) - 1]
+        p99 = timings[int(len(timings) * 0.99) - 1]
+        self.stdout.write(f"{total} searches: p50={p50:.1f}ms p95={p95:.1f}ms p99={p99:.1f}ms max={timings[-1]:.1f}ms")
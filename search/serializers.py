@@ -0,0 +1,16 @@
+from rest_framework import serializers
+
+from .services import SearchService
+
+class SearchQuerySerializer(serializers.Serializer):
+    q = serializers.CharField(max_length=200, trim_whitespace=True)
+    types = serializers.MultipleChoiceField(choices=list(SearchService.TYPES), required=False)
+    limit = serializers.IntegerField(min_value=1, max_value=50, default=10)
+    
+class SearchResultSerializer(serializers.Serializer):
+    type = serializers.CharField()
+    id = serializers.CharField()
+    title = serializers.CharField()
+    title_highlight = serializers.CharField()
+    snippet = serializers.CharField()
+    rank = serializers.FloatField()
@@ -0,0 +1,74 @@
+from django.contrib.postgres.search import SearchQuery, SearchRank, SearchHeadline
+from django.db.models import F
+
+from events.models import Event
+from internships.models import Internship
+from mentorships.models import Mentorship
+
+SEARCH_CONFIG = 'english'
+
+HEADLINE_OPTIONS = {
+    'config': SEARCH_CONFIG,
+    'start_sel': '<mark>',
+    'stop_sel': '</mark>',
+    'max_words': 35,
+    'min_words': 15,
+    'max_fragments': 2,
+}
+
+class SearchService:
+    """
+    Ranked full-text search over the trigger-maintained search_vector columns.
+    Each type is one GIN index lookup; snippets are only built for the rows returned.
+    """
+    TYPES = {
+        'event': lambda: Event.objects.filter(is_published=True, is_cancelled=False),
+        'internship': lambda: Internship.objects.filter(is_active=True),
+        'mentorship': lambda: Mentorship.objects.filter(is_active=True),
+    }
+
+    @staticmethod
+    def build_query(text):
+        return SearchQuery(text, search_type='websearch', config=SEARCH_CONFIG)
+
+    @staticmethod
+    def search_type(type_name, query, limit):
+        queryset = SearchService.TYPES[type_name]()
+
+        rows = (
+            queryset.filter(search_vector=query)
+            .annotate(
+                rank=SearchRank(F('search_vector'), query),
+                title_highlight=SearchHeadline('title', query, config=SEARCH_CONFIG, start_sel='<mark>', stop_sel='</mark>', highlight_all=True),
+                snippet=SearchHeadline('description', query, **HEADLINE_OPTIONS),
+            )
+            .order_by('-rank', '-id')
+            .values('id', 'sqid', 'title', 'title_highlight', 'snippet', 'rank')[:limit]
+        )
+
+        return [
+            {
+                'type': type_name,
+                # Events are addressed by sqid, internships and mentorships by id
+                'id': row['sqid'] if type_name == 'event' else row['id'],
+                'title': row['title'],
+                'title_highlight': row['title_highlight'],
+                'snippet': row['snippet'],
+                'rank': row['rank'],
+            }
+            for row in rows
+        ]
+
+    @staticmethod
+    def search(text, types=None, limit=10):
+        """
+        Fans out to each requested type and merges the hits by rank.
+        """
+        query = SearchService.build_query(text)
+        results = []
+
+        for type_name in types or SearchService.TYPES:
+            results.extend(SearchService.search_type(type_name, query, limit))
+
+        results.sort(key=lambda result: result['rank'], reverse=True)
+        return results[:limit]
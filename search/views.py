@@ -0,0 +1,24 @@
+from rest_framework.views import APIView
+from rest_framework.response import Response
+from rest_framework.permissions import IsAuthenticated
+
+from drf_spectacular.utils import extend_schema
+
+from .serializers import SearchQuerySerializer, SearchResultSerializer
+from .services import SearchService
+
+@extend_schema(tags=['Search'], summary="Search events, internships and mentorships", parameters=[SearchQuerySerializer], responses=SearchResultSerializer(many=True))
+class SearchView(APIView):
+    permission_classes = [IsAuthenticated]
+    
+    def get(self, request, *args, **kwargs):
+        params = SearchQuerySerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        
+        results = SearchService.search(
+            params.validated_data['q'],
+            types=params.validated_data.get('types'),
+            limit=params.validated_data['limit']
+        )
+        
+        return Response(SearchResultSerializer(results, many=True).data)